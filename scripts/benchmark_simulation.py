@@ -0,0 +1,269 @@
+"""
+Benchmark the season simulator on synthetic leagues
+Measures throughput, peak memory and accuracy against analytic baselines.
+Runs fully offline — no DuckDB file, API or prediction JSON is needed.
+
+Accuracy checks:
+    - Title decider: every match is played except leader v runner-up (one point
+      apart), so P(title) is exactly P(home win or draw) for the leader
+    - Expected points: E[final points] = current + sum(3 * p_win + p_draw) over
+      the remaining fixtures, for every team of the synthetic league
+
+Paths:
+    - sharded: the batched run_sharded runner used by default
+    - cached: the in-memory --cache-state path (cached_scenario_base, then the
+      state written to a temporary file); skipped above STATE_MAX_CELLS, where
+      simulate_season.py falls back to batches
+
+Usage:
+    python scripts/benchmark_simulation.py                        # 18/20/24 teams, both modes, both paths
+    python scripts/benchmark_simulation.py --teams 20 --sims 1000000
+    python scripts/benchmark_simulation.py --mode goals --workers 4
+    python scripts/benchmark_simulation.py --path cached
+"""
+import argparse
+import pathlib
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from math import lgamma
+import numpy as np
+import pandas as pd
+from simulate_season import (GOAL_COVARIANCE, STATE_MAX_CELLS, cached_scenario_base, reduce_scenario_bases,
+                             run_sharded, save_simulation_state)
+
+LEAGUE_SIZES = [18, 20, 24]
+PATHS = ["sharded", "cached"]
+N_SIMULATIONS = 100_000
+PLAYED_SHARE = 0.5        # share of the double round-robin already played
+MAX_GOALS = 15            # scoreline grid for analytic outcome probabilities
+MAX_Z_SCORE = 4.0         # analytic errors beyond this many standard errors fail the run
+
+def outcome_probabilities(home_exp, away_exp, covariance=GOAL_COVARIANCE):
+    """
+    Exact H/D/A probabilities of the simulator's bivariate Poisson scorelines
+    The shared component cancels in the goal difference, so only the
+    independent parts (expectation - covariance) matter.
+    Returns: matches x 3 array (home, draw, away)
+    """
+    goals = np.arange(MAX_GOALS + 1)
+    log_factorial = np.array([lgamma(g + 1) for g in goals])
+    lambda3 = np.minimum(covariance, np.minimum(home_exp, away_exp))
+
+    def pmf(lam):
+        lam = np.asarray(lam, dtype=np.float64)[:, None]
+        return np.exp(goals * np.log(lam) - lam - log_factorial)
+
+    grid = pmf(home_exp - lambda3)[:, :, None] * pmf(away_exp - lambda3)[:, None, :]
+    probs = np.stack([
+        np.tril(np.ones((MAX_GOALS + 1,) * 2), -1),
+        np.eye(MAX_GOALS + 1),
+        np.triu(np.ones((MAX_GOALS + 1,) * 2), 1),
+    ])
+    probs = np.einsum('mij,kij->mk', grid, probs)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+def round_robin(n_teams):
+    """Double round-robin schedule (circle method) as a list of rounds of (home, away) index pairs"""
+    rotation = list(range(n_teams))
+    rounds = []
+    for r in range(n_teams - 1):
+        pairs = [(rotation[i], rotation[n_teams - 1 - i]) for i in range(n_teams // 2)]
+        rounds.append([(h, a) if r % 2 else (a, h) for h, a in pairs])
+        rotation = [rotation[0], rotation[-1]] + rotation[1:-1]
+    return rounds + [[(a, h) for h, a in pairs] for pairs in rounds]
+
+def fixture_frame(teams, pairs, strength):
+    """Remaining fixtures with goal expectations and matching H/D/A probabilities"""
+    home, away = np.array(pairs).T
+    home_exp = np.exp(0.25 + strength[home] - strength[away]) * 1.1
+    away_exp = np.exp(strength[away] - strength[home]) * 1.1
+    probs = outcome_probabilities(home_exp, away_exp)
+    return pd.DataFrame({
+        'home_team': np.asarray(teams)[home],
+        'away_team': np.asarray(teams)[away],
+        'prob_home_win': probs[:, 0],
+        'prob_draw': probs[:, 1],
+        'prob_away_win': probs[:, 2],
+        'home_goal_expectation': home_exp,
+        'away_goal_expectation': away_exp,
+    })
+
+def synthetic_league(n_teams, played_share=PLAYED_SHARE, seed=0):
+    """
+    A league part-way through a double round-robin
+    Played rounds are filled with Poisson scorelines from random team strengths.
+    Returns: (current_standings, current_goals, completed_matches, future_matches)
+    """
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {i + 1:02d}" for i in range(n_teams)]
+    strength = rng.normal(0, 0.3, n_teams)
+    rounds = round_robin(n_teams)
+    n_played = int(len(rounds) * played_share)
+
+    played = fixture_frame(teams, [p for pairs in rounds[:n_played] for p in pairs], strength)
+    played['home_goals'] = rng.poisson(played['home_goal_expectation'])
+    played['away_goals'] = rng.poisson(played['away_goal_expectation'])
+    completed_matches = played[['home_team', 'away_team', 'home_goals', 'away_goals']]
+
+    sign = np.sign(played['home_goals'] - played['away_goals'])
+    home = pd.DataFrame({'team': played['home_team'], 'points': sign.map({1: 3, 0: 1, -1: 0}),
+                         'goals_for': played['home_goals'], 'goals_against': played['away_goals']})
+    away = pd.DataFrame({'team': played['away_team'], 'points': sign.map({1: 0, 0: 1, -1: 3}),
+                         'goals_for': played['away_goals'], 'goals_against': played['home_goals']})
+    totals = pd.concat([home, away]).groupby('team').sum().reindex(teams, fill_value=0)
+
+    future_matches = fixture_frame(teams, [p for pairs in rounds[n_played:] for p in pairs], strength)
+    return (totals['points'].to_dict(), totals[['goals_for', 'goals_against']],
+            completed_matches, future_matches)
+
+def title_decider_league(n_teams):
+    """
+    Final-day league with one match left: leader (80 pts) hosts runner-up (79 pts)
+    Returns: (current_standings, current_goals, completed_matches, future_matches, analytic title probs)
+    """
+    teams = [f"Team {i + 1:02d}" for i in range(n_teams)]
+    points = [80, 79] + list(range(60, 60 - n_teams + 2, -1))
+    future_matches = fixture_frame(teams, [(0, 1)], np.array([0.2, 0.1] + [0.0] * (n_teams - 2)))
+    current_goals = pd.DataFrame({'goals_for': 50, 'goals_against': 40}, index=teams)
+    completed_matches = pd.DataFrame(columns=['home_team', 'away_team', 'home_goals', 'away_goals'])
+
+    p_home, p_draw, p_away = future_matches.iloc[0][['prob_home_win', 'prob_draw', 'prob_away_win']]
+    analytic = np.zeros(n_teams)
+    analytic[:2] = [p_home + p_draw, p_away]
+    return dict(zip(teams, points)), current_goals, completed_matches, future_matches, analytic
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its finished children (MB)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+def max_z_score(estimate, exact, n_sims):
+    """Largest |estimate - exact| in units of the Monte Carlo standard error"""
+    std_error = np.sqrt(np.clip(exact * (1 - exact), 1e-12, None) / n_sims)
+    return float(np.max(np.abs(estimate - exact) / std_error))
+
+def simulate_counts(path, mode, standings, goals, completed, future, n_sims, seed, workers):
+    """
+    Run one simulation path the way simulate_season.py main() does
+    Returns: (teams, position counts, points counts, simulations run)
+    """
+    if path == "sharded":
+        return run_sharded(mode, standings, future, n_sims, seed=seed, workers=workers,
+                           current_goals=goals, completed_matches=completed)
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = pathlib.Path(tmp) / "simulation_state.npz"
+        base, state = cached_scenario_base(mode, standings, future, n_sims, seed=seed, current_goals=goals,
+                                           completed_matches=completed, state_path=state_path)
+        teams, position_counts, points_counts, _, _, total = reduce_scenario_bases([base])
+        save_simulation_state(state, state_path)
+    return teams, position_counts, points_counts, total
+
+def benchmark_case(n_teams, mode, path, n_sims, workers, seed):
+    """
+    Time one league size / mode / path and measure its error against the analytic baselines
+    Runs in a fresh process so peak RSS belongs to this case alone.
+    """
+    standings, goals, completed, future = synthetic_league(n_teams, seed=seed)
+    n_fixtures = len(future)
+    start = time.perf_counter()
+    teams, position_counts, points_counts, total = simulate_counts(
+        path, mode, standings, goals, completed, future, n_sims, seed, workers
+    )
+    elapsed = time.perf_counter() - start
+
+    # Expected points: exact for any fixture list
+    remaining = {team: 0.0 for team in teams}
+    for row in future.itertuples():
+        remaining[row.home_team] += 3 * row.prob_home_win + row.prob_draw
+        remaining[row.away_team] += 3 * row.prob_away_win + row.prob_draw
+    exact_points = np.array([standings.get(t, 0) + remaining[t] for t in teams])
+    sim_points = points_counts @ np.arange(points_counts.shape[1]) / total
+
+    # Title decider: one match left between the top two
+    standings, goals, completed, future, exact_title = title_decider_league(n_teams)
+    _, decider_counts, _, decider_total = simulate_counts(
+        path, mode, standings, goals, completed, future, n_sims, seed, workers
+    )
+    sim_title = decider_counts[:, 0] / decider_total
+
+    return {
+        'teams': n_teams,
+        'mode': mode,
+        'path': path,
+        'fixtures': n_fixtures,
+        'sims': total,
+        'seconds': elapsed,
+        'sims_per_sec': total / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'title_error': float(np.max(np.abs(sim_title - exact_title))),
+        'title_z': max_z_score(sim_title[:2], exact_title[:2], decider_total),
+        'points_error': float(np.max(np.abs(sim_points - exact_points))),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the season simulator on synthetic leagues")
+    parser.add_argument("--teams", type=int, nargs="+", default=LEAGUE_SIZES,
+                        help=f"League sizes to benchmark (default: {' '.join(map(str, LEAGUE_SIZES))})")
+    parser.add_argument("--mode", choices=["outcomes", "goals"], nargs="+", default=["outcomes", "goals"],
+                        help="Simulation modes to benchmark (default: both)")
+    parser.add_argument("--path", choices=PATHS, nargs="+", default=PATHS,
+                        help="Simulation paths to benchmark: batched run_sharded and/or the "
+                             "in-memory --cache-state path (default: both)")
+    parser.add_argument("--sims", type=int, default=N_SIMULATIONS,
+                        help=f"Simulations per case (default: {N_SIMULATIONS:,})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes passed to the sharded runner (default: 1; "
+                             "the cached path is single-process)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the synthetic leagues and simulations (default: 0)")
+    args = parser.parse_args()
+
+    print(f"⏱️  Benchmarking {args.sims:,} simulations per case "
+          f"({args.workers} worker{'s' if args.workers > 1 else ''})\n")
+
+    results = []
+    spawn = get_context("spawn")
+    for n_teams in args.teams:
+        if n_teams % 2:
+            parser.error(f"--teams must be even (got {n_teams})")
+        n_fixtures = len(synthetic_league(n_teams, seed=args.seed)[3])
+        for mode in args.mode:
+            for path in args.path:
+                if path == "cached" and n_fixtures * args.sims > STATE_MAX_CELLS:
+                    print(f"   - {n_teams} teams, {mode}, cached: skipped "
+                          f"(over STATE_MAX_CELLS, simulate_season.py would use batches)")
+                    continue
+                # Fresh process per case so ru_maxrss is not carried over between cases
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    result = pool.submit(benchmark_case, n_teams, mode, path, args.sims,
+                                         args.workers, args.seed).result()
+                results.append(result)
+                print(f"   ✓ {n_teams} teams, {mode}, {path}: {result['sims_per_sec']:,.0f} sims/sec")
+
+    df = pd.DataFrame(results)
+    print("\n" + "="*80)
+    print("📊 SIMULATION BENCHMARK")
+    print("="*80)
+    print(df.to_string(index=False, formatters={
+        'seconds': '{:.2f}'.format,
+        'sims_per_sec': '{:,.0f}'.format,
+        'peak_rss_mb': '{:.0f}'.format,
+        'title_error': '{:.4f}'.format,
+        'title_z': '{:.2f}'.format,
+        'points_error': '{:.4f}'.format,
+    }))
+
+    failed = df[df['title_z'] > MAX_Z_SCORE]
+    if not failed.empty:
+        print(f"\n❌ Title probabilities off by more than {MAX_Z_SCORE:g} standard errors:")
+        print(failed[['teams', 'mode', 'path', 'title_error', 'title_z']].to_string(index=False))
+        sys.exit(1)
+    print(f"\n✅ All title probabilities within {MAX_Z_SCORE:g} standard errors of the analytic baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Project-native Dixon-Coles goal model.
+
+Same parameterisation as penaltyblog's DixonColesGoalModel:
+
+    lambda_home = exp(attack[home] + defence[away] + home_advantage)
+    lambda_away = exp(attack[away] + defence[home])
+
+with the Dixon-Coles low-score correction tau(rho). The time-weighted
+log-likelihood is evaluated with NumPy over integer-encoded team arrays
+and its analytic gradient is handed to L-BFGS-B. penaltyblog's sum(attack)
+== n_teams equality constraint, which L-BFGS cannot take, is enforced by
+shifting attack and defence in opposite directions after the fit. That
+shift leaves every goal expectation, and so the likelihood, unchanged.
+
+DixonColesModel exposes the attributes and predict(home, away) surface
+that the rest of scripts/ use, so it can stand in for DixonColesGoalModel
+(see DC_ENGINES in dc_walkforward.py).
+"""
+
+import numpy as np
+from penaltyblog.models.football_probability_grid import FootballProbabilityGrid
+from scipy.optimize import minimize
+from scipy.special import gammaln
+
+# Same bounds and starting point as penaltyblog
+TEAM_BOUND = 2.5
+HOME_ADVANTAGE_BOUNDS = (0.0, 2.0)
+RHO_BOUNDS = (-2.5, 2.5)
+MIN_TAU = 1e-10
+
+
+def dc_negative_log_likelihood(params, home_idx, away_idx, goals_home, goals_away,
+                               weights, n_teams, log_factorials):
+    """Weighted Dixon-Coles negative log-likelihood and its gradient.
+
+    Returns: (loss, gradient) with gradient shaped like params
+    """
+    attack, defence = params[:n_teams], params[n_teams:2 * n_teams]
+    hfa, rho = params[-2], params[-1]
+
+    log_lam = attack[home_idx] + defence[away_idx] + hfa
+    log_mu = attack[away_idx] + defence[home_idx]
+    lam, mu = np.exp(log_lam), np.exp(log_mu)
+
+    # Low-score correction; only the 0-0, 0-1, 1-0 and 1-1 cells differ from 1
+    low00 = (goals_home == 0) & (goals_away == 0)
+    low01 = (goals_home == 0) & (goals_away == 1)
+    low10 = (goals_home == 1) & (goals_away == 0)
+    low11 = (goals_home == 1) & (goals_away == 1)
+    tau = np.ones_like(lam)
+    tau[low00] = 1 - lam[low00] * mu[low00] * rho
+    tau[low01] = 1 + lam[low01] * rho
+    tau[low10] = 1 + mu[low10] * rho
+    tau[low11] = 1 - rho
+    tau = np.maximum(tau, MIN_TAU)
+
+    log_lik = (np.log(tau) + goals_home * log_lam - lam + goals_away * log_mu - mu
+               - log_factorials[goals_home] - log_factorials[goals_away])
+    loss = -np.dot(weights, log_lik)
+
+    # d log-lik / d log_lam, d log_mu and d rho per match
+    d_lam = goals_home - lam
+    d_mu = goals_away - mu
+    d_rho = np.zeros_like(lam)
+    d_lam[low00] -= lam[low00] * mu[low00] * rho / tau[low00]
+    d_mu[low00] -= lam[low00] * mu[low00] * rho / tau[low00]
+    d_rho[low00] = -lam[low00] * mu[low00] / tau[low00]
+    d_lam[low01] += lam[low01] * rho / tau[low01]
+    d_rho[low01] = lam[low01] / tau[low01]
+    d_mu[low10] += mu[low10] * rho / tau[low10]
+    d_rho[low10] = mu[low10] / tau[low10]
+    d_rho[low11] = -1 / tau[low11]
+
+    d_lam *= weights
+    d_mu *= weights
+    grad = np.empty_like(params)
+    grad[:n_teams] = (np.bincount(home_idx, d_lam, n_teams)
+                      + np.bincount(away_idx, d_mu, n_teams))
+    grad[n_teams:2 * n_teams] = (np.bincount(away_idx, d_lam, n_teams)
+                                 + np.bincount(home_idx, d_mu, n_teams))
+    grad[-2] = d_lam.sum()
+    grad[-1] = np.dot(weights, d_rho)
+    return loss, -grad
+
+
+class DixonColesModel:
+    """Dixon-Coles model fitted with a vectorized likelihood and L-BFGS-B.
+
+    Drop-in for penaltyblog's DixonColesGoalModel: same constructor
+    arguments, fit(), predict(home, away) returning a FootballProbabilityGrid,
+    and the teams / team_to_idx / n_teams / _params attributes used for warm
+    starts.
+    """
+
+    def __init__(self, goals_home, goals_away, teams_home, teams_away, weights=None):
+        self.goals_home = np.asarray(goals_home, dtype=np.int64)
+        self.goals_away = np.asarray(goals_away, dtype=np.int64)
+        teams_home = np.asarray(teams_home)
+        teams_away = np.asarray(teams_away)
+        if not (len(self.goals_home) == len(self.goals_away) == len(teams_home) == len(teams_away)):
+            raise ValueError("Input arrays for goals and teams must all have the same length.")
+        if len(teams_home) == 0:
+            raise ValueError("Team arrays must not be empty.")
+
+        self.weights = (np.ones(len(self.goals_home)) if weights is None
+                        else np.asarray(weights, dtype=np.float64))
+        self.teams, codes = np.unique(np.concatenate([teams_home, teams_away]), return_inverse=True)
+        self.n_teams = len(self.teams)
+        self.team_to_idx = {team: i for i, team in enumerate(self.teams)}
+        self.home_idx, self.away_idx = codes[:len(teams_home)], codes[len(teams_home):]
+
+        self._params = np.concatenate(([1.0] * self.n_teams, [-1.0] * self.n_teams, [0.25], [-0.1]))
+        self.fitted = False
+        self.loglikelihood = None
+        self.aic = None
+
+    def fit(self, minimizer_options=None):
+        """Maximise the weighted likelihood; raises ValueError if L-BFGS-B fails."""
+        n = self.n_teams
+        log_factorials = gammaln(np.arange(max(self.goals_home.max(), self.goals_away.max()) + 1) + 1)
+        bounds = [(-TEAM_BOUND, TEAM_BOUND)] * (2 * n) + [HOME_ADVANTAGE_BOUNDS, RHO_BOUNDS]
+        options = {"maxiter": 1000}
+        if minimizer_options is not None:
+            options.update(minimizer_options)
+
+        self._res = minimize(
+            dc_negative_log_likelihood,
+            self._params,
+            args=(self.home_idx, self.away_idx, self.goals_home, self.goals_away,
+                  self.weights, n, log_factorials),
+            jac=True,
+            method="L-BFGS-B",
+            bounds=bounds,
+            options=options,
+        )
+        if not self._res.success:
+            raise ValueError(f"Optimization failed with message: {self._res.message}")
+
+        params = self._res.x.copy()
+        shift = (n - params[:n].sum()) / n
+        params[:n] += shift
+        params[n:2 * n] -= shift
+        self._params = params
+        self.n_params = len(params)
+        self.loglikelihood = -self._res.fun
+        self.aic = -2 * self.loglikelihood + 2 * self.n_params
+        self.fitted = True
+
+    def predict(self, home_team, away_team, max_goals=15, normalize=True):
+        """Score grid for a fixture (goals 0..max_goals-1 per side)."""
+        if not self.fitted:
+            raise ValueError("Model is not yet fitted. Call `.fit()` first.")
+        if home_team not in self.team_to_idx or away_team not in self.team_to_idx:
+            raise ValueError("Both teams must have been in the training data.")
+        grids, lam, mu = predict_score_grids(self, [home_team], [away_team], max_goals, normalize)
+        return FootballProbabilityGrid(grids[0], float(lam[0]), float(mu[0]), normalize=False)
+
+    def get_params(self) -> dict:
+        """Fitted parameters keyed like penaltyblog's get_params()."""
+        if not self.fitted:
+            raise ValueError("Model is not yet fitted. Call `.fit()` first.")
+        names = ([f"attack_{t}" for t in self.teams] + [f"defence_{t}" for t in self.teams]
+                 + ["home_advantage", "rho"])
+        return dict(zip(names, self._params))
+
+
+# ---------------------------------------------------------------------------
+# Batched prediction — works with either engine (shared parameter layout)
+# ---------------------------------------------------------------------------
+
+def predict_score_grids(model, home_teams, away_teams, max_goals=15, normalize=True):
+    """Score probability tensor for many fixtures in one vectorized call.
+
+    model: fitted DixonColesModel or penaltyblog DixonColesGoalModel
+    Returns: (grids, lambda_home, lambda_away) where grids is a
+    fixtures x max_goals x max_goals array, grids[i, h, a] = P(h-a).
+    Fixtures with a team missing from the training data get NaN rows.
+    """
+    n = model.n_teams
+    params = np.asarray(model._params, dtype=np.float64)
+    home_idx = np.array([model.team_to_idx.get(t, -1) for t in home_teams], dtype=np.intp)
+    away_idx = np.array([model.team_to_idx.get(t, -1) for t in away_teams], dtype=np.intp)
+    known = (home_idx >= 0) & (away_idx >= 0)
+
+    lam = np.exp(params[home_idx] + params[away_idx + n] + params[-2])
+    mu = np.exp(params[away_idx] + params[home_idx + n])
+    lam[~known] = np.nan
+    mu[~known] = np.nan
+    rho = params[-1]
+
+    goals = np.arange(max_goals)
+    log_factorials = gammaln(goals + 1)
+    home_pmf = np.exp(goals * np.log(lam)[:, None] - lam[:, None] - log_factorials)
+    away_pmf = np.exp(goals * np.log(mu)[:, None] - mu[:, None] - log_factorials)
+    grids = home_pmf[:, :, None] * away_pmf[:, None, :]
+    grids[:, 0, 0] *= 1 - lam * mu * rho
+    grids[:, 0, 1] *= 1 + lam * rho
+    grids[:, 1, 0] *= 1 + mu * rho
+    grids[:, 1, 1] *= 1 - rho
+    if normalize:
+        grids /= grids.sum(axis=(1, 2), keepdims=True)
+    return grids, lam, mu
+
+
+def outcome_probabilities(grids):
+    """H/D/A probabilities. Returns: fixtures x 3 array"""
+    return np.stack([
+        np.tril(grids, -1).sum(axis=(1, 2)),
+        np.trace(grids, axis1=1, axis2=2),
+        np.triu(grids, 1).sum(axis=(1, 2)),
+    ], axis=1)
+
+
+def total_goals_distribution(grids):
+    """P(total goals == k) for k = 0 .. 2 * (max_goals - 1). Returns: fixtures x totals array"""
+    max_goals = grids.shape[1]
+    totals = np.add.outer(np.arange(max_goals), np.arange(max_goals)).ravel()
+    flat = grids.reshape(len(grids), -1)
+    out = np.zeros((len(grids), 2 * max_goals - 1))
+    np.add.at(out.T, totals, flat.T)
+    return out
+
+
+def totals_probabilities(grids, line):
+    """Over/under at any goal line. Returns: (under, push, over) arrays over fixtures"""
+    dist = total_goals_distribution(grids)
+    goals = np.arange(dist.shape[1])
+    return (dist[:, goals < line].sum(axis=1),
+            dist[:, goals == line].sum(axis=1),
+            dist[:, goals > line].sum(axis=1))
+
+
+def btts_probabilities(grids):
+    """Both teams to score (yes). Returns: array over fixtures"""
+    return grids[:, 1:, 1:].sum(axis=(1, 2))
+
+
+def correct_score_probabilities(grids, home_goals, away_goals):
+    """P(exact score home_goals-away_goals) for every fixture"""
+    return grids[:, home_goals, away_goals]
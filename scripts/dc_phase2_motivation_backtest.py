@@ -14,6 +14,8 @@ import numpy as np
 import pandas as pd
 import requests
 
+from match_data import load_matches
+
 warnings.filterwarnings("ignore")
 
 # ─── Paths ────────────────────────────────────────────────────────────────────
@@ -47,7 +49,6 @@ CSV_TO_TM_ID = {
 
 # ─── Load football-data.co.uk match results for motivation standings ──────────
 SEASONS = ["2122", "2223", "2324", "2425", "2526"]
-BASE_URL = "https://www.football-data.co.uk/mmz4281/{}/T1.csv"
 
 # Name normalization for football-data.co.uk team names → our CSV names
 FD_NAME_MAP = {
@@ -96,48 +97,13 @@ def normalize_fd_name(name):
 
 
 def load_match_data():
-    """Load and combine all seasons from football-data.co.uk."""
-    all_dfs = []
-    for season in SEASONS:
-        url = BASE_URL.format(season)
-        try:
-            df = pd.read_csv(url, encoding="latin-1", on_bad_lines="skip")
-            # Standardise column names
-            col_map = {}
-            for c in df.columns:
-                cl = c.strip().lower()
-                if cl in ("hometeam", "home"):
-                    col_map[c] = "home"
-                elif cl in ("awayteam", "away"):
-                    col_map[c] = "away"
-                elif cl in ("fthg", "hg"):
-                    col_map[c] = "hg"
-                elif cl in ("ftag", "ag"):
-                    col_map[c] = "ag"
-                elif cl in ("ftr", "res", "result"):
-                    col_map[c] = "result"
-                elif cl == "date":
-                    col_map[c] = "date"
-            df = df.rename(columns=col_map)
-            needed = {"home", "away", "hg", "ag", "result", "date"}
-            if not needed.issubset(df.columns):
-                print(f"  [WARN] Season {season}: missing columns {needed - set(df.columns)}")
-                continue
-            df["season"] = season
-            df = df[["date", "home", "away", "hg", "ag", "result", "season"]].copy()
-            df["home"] = df["home"].apply(normalize_fd_name)
-            df["away"] = df["away"].apply(normalize_fd_name)
-            df = df.dropna(subset=["home", "away", "result"])
-            df["hg"] = pd.to_numeric(df["hg"], errors="coerce")
-            df["ag"] = pd.to_numeric(df["ag"], errors="coerce")
-            df = df.dropna(subset=["hg", "ag"])
-            df["hg"] = df["hg"].astype(int)
-            df["ag"] = df["ag"].astype(int)
-            all_dfs.append(df)
-            print(f"  Loaded season {season}: {len(df)} matches")
-        except Exception as e:
-            print(f"  [ERROR] Season {season}: {e}")
-    return pd.concat(all_dfs, ignore_index=True) if all_dfs else pd.DataFrame()
+    """Completed matches of all seasons from the local match store, with our team names."""
+    df = load_matches(SEASONS)
+    df["home"] = df["home"].map(normalize_fd_name)
+    df["away"] = df["away"].map(normalize_fd_name)
+    for season, n in df["season"].value_counts(sort=False).items():
+        print(f"  Loaded season {season}: {n} matches")
+    return df
 
 
 # ─── Phase 2: AMV from Transfermarkt ─────────────────────────────────────────
@@ -784,7 +750,7 @@ def main():
     print(f"\nLoaded {len(dc_preds)} DC Phase 1 predictions (GD1–GD{max(p['gameday'] for p in dc_preds)})")
 
     # Load match data for motivation
-    print("\n[Phase 3 prep] Loading football-data.co.uk match results...")
+    print("\n[Phase 3 prep] Loading football-data.co.uk match results from the local match store...")
     all_matches = load_match_data()
 
     # Phase 2: AMV
@@ -0,0 +1,421 @@
+"""
+Warm-started walk-forward Dixon-Coles fitting.
+
+Consecutive gamedays share all but ~9 training matches, so the previous
+gameday's attack/defence/home advantage/rho parameters are an almost-optimal
+starting point for the next fit. Used by dixon_coles_backtest.py,
+phase5_xgboost_stack.py and predict_gameday.py.
+
+Fitted parameters are cached on disk under data/dc_model_cache/, keyed by a
+fingerprint of the training rows, xi, engine, MODEL_VERSION and the start
+(cold, or the exact warm-start parameters). Any change to the upstream match
+data changes the key, so stale entries are never read, and a cached fit is
+always the one the same inputs would produce, whichever run filled the cache.
+
+Filtering engines (FILTER_ENGINES) are not refitted at all: their filter
+state is carried from gameday to gameday, and the latest state is kept on
+disk so the next run only processes matches played since.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import penaltyblog
+from penaltyblog.models import DixonColesGoalModel, dixon_coles_weights
+
+from dc_model import DixonColesModel, outcome_probabilities, predict_score_grids
+from dynamic_model import DynamicGoalModel
+
+# Interchangeable DC implementations (same constructor / fit / predict surface)
+DC_ENGINES = {
+    "penaltyblog": DixonColesGoalModel,
+    "numpy": DixonColesModel,   # vectorized likelihood + analytic gradient, L-BFGS-B
+    "dynamic": DynamicGoalModel,  # random-walk team strengths, Kalman-filtered match by match
+}
+DEFAULT_ENGINE = "penaltyblog"
+
+# Engines that filter matches in date order: built from dates rather than xi
+# weights, and resumed from the previous state instead of warm-started
+FILTER_ENGINES = {"dynamic"}
+
+# Max |probability difference| tolerated between a warm-started and a cold fit
+COLD_FIT_TOLERANCE = 0.005
+
+# Candidate min-weight cutoffs for drift_report (weight = exp(-xi * age in days))
+DRIFT_CUTOFFS = [0.001, 0.005, 0.01, 0.02, 0.05]
+
+MODEL_CACHE_DIR = Path(__file__).parent.parent / "data" / "dc_model_cache"
+MODEL_VERSION = 1   # bump when the likelihood / fitting procedure changes
+TRAIN_COLUMNS = ["date", "home", "away", "hg", "ag"]
+
+
+def build_model(train: pd.DataFrame, xi: float, engine: str = DEFAULT_ENGINE):
+    """Unfitted Dixon-Coles model with time-decay weights.
+
+    train: DataFrame with columns date, home, away, hg, ag
+    engine: key of DC_ENGINES (FILTER_ENGINES take the dates and ignore xi)
+    """
+    if engine in FILTER_ENGINES:
+        timing = {"dates": train["date"].to_numpy(dtype="datetime64[ns]")}
+    else:
+        timing = {"weights": dixon_coles_weights(train["date"].tolist(), xi=xi)}
+    return DC_ENGINES[engine](
+        goals_home=train["hg"].astype(int).tolist(),
+        goals_away=train["ag"].astype(int).tolist(),
+        teams_home=train["home"].tolist(),
+        teams_away=train["away"].tolist(),
+        **timing,
+    )
+
+
+def transfer_params(model, previous) -> None:
+    """Seed model's starting parameters from a previously fitted model.
+
+    Teams are matched by name; teams new to the training set keep the
+    penaltyblog defaults. Attack and defence are then shifted by the same
+    constant in opposite directions (which leaves every goal expectation
+    unchanged) so the start satisfies sum(attack) == n_teams.
+    """
+    n, prev_n = model.n_teams, previous.n_teams
+    params = model._params.astype(float).copy()
+    for team, idx in model.team_to_idx.items():
+        prev_idx = previous.team_to_idx.get(team)
+        if prev_idx is not None:
+            params[idx] = previous._params[prev_idx]
+            params[idx + n] = previous._params[prev_idx + prev_n]
+    params[-2:] = previous._params[-2:]
+
+    shift = (n - params[:n].sum()) / n
+    params[:n] += shift
+    params[n:2 * n] -= shift
+    model._params = params
+
+
+def start_fingerprint(previous=None) -> str:
+    """Start mode of a fit: "cold", or "warm:" + a hash of the warm-start teams and parameters."""
+    if previous is None:
+        return "cold"
+    digest = hashlib.sha256(np.asarray(previous.teams, dtype=str).tobytes())
+    digest.update(np.asarray(previous._params, dtype=np.float64).tobytes())
+    return "warm:" + digest.hexdigest()[:16]
+
+
+def training_fingerprint(train: pd.DataFrame, xi: float, engine: str = DEFAULT_ENGINE,
+                         start: str = "cold") -> str:
+    """Cache key for a fit: hash of the training rows (order-independent), xi, engine, version and start."""
+    rows = train[TRAIN_COLUMNS].astype({"hg": int, "ag": int})
+    row_hashes = np.sort(pd.util.hash_pandas_object(rows, index=False).to_numpy())
+    digest = hashlib.sha256(row_hashes.tobytes())
+    engine_version = penaltyblog.__version__ if engine == "penaltyblog" else ""
+    digest.update(f"{xi!r}|{engine}|{engine_version}|{MODEL_VERSION}|{start}".encode())
+    return digest.hexdigest()[:32]
+
+
+def load_cached_model(train: pd.DataFrame, xi: float, engine: str, key: str):
+    """Rebuild a fitted model from the cache, or None on a miss."""
+    path = MODEL_CACHE_DIR / f"{key}.npz"
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        cached = {k: npz[k] for k in npz.files}
+    model = build_model(train, xi, engine)
+    if list(model.teams) != cached["teams"].tolist():
+        return None
+    model._params = cached["params"]
+    model.n_params = len(model._params)
+    model.loglikelihood = float(cached["loglikelihood"])
+    model.aic = -2 * model.loglikelihood + 2 * model.n_params
+    model.fitted = True
+    return model
+
+
+def save_cached_model(model, key: str) -> None:
+    """Write fitted parameters to the cache (atomic, safe with parallel writers)."""
+    MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MODEL_CACHE_DIR / f"{key}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, params=np.asarray(model._params, dtype=np.float64),
+             teams=np.asarray(model.teams, dtype=str), loglikelihood=model.loglikelihood)
+    os.replace(tmp, MODEL_CACHE_DIR / f"{key}.npz")
+
+
+def fit_dixon_coles(train: pd.DataFrame, xi: float, previous=None, engine: str = DEFAULT_ENGINE,
+                    use_cache: bool = True):
+    """Fit a Dixon-Coles model, warm-started from `previous` when given.
+
+    With use_cache, a fit of identical training rows / xi / engine and the
+    same start (cold, or the same `previous` parameters) is read from
+    MODEL_CACHE_DIR instead of being refitted.
+    Falls back to a cold start if the warm-started optimisation fails.
+    Raises ValueError if the cold fit fails as well.
+    FILTER_ENGINES go through fit_filter_model instead.
+    """
+    if engine in FILTER_ENGINES:
+        return fit_filter_model(train, xi, previous, engine, use_cache)
+
+    key = training_fingerprint(train, xi, engine, start_fingerprint(previous)) if use_cache else None
+    if key is not None:
+        model = load_cached_model(train, xi, engine, key)
+        if model is not None:
+            return model
+
+    model = build_model(train, xi, engine)
+    if previous is not None:
+        transfer_params(model, previous)
+        try:
+            model.fit()
+        except ValueError:
+            model = build_model(train, xi, engine)
+    if not getattr(model, "fitted", False):
+        model.fit()
+
+    if key is not None:
+        save_cached_model(model, key)
+    return model
+
+
+def filter_state_path(engine: str) -> Path:
+    return MODEL_CACHE_DIR / f"{engine}_filter_state.npz"
+
+
+def resumes_training(state: dict, train: pd.DataFrame, xi: float, engine: str) -> bool:
+    """True if a filter state was built from exactly train's rows up to its last match.
+
+    Anything else (a postponed match dated before that last match, or rows
+    dropped by truncate_history since) means resuming would skip or keep the
+    wrong matches, so the caller filters from scratch instead.
+    """
+    seen = train[train["date"].to_numpy(dtype="datetime64[D]").astype(np.int64) <= int(state["last_day"])]
+    return not seen.empty and training_fingerprint(seen, xi, engine) == str(state["fingerprint"])
+
+
+def load_filter_state(train: pd.DataFrame, xi: float, engine: str):
+    """Saved filter state, if it was built from exactly train's rows up to its last match; else None."""
+    path = filter_state_path(engine)
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        state = {k: npz[k] for k in npz.files}
+    return state if resumes_training(state, train, xi, engine) else None
+
+
+def save_filter_state(model, engine: str) -> None:
+    """Keep the latest filter state on disk (atomic, safe with parallel writers)."""
+    MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MODEL_CACHE_DIR / f"{engine}_filter_state.{os.getpid()}.tmp.npz"
+    np.savez(tmp, fingerprint=model.fingerprint, **model.state())
+    os.replace(tmp, filter_state_path(engine))
+
+
+def fit_filter_model(train: pd.DataFrame, xi: float, previous=None, engine: str = "dynamic",
+                     use_cache: bool = True):
+    """Run a filtering engine over train, resuming from `previous` or the saved state.
+
+    A state is only resumed if it covers exactly train's rows up to its last
+    match (see resumes_training); only matches after it are then filtered.
+    Otherwise train is filtered from scratch. The fitted model carries the
+    fingerprint of train, so it can be checked when passed as `previous`.
+    """
+    model = build_model(train, xi, engine)
+    state = None
+    if previous is not None and getattr(previous, "fingerprint", None) is not None:
+        state = {"fingerprint": previous.fingerprint, **previous.state()}
+        if not resumes_training(state, train, xi, engine):
+            state = None
+    if state is None and use_cache:
+        state = load_filter_state(train, xi, engine)
+    if state is not None:
+        model.resume(state)
+    model.fit()
+    model.fingerprint = training_fingerprint(train, xi, engine)
+    if use_cache:
+        save_filter_state(model, engine)
+    return model
+
+
+def max_probability_gap(model_a, model_b, fixtures) -> float:
+    """Largest |H/D/A probability difference| between two models over (home, away) fixtures."""
+    gap = 0.0
+    for home, away in fixtures:
+        try:
+            a = model_a.predict(home, away)
+            b = model_b.predict(home, away)
+        except ValueError:
+            continue
+        gap = max(gap, float(np.max(np.abs(
+            np.array([a.home_win, a.draw, a.away_win]) - np.array([b.home_win, b.draw, b.away_win])
+        ))))
+    return gap
+
+
+def check_against_cold(model, train: pd.DataFrame, xi: float, fixtures,
+                       engine: str = DEFAULT_ENGINE, use_cache: bool = True) -> float:
+    """Refit `train` from a cold start and return the max probability gap to `model`.
+
+    Cold fits have their own cache key, so use_cache never hands back a warm fit.
+    """
+    cold = fit_dixon_coles(train, xi, engine=engine, use_cache=use_cache)
+    return max_probability_gap(model, cold, fixtures)
+
+
+# ---------------------------------------------------------------------------
+# Truncated history — drop rows the time decay has all but zeroed out
+# ---------------------------------------------------------------------------
+
+def truncate_history(train: pd.DataFrame, xi: float, min_weight: float = None,
+                     window_days: int = None) -> pd.DataFrame:
+    """Keep only recent training rows.
+
+    min_weight: drop rows whose decay weight exp(-xi * age) is below this
+    window_days: drop rows older than this many days before the latest match
+    Ages are measured from the latest date in train, as dixon_coles_weights does.
+    """
+    age = (train["date"].max() - train["date"]).dt.days
+    keep = pd.Series(True, index=train.index)
+    if min_weight is not None:
+        keep &= np.exp(-xi * age) >= min_weight
+    if window_days is not None:
+        keep &= age <= window_days
+    return train[keep]
+
+
+def active_teams(train: pd.DataFrame, days: int = 365) -> list:
+    """Teams with a match in the last `days` of the training set (the ones we predict)."""
+    recent = train[train["date"] >= train["date"].max() - pd.Timedelta(days=days)]
+    return sorted(set(recent["home"]) | set(recent["away"]))
+
+
+def parameter_drift(full_model, model, teams=None) -> dict:
+    """How far a (truncated) fit moved from the full-history fit.
+
+    Attack/defence are only identified up to the sum(attack) constraint, which
+    depends on the team set, so drift is measured on invariant quantities over
+    every pairing of `teams` (default: all teams both models know): log goal
+    expectations and H/D/A probabilities.
+    """
+    teams = [t for t in (full_model.teams if teams is None else teams)
+             if t in full_model.team_to_idx and t in model.team_to_idx]
+    homes = [h for h in teams for a in teams if h != a]
+    aways = [a for h in teams for a in teams if h != a]
+    grids_full, lam_full, mu_full = predict_score_grids(full_model, homes, aways)
+    grids, lam, mu = predict_score_grids(model, homes, aways)
+    return {
+        "max_log_goal_diff": float(max(np.abs(np.log(lam / lam_full)).max(),
+                                       np.abs(np.log(mu / mu_full)).max())),
+        "home_advantage_diff": float(model._params[-2] - full_model._params[-2]),
+        "rho_diff": float(model._params[-1] - full_model._params[-1]),
+        "max_prob_gap": float(np.abs(outcome_probabilities(grids) - outcome_probabilities(grids_full)).max()),
+    }
+
+
+def drift_report(train: pd.DataFrame, xi: float, cutoffs=DRIFT_CUTOFFS,
+                 engine: str = DEFAULT_ENGINE) -> pd.DataFrame:
+    """Fit the full history and each min-weight cutoff; one row of size / time / drift per cutoff.
+
+    Drift is measured over teams active in the last year of train.
+    """
+    teams = active_teams(train)
+    start = time.perf_counter()
+    full_model = fit_dixon_coles(train, xi, engine=engine, use_cache=False)
+    rows = [{"min_weight": 0.0, "rows": len(train), "share": 1.0,
+             "fit_seconds": time.perf_counter() - start,
+             **parameter_drift(full_model, full_model, teams)}]
+    for cutoff in cutoffs:
+        truncated = truncate_history(train, xi, min_weight=cutoff)
+        start = time.perf_counter()
+        model = fit_dixon_coles(truncated, xi, engine=engine, use_cache=False)
+        rows.append({"min_weight": cutoff, "rows": len(truncated), "share": len(truncated) / len(train),
+                     "fit_seconds": time.perf_counter() - start,
+                     **parameter_drift(full_model, model, teams)})
+    return pd.DataFrame(rows)
+
+
+# ---------------------------------------------------------------------------
+# Parallel walk-forward — each gameday fitted cold and independently
+# ---------------------------------------------------------------------------
+
+def training_arrays(train: pd.DataFrame) -> dict:
+    """Compact NumPy payload of a training set (what gets pickled to workers)."""
+    n = len(train)
+    teams, codes = np.unique(np.concatenate([train["home"].to_numpy(str), train["away"].to_numpy(str)]),
+                             return_inverse=True)
+    return {
+        "date": train["date"].to_numpy(dtype="datetime64[ns]"),
+        "teams": teams,
+        "home": codes[:n].astype(np.int16),
+        "away": codes[n:].astype(np.int16),
+        "hg": train["hg"].to_numpy(dtype=np.int16),
+        "ag": train["ag"].to_numpy(dtype=np.int16),
+    }
+
+
+def training_frame(arrays: dict) -> pd.DataFrame:
+    """Inverse of training_arrays (same rows, same order)."""
+    return pd.DataFrame({
+        "date": pd.to_datetime(arrays["date"]),
+        "home": arrays["teams"][arrays["home"]].tolist(),
+        "away": arrays["teams"][arrays["away"]].tolist(),
+        "hg": arrays["hg"].astype(int),
+        "ag": arrays["ag"].astype(int),
+    })
+
+
+def fit_and_predict(arrays: dict, homes: list, aways: list, xi: float,
+                    engine: str = DEFAULT_ENGINE, use_cache: bool = True):
+    """Cold-fit one gameday and predict its fixtures.
+
+    Returns: (fixtures x 3 H/D/A array, None) or (None, error message) if the fit fails
+    """
+    try:
+        model = fit_dixon_coles(training_frame(arrays), xi, engine=engine, use_cache=use_cache)
+    except Exception as exc:
+        return None, str(exc)
+    grids, _, _ = predict_score_grids(model, homes, aways)
+    return outcome_probabilities(grids), None
+
+
+def parallel_walk_forward(windows: list, xi: float, jobs: int,
+                          engine: str = DEFAULT_ENGINE, use_cache: bool = True) -> list:
+    """Fit independent gameday windows across a process pool.
+
+    windows: list of (train DataFrame, home teams, away teams), one per gameday
+    Returns: list of fit_and_predict results in the same order as windows.
+    Warm starts chain gamedays together, so every window here is fitted cold:
+    the output matches a serial cold walk-forward (e.g. the backtest's --cold),
+    not the default warm-started one. jobs=1 runs the identical code path serially.
+    """
+    payload = [training_arrays(train) for train, _, _ in windows]
+    homes = [list(h) for _, h, _ in windows]
+    aways = [list(a) for _, _, a in windows]
+    args = (payload, homes, aways, repeat(xi), repeat(engine), repeat(use_cache))
+    if jobs <= 1:
+        return list(map(fit_and_predict, *args))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(fit_and_predict, *args))
+
+
+def sweep_gameday(arrays: dict, homes: list, aways: list, xis, engine: str = DEFAULT_ENGINE,
+                  use_cache: bool = True) -> np.ndarray:
+    """Fit one gameday window for every xi, each warm-started from the neighbouring xi.
+
+    xis should be sorted so neighbouring fits are close. The training rows are
+    decoded once and shared by every fit.
+    Returns: len(xis) x fixtures x 3 H/D/A array (NaN where a fit fails)
+    """
+    train = training_frame(arrays)
+    probs = np.full((len(xis), len(homes), 3), np.nan)
+    model = None
+    for k, xi in enumerate(xis):
+        try:
+            model = fit_dixon_coles(train, xi, previous=model, engine=engine, use_cache=use_cache)
+        except Exception:
+            model = None
+            continue
+        grids, _, _ = predict_score_grids(model, homes, aways)
+        probs[k] = outcome_probabilities(grids)
+    return probs
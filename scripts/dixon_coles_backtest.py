@@ -4,11 +4,17 @@ Dixon-Coles walk-forward backtest for Turkish Super Lig 2025-26 season.
 
 For each gameday N in 1..MAX_GD:
   - Training set: all prior seasons (2021-22 to 2024-25) + 2025-26 GDs < N
-  - Fit DixonColesGoalModel with time-decay weights (xi=0.0018)
+  - Fit DixonColesGoalModel with time-decay weights (xi=0.0018), warm-started
+    from the previous gameday's parameters (--cold to disable)
   - Predict all matches in GD N
   - Record and compare against actual results + SPI model accuracy
+
+--engine dynamic swaps in the random-walk strength model (dynamic_model.py),
+which is filtered match by match instead of refitted; use --output to keep
+its predictions next to the DC ones for comparison.
 """
 
+import argparse
 import json
 import sys
 from datetime import datetime
@@ -17,7 +23,14 @@ from pathlib import Path
 import duckdb
 import numpy as np
 import pandas as pd
-from penaltyblog.models import DixonColesGoalModel, dixon_coles_weights
+
+from dc_model import outcome_probabilities, predict_score_grids
+from dc_walkforward import (
+    COLD_FIT_TOLERANCE, DC_ENGINES, DEFAULT_ENGINE, check_against_cold, fit_dixon_coles,
+    parallel_walk_forward, truncate_history,
+)
+from evaluate_predictions import OUTCOMES, score
+from match_data import load_matches
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -54,49 +67,19 @@ NAME_MAP = {
 # Time-decay rate — half-life ~385 days (penaltyblog default)
 XI = 0.0018
 
+BACKTEST_SEASONS = ["2122", "2223", "2324", "2425", "2526"]
+
 
 # ---------------------------------------------------------------------------
 # Data loading
 # ---------------------------------------------------------------------------
 
-def load_season(season_code: str) -> pd.DataFrame:
-    """Load one season from football-data.co.uk.
-
-    season_code: e.g. '2122', '2223', '2324', '2425', '2526'
-    Returns DataFrame with columns: date, home, away, hg, ag, result
-    """
-    url = f"https://www.football-data.co.uk/mmz4281/{season_code}/T1.csv"
-    df = pd.read_csv(url, encoding="latin1")
-    # Rename columns to a consistent schema
-    df = df.rename(
-        columns={
-            "HomeTeam": "home",
-            "AwayTeam": "away",
-            "FTHG": "hg",
-            "FTAG": "ag",
-            "FTR": "result",
-            "Date": "date_str",
-        }
-    )
-    df["date"] = pd.to_datetime(df["date_str"], dayfirst=True, errors="coerce")
-    # Keep only completed matches (non-null result and goals)
-    df = df.dropna(subset=["result", "hg", "ag", "date"])
-    df["hg"] = df["hg"].astype(int)
-    df["ag"] = df["ag"].astype(int)
-    df["season"] = season_code
-    return df[["season", "date", "home", "away", "hg", "ag", "result"]].copy()
-
-
 def load_all_seasons() -> pd.DataFrame:
-    """Load 2021-22 through 2025-26 and return combined DataFrame."""
-    seasons = ["2122", "2223", "2324", "2425", "2526"]
-    frames = []
-    for s in seasons:
-        print(f"  Loading {s}...", end="", flush=True)
-        df = load_season(s)
-        print(f" {len(df)} matches")
-        frames.append(df)
-    return pd.concat(frames, ignore_index=True)
+    """Completed 2021-22 through 2025-26 matches from the local match store."""
+    df = load_matches(BACKTEST_SEASONS)
+    for season, n in df["season"].value_counts(sort=False).items():
+        print(f"  {season}: {n} matches")
+    return df
 
 
 def load_schedule() -> pd.DataFrame:
@@ -123,36 +106,37 @@ def load_spi_accuracy() -> dict:
 
 
 # ---------------------------------------------------------------------------
-# Brier score helper
+# Scoring helper
 # ---------------------------------------------------------------------------
 
+def record_scores(records: list) -> dict:
+    """Brier, RPS, log-loss and accuracy over prediction records with a result (vectorized)."""
+    played = [r for r in records if r["actual"] is not None]
+    if not played:
+        return {"n_matches": 0, "brier": float("nan"), "rps": float("nan"),
+                "log_loss": float("nan"), "accuracy": float("nan")}
+    probs = np.array([[r["prob_H"], r["prob_D"], r["prob_A"]] for r in played], dtype=np.float64)
+    actual = np.array([OUTCOMES.index(r["actual"]) for r in played])
+    return score(probs, actual)
+
+
 def brier_score(records: list) -> float:
     """Compute multi-class Brier score over prediction records."""
-    total = 0.0
-    n = 0
-    for r in records:
-        if r["actual"] is None:
-            continue
-        probs = [r["prob_H"], r["prob_D"], r["prob_A"]]
-        outcomes = [
-            1 if r["actual"] == "H" else 0,
-            1 if r["actual"] == "D" else 0,
-            1 if r["actual"] == "A" else 0,
-        ]
-        total += sum((p - o) ** 2 for p, o in zip(probs, outcomes))
-        n += 1
-    return total / n if n > 0 else float("nan")
+    return record_scores(records)["brier"]
 
 
 # ---------------------------------------------------------------------------
 # Walk-forward backtest
 # ---------------------------------------------------------------------------
 
-def run_backtest(all_data: pd.DataFrame, schedule: pd.DataFrame) -> list:
+def build_training_windows(all_data: pd.DataFrame, schedule: pd.DataFrame,
+                           min_weight: float = None, window_days: int = None):
     """
-    Run walk-forward backtest for each gameday.
+    Training set and fixtures for every 2025-26 gameday (independent of the fit).
 
-    Returns list of per-match prediction dicts.
+    Returns (windows, df_2526_sched) where windows[gd - 1] is
+    (train DataFrame, home teams, away teams) and df_2526_sched holds the
+    2025-26 results mapped to round numbers.
     """
     # Merge results into schedule to get actual outcomes
     # CSV team names == schedule team names (confirmed by exploration)
@@ -173,10 +157,8 @@ def run_backtest(all_data: pd.DataFrame, schedule: pd.DataFrame) -> list:
     max_gd = int(df_2526_sched["round_number"].max())
     print(f"\nGamedays with data: GD1 to GD{max_gd}\n")
 
-    all_predictions = []
-
+    windows = []
     for gd in range(1, max_gd + 1):
-        # --- Build training set ---
         # All prior seasons
         train_frames = [df_prior]
 
@@ -204,28 +186,81 @@ def run_backtest(all_data: pd.DataFrame, schedule: pd.DataFrame) -> list:
             train = pd.concat([train, extra], ignore_index=True).drop_duplicates()
             train = train.dropna(subset=["date", "hg", "ag"]).sort_values("date")
 
-        # --- Fit model ---
-        dates = train["date"].tolist()
-        weights = dixon_coles_weights(dates, xi=XI)
-
-        try:
-            model = DixonColesGoalModel(
-                goals_home=train["hg"].astype(int).tolist(),
-                goals_away=train["ag"].astype(int).tolist(),
-                teams_home=train["home"].tolist(),
-                teams_away=train["away"].tolist(),
-                weights=weights,
-            )
-            model.fit()
-            model_ok = True
-        except Exception as exc:
-            print(f"  GD{gd}: model fit failed — {exc}")
-            model_ok = False
+        train = truncate_history(train, XI, min_weight=min_weight, window_days=window_days)
+        windows.append((train, gd_matches["home_team"], gd_matches["away_team"]))
+
+    return windows, df_2526_sched
+
+
+def run_backtest(all_data: pd.DataFrame, schedule: pd.DataFrame,
+                 warm_start: bool = True, check_cold: bool = False,
+                 engine: str = DEFAULT_ENGINE, use_cache: bool = True, jobs: int = 1,
+                 min_weight: float = None, window_days: int = None) -> list:
+    """
+    Run walk-forward backtest for each gameday.
 
-        # --- Predict GD-N matches ---
+    warm_start: start each gameday's fit from the previous gameday's parameters
+    check_cold: also refit every gameday cold and report the max probability gap
+    engine: Dixon-Coles implementation, a key of DC_ENGINES
+    use_cache: reuse fitted parameters from the on-disk model cache
+    jobs: fit gamedays in parallel across this many processes (cold fits only,
+          since warm starts chain gamedays together); the output matches a
+          serial warm_start=False run, not the default warm-started one.
+          check_cold needs serial warm fits, so it cannot be combined with jobs
+    min_weight / window_days: truncate each training set (see truncate_history)
+
+    Returns list of per-match prediction dicts.
+    """
+    if jobs > 1 and check_cold:
+        raise ValueError("check_cold compares warm fits to cold ones; parallel jobs only fit cold")
+
+    windows, df_2526_sched = build_training_windows(all_data, schedule, min_weight, window_days)
+    max_gd = len(windows)
+
+    # --- Fit models and predict every gameday (one vectorized score-grid call each) ---
+    if jobs > 1:
+        print(f"  Fitting {max_gd} gamedays across {jobs} processes (cold fits — "
+              f"matches a serial --cold run, not the warm-started default)")
+        fits = parallel_walk_forward(windows, XI, jobs, engine=engine, use_cache=use_cache)
+    else:
+        fits = []
+        model, model_ok = None, False
+        cold_gaps = []
+        for gd, (train, homes, aways) in enumerate(windows, start=1):
+            try:
+                model = fit_dixon_coles(train, XI, previous=model if warm_start and model_ok else None,
+                                        engine=engine, use_cache=use_cache)
+                model_ok = True
+            except Exception as exc:
+                fits.append((None, str(exc)))
+                model_ok = False
+                continue
+
+            if check_cold:
+                gap = check_against_cold(model, train, XI, zip(homes, aways), engine=engine,
+                                         use_cache=use_cache)
+                cold_gaps.append(gap)
+                if gap > COLD_FIT_TOLERANCE:
+                    print(f"  GD{gd}: warm vs cold fit differ by {gap:.4f} (tolerance {COLD_FIT_TOLERANCE})")
+
+            grids, _, _ = predict_score_grids(model, homes, aways)
+            fits.append((outcome_probabilities(grids), None))
+
+        if cold_gaps:
+            worst = max(cold_gaps)
+            status = "OK" if worst <= COLD_FIT_TOLERANCE else "EXCEEDED"
+            print(f"\nWarm vs cold fits: max probability gap {worst:.4f} "
+                  f"over {len(cold_gaps)} gamedays (tolerance {COLD_FIT_TOLERANCE}) — {status}")
+
+    # --- Record predictions in gameday order ---
+    all_predictions = []
+    for gd, (gd_probs, error) in enumerate(fits, start=1):
+        if error is not None:
+            print(f"  GD{gd}: model fit failed — {error}")
+        gd_matches = schedule[schedule["round_number"] == gd]
         gd_results = df_2526_sched[df_2526_sched["round_number"] == gd]
 
-        for _, row in gd_matches.iterrows():
+        for i, (_, row) in enumerate(gd_matches.iterrows()):
             home_team = row["home_team"]
             away_team = row["away_team"]
 
@@ -238,17 +273,14 @@ def run_backtest(all_data: pd.DataFrame, schedule: pd.DataFrame) -> list:
             prob_H, prob_D, prob_A = None, None, None
             predicted = None
 
-            if model_ok:
-                try:
-                    pred = model.predict(home_team, away_team)
-                    prob_H = float(pred.home_win)
-                    prob_D = float(pred.draw)
-                    prob_A = float(pred.away_win)
+            if gd_probs is not None:
+                if np.isnan(gd_probs[i]).any():
+                    print(f"    GD{gd} {home_team} vs {away_team}: predict failed — team not in training data")
+                else:
+                    prob_H, prob_D, prob_A = (float(p) for p in gd_probs[i])
                     # Predicted result = argmax of probabilities
                     probs = {"H": prob_H, "D": prob_D, "A": prob_A}
                     predicted = max(probs, key=probs.get)
-                except Exception as exc:
-                    print(f"    GD{gd} {home_team} vs {away_team}: predict failed — {exc}")
 
             correct = int(predicted == actual) if (predicted is not None and actual is not None) else None
 
@@ -357,9 +389,11 @@ def print_report(predictions: list, spi_weekly: dict, spi_overall: float) -> Non
         else "  DC draw recall     : n/a"
     )
 
-    # Brier score
-    bs_dc = brier_score(all_evaluated)
-    print(f"\nBrier score (DC): {bs_dc:.4f}  (lower is better; random baseline ~0.667)")
+    # Brier score, RPS, log-loss (scripts/evaluate_predictions.py adds CIs and calibration)
+    scores_dc = record_scores(all_evaluated)
+    print(f"\nBrier score (DC): {scores_dc['brier']:.4f}  (lower is better; random baseline ~0.667)")
+    print(f"RPS (DC):         {scores_dc['rps']:.4f}")
+    print(f"Log-loss (DC):    {scores_dc['log_loss']:.4f}")
 
     # Note on SPI Brier — we don't have per-match probabilities for SPI
     print("Brier score (SPI): not available (no per-match probabilities in dashboard.json)")
@@ -370,11 +404,33 @@ def print_report(predictions: list, spi_weekly: dict, spi_overall: float) -> Non
 # ---------------------------------------------------------------------------
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Dixon-Coles walk-forward backtest")
+    parser.add_argument("--cold", action="store_true",
+                        help="Fit every gameday from scratch instead of warm-starting")
+    parser.add_argument("--check-cold", action="store_true",
+                        help="Also cold-fit every gameday and compare probabilities to the warm fit")
+    parser.add_argument("--engine", choices=list(DC_ENGINES), default=DEFAULT_ENGINE,
+                        help=f"Dixon-Coles implementation (default: {DEFAULT_ENGINE})")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="Refit every gameday instead of reusing cached model parameters")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Fit gamedays in parallel across N processes (implies --cold: output "
+                             "matches a serial --cold run; cannot be combined with --check-cold)")
+    parser.add_argument("--min-weight", type=float, default=None,
+                        help="Drop training matches whose time-decay weight is below this (e.g. 0.02)")
+    parser.add_argument("--window-days", type=int, default=None,
+                        help="Only train on matches from the last N days before each gameday")
+    parser.add_argument("--output", type=Path, default=OUTPUT_JSON,
+                        help=f"Predictions JSON to write (default: {OUTPUT_JSON.name})")
+    args = parser.parse_args()
+    if args.jobs > 1 and args.check_cold:
+        parser.error("--check-cold compares warm fits to cold ones; --jobs only fits cold, drop one of them")
+
     print("Dixon-Coles Walk-Forward Backtest — Turkish Super Lig 2025-26")
     print("=" * 60)
 
     # Load data
-    print("\nLoading season data from football-data.co.uk...")
+    print("\nLoading season data from the local match store...")
     all_data = load_all_seasons()
     print(f"Total matches loaded: {len(all_data)}")
 
@@ -388,7 +444,10 @@ def main() -> None:
 
     # Run backtest
     print("\nRunning walk-forward backtest...")
-    predictions = run_backtest(all_data, schedule)
+    predictions = run_backtest(all_data, schedule, warm_start=not args.cold,
+                               check_cold=args.check_cold, engine=args.engine,
+                               use_cache=args.use_cache, jobs=args.jobs,
+                               min_weight=args.min_weight, window_days=args.window_days)
     print(f"\nTotal predictions generated: {len(predictions)}")
 
     # Print report
@@ -396,7 +455,7 @@ def main() -> None:
     print_report(predictions, spi_weekly, spi_overall)
 
     # Save JSON output
-    output_path = OUTPUT_JSON
+    output_path = args.output
     with open(output_path, "w") as f:
         json.dump(predictions, f, indent=2, default=str)
     print(f"\nPredictions saved to: {output_path}")
@@ -0,0 +1,236 @@
+"""
+Dynamic-strength goal model: team ratings that evolve from match to match.
+
+Each team's attack and defence follow a Gaussian random walk whose variance
+grows with the days since the team last played:
+
+    attack[t] = attack[t - 1] + N(0, process_var * days)
+
+and every match updates the ratings of the two teams involved, with
+
+    lambda_home = exp(attack[home] + defence[away] + home_advantage)
+    lambda_away = exp(attack[away] + defence[home])
+
+as in DixonColesModel. The Poisson goal counts are folded in with an
+extended Kalman step (the log link linearised at the pre-match mean), so a
+match costs O(1) and no likelihood is optimised. Old form fades because the
+random walk widens the ratings' uncertainty, which replaces the xi weights.
+
+fit() filters the training matches in date order; resume() carries a
+previous filter state forward so that only matches after it are processed,
+making the weekly update O(new matches) instead of a full refit. The
+Dixon-Coles rho is estimated afterwards from the one-step-ahead predictions.
+
+DynamicGoalModel has the teams / team_to_idx / n_teams / _params attributes
+and predict(home, away) of the DC models, so it is a DC_ENGINES entry (see
+dc_walkforward.py) and works with predict_score_grids.
+"""
+
+import math
+
+import numpy as np
+from penaltyblog.models.football_probability_grid import FootballProbabilityGrid
+from scipy.optimize import minimize_scalar
+from scipy.special import gammaln
+
+from dc_model import MIN_TAU, RHO_BOUNDS, predict_score_grids
+
+PRIOR_HOME_GOALS = 1.55     # league-average goals a new team starts from
+PRIOR_AWAY_GOALS = 1.20
+PRIOR_VAR = 0.1             # attack / defence variance of a team's first match (sd ~0.3)
+PROCESS_VAR = 5e-5          # random-walk variance per day (sd ~0.14 over a year)
+HFA_PRIOR_VAR = 0.05
+HFA_PROCESS_VAR = 1e-7      # league-wide home advantage drifts far more slowly
+NOT_PLAYED = np.iinfo(np.int64).min
+
+
+def dc_log_tau(lam, mu, goals_home, goals_away, rho):
+    """log of the Dixon-Coles low-score correction per match"""
+    tau = np.ones_like(lam)
+    low00 = (goals_home == 0) & (goals_away == 0)
+    low01 = (goals_home == 0) & (goals_away == 1)
+    low10 = (goals_home == 1) & (goals_away == 0)
+    low11 = (goals_home == 1) & (goals_away == 1)
+    tau[low00] = 1 - lam[low00] * mu[low00] * rho
+    tau[low01] = 1 + lam[low01] * rho
+    tau[low10] = 1 + mu[low10] * rho
+    tau[low11] = 1 - rho
+    return np.log(np.maximum(tau, MIN_TAU))
+
+
+class DynamicGoalModel:
+    """Random-walk team strengths updated one match at a time.
+
+    Takes match dates instead of time-decay weights. Teams enter at league
+    average (PRIOR_HOME_GOALS / PRIOR_AWAY_GOALS) with variance prior_var.
+    """
+
+    def __init__(self, goals_home, goals_away, teams_home, teams_away, dates,
+                 prior_var=PRIOR_VAR, process_var=PROCESS_VAR):
+        self.goals_home = np.asarray(goals_home, dtype=np.int64)
+        self.goals_away = np.asarray(goals_away, dtype=np.int64)
+        teams_home = np.asarray(teams_home)
+        teams_away = np.asarray(teams_away)
+        self.days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        if not (len(self.goals_home) == len(self.goals_away) == len(teams_home)
+                == len(teams_away) == len(self.days)):
+            raise ValueError("Input arrays for goals, teams and dates must all have the same length.")
+        if len(teams_home) == 0:
+            raise ValueError("Team arrays must not be empty.")
+
+        self.prior_var = prior_var
+        self.process_var = process_var
+        self.teams, codes = np.unique(np.concatenate([teams_home, teams_away]), return_inverse=True)
+        self.n_teams = len(self.teams)
+        self.team_to_idx = {team: i for i, team in enumerate(self.teams)}
+        self.home_idx, self.away_idx = codes[:len(teams_home)], codes[len(teams_home):]
+
+        # Newcomers start as a league-average team. The prior is fixed rather than
+        # taken from the training data so a resumed filter matches a fresh one.
+        hfa = float(np.log(PRIOR_HOME_GOALS / PRIOR_AWAY_GOALS))
+        self.prior_attack = float(np.log(PRIOR_AWAY_GOALS))
+
+        n = self.n_teams
+        self.attack = np.full(n, self.prior_attack)
+        self.defence = np.zeros(n)
+        self.attack_var = np.full(n, prior_var)
+        self.defence_var = np.full(n, prior_var)
+        self.last_played = np.full(n, NOT_PLAYED, dtype=np.int64)   # day number of last match
+        self.hfa, self.hfa_var = hfa, HFA_PRIOR_VAR
+        self.last_day = None
+
+        # One-step-ahead goal expectations of every filtered match (for rho)
+        self.history = {k: np.empty(0) for k in ("lam", "mu")}
+        self.history.update({k: np.empty(0, dtype=np.int64) for k in ("hg", "ag")})
+
+        self._params = np.concatenate((self.attack, self.defence, [self.hfa], [0.0]))
+        self.fitted = False
+        self.loglikelihood = None
+        self.aic = None
+
+    def state(self) -> dict:
+        """Filter state as plain arrays (for resume() and saving to disk)."""
+        return {
+            "teams": np.asarray(self.teams, dtype=str),
+            "attack": self.attack, "defence": self.defence,
+            "attack_var": self.attack_var, "defence_var": self.defence_var,
+            "last_played": self.last_played,
+            "hfa": np.float64(self.hfa), "hfa_var": np.float64(self.hfa_var),
+            "last_day": np.int64(NOT_PLAYED if self.last_day is None else self.last_day),
+            **{f"history_{k}": v for k, v in self.history.items()},
+        }
+
+    def resume(self, state: dict) -> None:
+        """Continue from a previous filter state instead of filtering from scratch.
+
+        fit() then only processes matches dated after the state's last match,
+        so the training data must extend the previous training data with
+        later matches (dc_walkforward.fit_filter_model checks this before
+        resuming). Teams new to the training data keep the prior.
+        """
+        for i, team in enumerate(state["teams"]):
+            idx = self.team_to_idx.get(team)
+            if idx is not None:
+                self.attack[idx] = state["attack"][i]
+                self.defence[idx] = state["defence"][i]
+                self.attack_var[idx] = state["attack_var"][i]
+                self.defence_var[idx] = state["defence_var"][i]
+                self.last_played[idx] = state["last_played"][i]
+        self.hfa, self.hfa_var = float(state["hfa"]), float(state["hfa_var"])
+        self.last_day = None if int(state["last_day"]) == NOT_PLAYED else int(state["last_day"])
+        self.history = {k: np.asarray(state[f"history_{k}"]) for k in ("lam", "mu", "hg", "ag")}
+
+    def fit(self):
+        """Filter every training match after the current state, then estimate rho."""
+        new = (np.arange(len(self.days)) if self.last_day is None
+               else np.flatnonzero(self.days > self.last_day))
+        # Date order, ties by teams then score, so the row order of the input never matters
+        new = new[np.lexsort((self.goals_away[new], self.goals_home[new],
+                              self.away_idx[new], self.home_idx[new], self.days[new]))]
+
+        # Plain Python floats: the per-match update is scalar work
+        attack, defence = self.attack.tolist(), self.defence.tolist()
+        attack_var, defence_var = self.attack_var.tolist(), self.defence_var.tolist()
+        last_played = self.last_played.tolist()
+        hfa, hfa_var = self.hfa, self.hfa_var
+        last_day = self.last_day
+        lams, mus = [], []
+
+        goals_home, goals_away = self.goals_home.tolist(), self.goals_away.tolist()
+        home_idx, away_idx, days = self.home_idx.tolist(), self.away_idx.tolist(), self.days.tolist()
+        for i in new.tolist():
+            h, a, day = home_idx[i], away_idx[i], days[i]
+            # Random walk since each team's previous match (capped at the prior)
+            for t in (h, a):
+                if last_played[t] != NOT_PLAYED:
+                    grow = self.process_var * (day - last_played[t])
+                    attack_var[t] = min(attack_var[t] + grow, self.prior_var)
+                    defence_var[t] = min(defence_var[t] + grow, self.prior_var)
+                last_played[t] = day
+            if last_day is not None:
+                hfa_var += HFA_PROCESS_VAR * (day - last_day)
+            last_day = day
+
+            lam = math.exp(attack[h] + defence[a] + hfa)
+            mu = math.exp(attack[a] + defence[h])
+            lams.append(lam)
+            mus.append(mu)
+
+            # Home goals inform attack[h], defence[a] and hfa; away goals attack[a], defence[h]
+            s = attack_var[h] + defence_var[a] + hfa_var
+            gain = (goals_home[i] - lam) / (1 + lam * s)
+            shrink = lam / (1 + lam * s)
+            attack[h] += attack_var[h] * gain
+            defence[a] += defence_var[a] * gain
+            hfa += hfa_var * gain
+            attack_var[h] -= attack_var[h] ** 2 * shrink
+            defence_var[a] -= defence_var[a] ** 2 * shrink
+            hfa_var -= hfa_var ** 2 * shrink
+
+            s = attack_var[a] + defence_var[h]
+            gain = (goals_away[i] - mu) / (1 + mu * s)
+            shrink = mu / (1 + mu * s)
+            attack[a] += attack_var[a] * gain
+            defence[h] += defence_var[h] * gain
+            attack_var[a] -= attack_var[a] ** 2 * shrink
+            defence_var[h] -= defence_var[h] ** 2 * shrink
+
+        self.attack, self.defence = np.array(attack), np.array(defence)
+        self.attack_var, self.defence_var = np.array(attack_var), np.array(defence_var)
+        self.last_played = np.array(last_played, dtype=np.int64)
+        self.hfa, self.hfa_var, self.last_day = hfa, hfa_var, last_day
+        self.history = {
+            "lam": np.concatenate([self.history["lam"], lams]),
+            "mu": np.concatenate([self.history["mu"], mus]),
+            "hg": np.concatenate([self.history["hg"], self.goals_home[new]]),
+            "ag": np.concatenate([self.history["ag"], self.goals_away[new]]),
+        }
+
+        # rho and the log-likelihood from one-step-ahead predictions
+        lam, mu, hg, ag = (self.history[k] for k in ("lam", "mu", "hg", "ag"))
+        res = minimize_scalar(lambda rho: -dc_log_tau(lam, mu, hg, ag, rho).sum(),
+                              bounds=RHO_BOUNDS, method="bounded")
+        rho = float(res.x)
+        self.loglikelihood = float((dc_log_tau(lam, mu, hg, ag, rho)
+                                    + hg * np.log(lam) - lam - gammaln(hg + 1)
+                                    + ag * np.log(mu) - mu - gammaln(ag + 1)).sum())
+        self._params = np.concatenate((self.attack, self.defence, [self.hfa], [rho]))
+        self.n_params = len(self._params)
+        self.fitted = True
+
+    def predict(self, home_team, away_team, max_goals=15, normalize=True):
+        """Score grid for a fixture (goals 0..max_goals-1 per side)."""
+        if not self.fitted:
+            raise ValueError("Model is not yet fitted. Call `.fit()` first.")
+        if home_team not in self.team_to_idx or away_team not in self.team_to_idx:
+            raise ValueError("Both teams must have been in the training data.")
+        grids, lam, mu = predict_score_grids(self, [home_team], [away_team], max_goals, normalize)
+        return FootballProbabilityGrid(grids[0], float(lam[0]), float(mu[0]), normalize=False)
+
+    def get_params(self) -> dict:
+        """Current ratings keyed like penaltyblog's get_params()."""
+        if not self.fitted:
+            raise ValueError("Model is not yet fitted. Call `.fit()` first.")
+        names = ([f"attack_{t}" for t in self.teams] + [f"defence_{t}" for t in self.teams]
+                 + ["home_advantage", "rho"])
+        return dict(zip(names, self._params))
@@ -27,6 +27,8 @@ import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler
 
+from match_data import load_odds
+
 warnings.filterwarnings("ignore")
 
 ROOT       = Path(__file__).parent.parent
@@ -55,17 +57,7 @@ def load_features() -> pd.DataFrame:
 
 def load_odds_2526() -> pd.DataFrame:
     """B365 (or best available) odds for the 2025-26 season."""
-    url = "https://www.football-data.co.uk/mmz4281/2526/T1.csv"
-    df = pd.read_csv(url, encoding="latin1")
-    df = df.rename(columns={"HomeTeam": "home", "AwayTeam": "away", "FTR": "result"})
-    for prefix in ["B365", "Avg", "BW"]:
-        cols = [f"{prefix}H", f"{prefix}D", f"{prefix}A"]
-        if all(c in df.columns for c in cols):
-            df["o_H"] = pd.to_numeric(df[cols[0]], errors="coerce")
-            df["o_D"] = pd.to_numeric(df[cols[1]], errors="coerce")
-            df["o_A"] = pd.to_numeric(df[cols[2]], errors="coerce")
-            df["odds_src"] = prefix
-            break
+    df = load_odds("2526", prefixes=["B365", "Avg", "BW"])
     return df[["home", "away", "o_H", "o_D", "o_A"]].dropna()
 
 
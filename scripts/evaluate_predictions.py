@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Out-of-sample evaluation of backtest prediction files.
+
+Reads any of the backtest JSON outputs (dc_predictions.json,
+phase5_predictions.json, dc_phase2_predictions.json, or a variant written
+with dixon_coles_backtest.py --output) and scores every probability set in
+them on arrays:
+
+  - Brier score, ranked probability score (RPS), log-loss, accuracy
+  - bootstrap confidence intervals for each (matches resampled)
+  - reliability bins per outcome (calibration curve) and the expected
+    calibration error (ECE)
+
+A file can hold several probability sets: every prob_H / prob_D / prob_A
+triple with a shared prefix or suffix is a variant (phase5: dc, xgb, ens;
+phase2: model, dc). Results are appended to main_marts.prediction_evaluations
+and main_marts.prediction_reliability, stamped with a run_id.
+
+Usage:
+    python scripts/evaluate_predictions.py
+    python scripts/evaluate_predictions.py scripts/dc_predictions.json scripts/dc_dynamic.json
+    python scripts/evaluate_predictions.py --bootstrap 5000 --bins 5 --no-save
+"""
+
+import argparse
+import json
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DUCKDB_PATH = PROJECT_ROOT / "data" / "football.duckdb"
+DEFAULT_FILES = [
+    PROJECT_ROOT / "scripts" / "dc_predictions.json",
+    PROJECT_ROOT / "scripts" / "phase5_predictions.json",
+    PROJECT_ROOT / "scripts" / "dc_phase2_predictions.json",
+]
+
+OUTCOMES = ["H", "D", "A"]
+LOG_LOSS_EPS = 1e-15
+METRICS = ["brier", "rps", "log_loss", "accuracy"]
+N_BOOTSTRAP = 2000
+N_BINS = 10
+CI_LEVEL = 0.95
+
+PROB_COLUMN = re.compile(r"^(?P<prefix>\w*?)prob_H(?P<suffix>\w*)$")
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def probability_variants(columns) -> dict:
+    """Variant name -> (H, D, A) column names for every complete prob_H/D/A triple."""
+    variants = {}
+    for col in columns:
+        m = PROB_COLUMN.match(col)
+        if not m:
+            continue
+        pre, suf = m["prefix"], m["suffix"]
+        triple = tuple(f"{pre}prob_{o}{suf}" for o in OUTCOMES)
+        if all(c in columns for c in triple):
+            variants[(pre + suf).strip("_") or "model"] = triple
+    return variants
+
+
+def load_predictions(path: Path) -> dict:
+    """
+    Probability arrays of every variant in a backtest JSON.
+
+    Returns: variant -> (fixtures x 3 probabilities, actual outcome index),
+    restricted to matches with a result and finite probabilities
+    """
+    with open(path) as f:
+        df = pd.DataFrame(json.load(f))
+    out = {}
+    for variant, cols in probability_variants(df.columns).items():
+        probs = df[list(cols)].to_numpy(dtype=np.float64)
+        actual = df["actual"].map({o: i for i, o in enumerate(OUTCOMES)}).to_numpy(dtype=np.float64)
+        ok = ~np.isnan(actual) & np.isfinite(probs).all(axis=1)
+        out[variant] = (probs[ok], actual[ok].astype(np.intp))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Metrics — every score is a mean of per-match losses
+# ---------------------------------------------------------------------------
+
+def match_losses(probs: np.ndarray, actual: np.ndarray) -> dict:
+    """Per-match Brier, RPS, log-loss and correctness of fixtures x 3 H/D/A probabilities."""
+    one_hot = np.eye(3)[actual]
+    p_actual = probs[np.arange(len(actual)), actual]
+    # RPS on the ordered outcomes H < D < A: squared gaps of the cumulative distributions
+    cum_gap = np.cumsum(probs - one_hot, axis=1)[:, :-1]
+    return {
+        "brier": ((probs - one_hot) ** 2).sum(axis=1),
+        "rps": (cum_gap ** 2).sum(axis=1) / 2,
+        "log_loss": -np.log(np.clip(p_actual, LOG_LOSS_EPS, 1.0)),
+        "accuracy": (probs.argmax(axis=1) == actual).astype(np.float64),
+    }
+
+
+def score(probs: np.ndarray, actual: np.ndarray) -> dict:
+    """Brier, RPS, log-loss and accuracy (means over matches)."""
+    return {"n_matches": len(actual),
+            **{k: float(v.mean()) for k, v in match_losses(probs, actual).items()}}
+
+
+def bootstrap_intervals(losses: dict, n_boot: int = N_BOOTSTRAP, level: float = CI_LEVEL,
+                        seed: int = 0) -> dict:
+    """
+    Percentile bootstrap CI of every mean loss, all from one shared resample matrix.
+
+    Returns: {"<metric>_lo": ..., "<metric>_hi": ...}
+    """
+    n = len(next(iter(losses.values())))
+    idx = np.random.default_rng(seed).integers(0, n, size=(n_boot, n))
+    tail = (1 - level) / 2 * 100
+    out = {}
+    for name, values in losses.items():
+        lo, hi = np.percentile(values[idx].mean(axis=1), [tail, 100 - tail])
+        out[f"{name}_lo"], out[f"{name}_hi"] = float(lo), float(hi)
+    return out
+
+
+def reliability_bins(probs: np.ndarray, actual: np.ndarray, n_bins: int = N_BINS) -> pd.DataFrame:
+    """
+    Calibration curve per outcome: equal-width bins of predicted probability.
+
+    Returns: one row per (outcome, non-empty bin) with n, mean_predicted and observed_rate
+    """
+    edges = np.linspace(0, 1, n_bins + 1)
+    one_hot = np.eye(3)[actual]
+    frames = []
+    for k, outcome in enumerate(OUTCOMES):
+        bins = np.clip(np.digitize(probs[:, k], edges[1:-1]), 0, n_bins - 1)
+        n = np.bincount(bins, minlength=n_bins)
+        pred_sum = np.bincount(bins, probs[:, k], minlength=n_bins)
+        hit_sum = np.bincount(bins, one_hot[:, k], minlength=n_bins)
+        used = n > 0
+        frames.append(pd.DataFrame({
+            "outcome": outcome,
+            "bin": np.arange(n_bins)[used],
+            "bin_lo": edges[:-1][used],
+            "bin_hi": edges[1:][used],
+            "n": n[used],
+            "mean_predicted": pred_sum[used] / n[used],
+            "observed_rate": hit_sum[used] / n[used],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def expected_calibration_error(bins: pd.DataFrame) -> float:
+    """Count-weighted |predicted - observed| over all outcome bins, averaged over outcomes."""
+    gap = (bins["mean_predicted"] - bins["observed_rate"]).abs() * bins["n"]
+    return float(gap.sum() / bins["n"].sum())
+
+
+def evaluate(sources: dict, n_boot: int = N_BOOTSTRAP, n_bins: int = N_BINS, seed: int = 0):
+    """
+    Score every (source, variant).
+
+    sources: source name -> {variant: (probs, actual)} as from load_predictions
+    Returns: (summary DataFrame, reliability DataFrame)
+    """
+    rows, reliability = [], []
+    for source, variants in sources.items():
+        for variant, (probs, actual) in variants.items():
+            if len(actual) == 0:
+                continue
+            losses = match_losses(probs, actual)
+            bins = reliability_bins(probs, actual, n_bins)
+            rows.append({"source": source, "variant": variant, **score(probs, actual),
+                         **bootstrap_intervals(losses, n_boot, seed=seed),
+                         "ece": expected_calibration_error(bins)})
+            reliability.append(bins.assign(source=source, variant=variant))
+    summary = pd.DataFrame(rows)
+    bins = (pd.concat(reliability, ignore_index=True) if reliability else pd.DataFrame())
+    return summary, bins
+
+
+# ---------------------------------------------------------------------------
+# Persist
+# ---------------------------------------------------------------------------
+
+def save_evaluation(summary: pd.DataFrame, bins: pd.DataFrame, n_boot: int) -> str:
+    """Append to main_marts.prediction_evaluations / prediction_reliability, stamped with a run_id."""
+    run_id = uuid.uuid4().hex
+    stamp = {"run_id": run_id, "run_at": datetime.now()}
+    summary = summary.assign(**stamp, bootstrap_samples=n_boot)
+    summary = summary[["run_id", "run_at", "source", "variant", "n_matches",
+                       *[c for m in METRICS for c in (m, f"{m}_lo", f"{m}_hi")],
+                       "ece", "bootstrap_samples"]]
+    bins = bins.assign(**stamp)
+    bins = bins[["run_id", "run_at", "source", "variant", "outcome", "bin", "bin_lo", "bin_hi",
+                 "n", "mean_predicted", "observed_rate"]]
+
+    con = duckdb.connect(str(DUCKDB_PATH))
+    try:
+        con.execute("CREATE SCHEMA IF NOT EXISTS main_marts")
+        for table, df in [("prediction_evaluations", summary), ("prediction_reliability", bins)]:
+            con.register(f"{table}_df", df)
+            con.execute(f"CREATE TABLE IF NOT EXISTS main_marts.{table} AS SELECT * FROM {table}_df LIMIT 0")
+            con.execute(f"INSERT INTO main_marts.{table} SELECT * FROM {table}_df")
+    finally:
+        con.close()
+    return run_id
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibration and scoring of backtest prediction files")
+    parser.add_argument("files", type=Path, nargs="*", default=DEFAULT_FILES,
+                        help="Prediction JSONs (default: DC, phase 5 and phase 2 backtests)")
+    parser.add_argument("--bootstrap", type=int, default=N_BOOTSTRAP,
+                        help=f"Bootstrap resamples for confidence intervals (default: {N_BOOTSTRAP})")
+    parser.add_argument("--bins", type=int, default=N_BINS,
+                        help=f"Reliability bins per outcome (default: {N_BINS})")
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap seed (default: 0)")
+    parser.add_argument("--no-save", dest="save", action="store_false",
+                        help="Print only; do not write to DuckDB")
+    args = parser.parse_args()
+
+    print("Prediction Evaluation — out-of-sample backtests")
+    print("=" * 60)
+
+    sources = {}
+    for path in args.files:
+        if not path.exists():
+            print(f"  {path.name}: not found, skipped")
+            continue
+        sources[path.stem] = load_predictions(path)
+        counts = ", ".join(f"{v} ({len(a)})" for v, (_, a) in sources[path.stem].items())
+        print(f"  {path.name}: {counts or 'no probability columns'}")
+    if not sources:
+        return
+
+    summary, bins = evaluate(sources, args.bootstrap, args.bins, args.seed)
+    if summary.empty:
+        print("\nNo evaluated matches.")
+        return
+
+    pct = int(CI_LEVEL * 100)
+    print("\n" + "=" * 60)
+    print(f"Scores with {pct}% bootstrap intervals ({args.bootstrap} resamples) — lower is better except accuracy")
+    print("=" * 60)
+    table = summary[["source", "variant", "n_matches"]].copy()
+    for m in METRICS:
+        table[m] = [f"{r[m]:.4f} [{r[m + '_lo']:.4f}, {r[m + '_hi']:.4f}]" for _, r in summary.iterrows()]
+    table["ece"] = summary["ece"].map("{:.4f}".format)
+    print(table.sort_values("rps").to_string(index=False))
+
+    print("\nReliability (predicted vs observed, per outcome):")
+    for (source, variant), grp in bins.groupby(["source", "variant"], sort=False):
+        print(f"\n  {source} / {variant}")
+        for outcome, rows in grp.groupby("outcome", sort=False):
+            cells = "  ".join(f"{r.mean_predicted:.2f}→{r.observed_rate:.2f} (n={r.n})" for r in rows.itertuples())
+            print(f"    {outcome}: {cells}")
+
+    if args.save:
+        run_id = save_evaluation(summary, bins, args.bootstrap)
+        print(f"\nSaved to main_marts.prediction_evaluations / prediction_reliability (run {run_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,14 @@ Run this after simulate_season.py to publish fresh data for the GitHub Pages das
 """
 import json
 import os
-import urllib.request
 import duckdb
 import pandas as pd
 from datetime import date, datetime
 
 import pathlib
 
+from sofascore_client import fetch_all, fetch_json, round_events_path, rounds_path
+
 DB_PATH = "data/football.duckdb"
 OUTPUT_PATH = "docs/data/dashboard.json"
 ML_PREDS_PATH = pathlib.Path("scripts/ml_predictions.json")
@@ -18,9 +19,6 @@ CURRENT_SEASON = 2025  # 2025-26 season
 MATCHDAY_TOTAL = 34
 MATCHES_PER_GAMEDAY = 9  # 18 teams → 9 games per round
 
-# Sofascore season ID for Süper Lig 2025-26
-SOFASCORE_SEASON_ID = 77805
-
 # Map Sofascore team names → DB team names
 SOFASCORE_TO_DB = {
     "Fenerbahçe": "Fenerbahce",
@@ -88,6 +86,29 @@ def build_meta(con) -> dict:
     }
 
 
+def latest_headline_probabilities(con):
+    """Top-4 / relegation % from the typed position distribution of the latest simulation run"""
+    try:
+        return con.execute("""
+            WITH latest AS (
+                SELECT run_id FROM main_marts.simulation_runs
+                WHERE season = ? ORDER BY run_at DESC LIMIT 1
+            ), probs AS (
+                SELECT p.team, p.position, p.probability,
+                       MAX(p.position) OVER () AS n_teams
+                FROM main_marts.season_position_probabilities p
+                JOIN latest USING (run_id)
+            )
+            SELECT team,
+                   100 * SUM(probability) FILTER (WHERE position <= 4)          AS top4_pct,
+                   100 * SUM(probability) FILTER (WHERE position > n_teams - 3) AS relegation_pct
+            FROM probs
+            GROUP BY team
+        """, [CURRENT_SEASON]).fetchdf()
+    except duckdb.CatalogException:
+        return None
+
+
 def build_standings(con) -> list:
     df = con.execute("""
         SELECT
@@ -111,9 +132,13 @@ def build_standings(con) -> list:
     if df.empty:
         return []
 
-    # Parse percentage strings stored as "XX.X%"
-    df["top4_pct"] = df["top4_str"].str.rstrip("%").astype(float)
-    df["relegation_pct"] = df["relegation_str"].str.rstrip("%").astype(float)
+    headline = latest_headline_probabilities(con)
+    if headline is not None and not headline.empty:
+        df = df.merge(headline, on="team", how="left")
+    else:
+        # Older databases only have the percentage strings stored as "XX.X%"
+        df["top4_pct"] = df["top4_str"].str.rstrip("%").astype(float)
+        df["relegation_pct"] = df["relegation_str"].str.rstrip("%").astype(float)
 
     # Rank by current_pts, then goal_diff (proper league tiebreaker)
     df = df.sort_values(["current_pts", "goal_diff"], ascending=False).reset_index(drop=True)
@@ -206,17 +231,9 @@ def fetch_next_round_sofascore() -> list[dict] | None:
     """Fetch next unplayed round fixtures from Sofascore public API.
     Returns list of {home_team, away_team} dicts with DB-normalised names, or None on failure.
     """
-    base = f"https://www.sofascore.com/api/v1/unique-tournament/52/season/{SOFASCORE_SEASON_ID}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json",
-    }
-
     # Get all rounds
     try:
-        req = urllib.request.Request(f"{base}/rounds", headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            rounds_data = json.loads(resp.read())
+        rounds_data = fetch_json(rounds_path())
     except Exception as e:
         print(f"  ⚠️  Sofascore rounds fetch failed: {e}")
         return None
@@ -225,16 +242,13 @@ def fetch_next_round_sofascore() -> list[dict] | None:
     if not rounds:
         return None
 
+    # Every round's events in one concurrent batch (finished rounds come from the cache)
+    round_nums = [rnd.get("round") for rnd in sorted(rounds, key=lambda r: r.get("round", 0))]
+    responses = fetch_all([round_events_path(n) for n in round_nums])
+
     # Find the first round that has at least one notstarted event, then return ALL events in that round
-    for rnd in sorted(rounds, key=lambda r: r.get("round", 0)):
-        round_num = rnd.get("round")
-        try:
-            req = urllib.request.Request(
-                f"{base}/events/round/{round_num}", headers=headers
-            )
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                events_data = json.loads(resp.read())
-        except Exception:
+    for round_num, events_data in zip(round_nums, responses):
+        if isinstance(events_data, Exception):
             continue
 
         events = events_data.get("events", [])
@@ -9,6 +9,15 @@ For each completed match (GD1–current):
      and extract Super Lig appearance/card totals.
   4. Save to data/referee_stats.json.
 
+Requests go through sofascore_client.py: rounds, event details and referee
+statistics are each fetched as one concurrent, rate-limited batch, and
+finished events are served from its disk cache on later runs.
+
+Refreshes are incremental. Rounds whose matches all have a result and a
+referee are not requested again, and neither are fixtures beyond the next
+round. Stats are rebuilt only for referees whose matches changed, so a
+mid-week re-run makes a handful of requests. --force starts from scratch.
+
 Also saves per-match referee assignments to data/referee_assignments.json so
 predict_gameday.py can look up which referee is doing which GD30 match once
 Sofascore publishes the assignments.
@@ -20,25 +29,20 @@ Usage:
 
 import argparse
 import json
-import time
+from collections import defaultdict
 from pathlib import Path
-import urllib.request
-import urllib.error
+
+from sofascore_client import (
+    TOURNAMENT_ID, event_path, fetch_all, referee_statistics_path, round_events_path,
+)
 
 ROOT           = Path(__file__).parent.parent
 DATA_DIR       = ROOT / "data"
 OUTPUT_STATS   = DATA_DIR / "referee_stats.json"
 OUTPUT_ASSIGN  = DATA_DIR / "referee_assignments.json"
 
-TOURNAMENT_ID = 52       # Trendyol Süper Lig
-SEASON_ID     = 77805    # 2025-26
 TOTAL_ROUNDS  = 34
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-    "Accept": "application/json",
-}
-
 # Sofascore winnerCode: 1=home, 2=draw, 3=away
 WINNER_MAP = {1: "H", 2: "D", 3: "A"}
 
@@ -50,32 +54,8 @@ LEAGUE_AVG_AWAY = 0.29
 MIN_GAMES_FOR_STATS = 5  # refs with fewer games get a blended estimate
 
 
-def fetch_json(url: str, retries: int = 3) -> dict:
-    for attempt in range(retries):
-        try:
-            req = urllib.request.Request(url, headers=HEADERS)
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                return json.loads(resp.read())
-        except urllib.error.HTTPError as e:
-            if e.code == 404:
-                return {}
-            if attempt < retries - 1:
-                time.sleep(1.5)
-            else:
-                raise
-        except Exception:
-            if attempt < retries - 1:
-                time.sleep(1.5)
-            else:
-                raise
-    return {}
-
-
-def fetch_round_event_ids(round_num: int) -> list[dict]:
-    """Return list of {id, homeTeam, awayTeam} for a round."""
-    url = (f"https://www.sofascore.com/api/v1/unique-tournament/{TOURNAMENT_ID}"
-           f"/season/{SEASON_ID}/events/round/{round_num}")
-    data = fetch_json(url)
+def round_events(data: dict, round_num: int) -> list[dict]:
+    """Return list of {id, homeTeam, awayTeam} from a round's events response."""
     events = data.get("events", [])
     return [
         {
@@ -90,20 +70,11 @@ def fetch_round_event_ids(round_num: int) -> list[dict]:
     ]
 
 
-def fetch_event_detail(event_id: int) -> dict:
-    """Return full event detail dict (or {})."""
-    url = f"https://www.sofascore.com/api/v1/event/{event_id}"
-    data = fetch_json(url)
-    return data.get("event", {})
-
-
-def fetch_referee_career_stats(referee_id: int) -> dict:
+def career_stats(data: dict) -> dict:
     """
-    Return Super Lig career stats from /referee/{id}/statistics.
+    Return Super Lig career stats from a /referee/{id}/statistics response.
     Fields: appearances, yellowCards, redCards, yellowRedCards, penalty
     """
-    url = f"https://www.sofascore.com/api/v1/referee/{referee_id}/statistics"
-    data = fetch_json(url)
     for entry in data.get("statistics", []):
         if entry.get("uniqueTournament", {}).get("id") == TOURNAMENT_ID:
             return {
@@ -116,6 +87,75 @@ def fetch_referee_career_stats(referee_id: int) -> dict:
     return {}
 
 
+def fetch_career_stats(referee_ids: list, refresh: bool = False) -> dict:
+    """Career stats of several referees in one concurrent batch (failures skipped)."""
+    responses = fetch_all([referee_statistics_path(r) for r in referee_ids], refresh=refresh)
+    return {
+        ref_id: career_stats(data)
+        for ref_id, data in zip(referee_ids, responses)
+        if not isinstance(data, Exception)
+    }
+
+
+def is_played(ev: dict) -> bool:
+    """A round event with a result (finished, or a winner already set)."""
+    return ev["status"] == "finished" or ev["winner_code"] is not None
+
+
+def make_entry(ev: dict, detail: dict | None = None) -> dict:
+    """Assignment entry for a round event; the referee comes from the event detail, if fetched."""
+    detail = detail or {}
+    ref = detail.get("referee") or {}
+    # Sofascore doesn't expose card totals directly in event detail in a simple field.
+    # Use yellowCards from referee profile (career total is not per-game useful here).
+    # For per-game cards we rely on accumulated stats across all matches below.
+    # We'll store None and compute from aggregated data.
+    return {
+        "event_id":     ev["event_id"],
+        "round":        ev["round"],
+        "home":         ev["home"],
+        "away":         ev["away"],
+        "outcome":      WINNER_MAP.get(detail.get("winnerCode") or ev["winner_code"]),
+        "referee_id":   ref.get("id"),
+        "referee_name": ref.get("name"),
+        "yellow_cards": None,   # not reliably available at event level
+        "red_cards":    None,
+    }
+
+
+def rounds_to_refresh(assignments: list[dict], max_round: int) -> list[int]:
+    """
+    Rounds whose assignments can still change: not seen yet, or with a match
+    that is unplayed or has no referee. Stops after the second round with no
+    played match: the first may have been played since the last run, making
+    the second the next round. Later rounds only hold known fixtures.
+    """
+    by_round = defaultdict(list)
+    for a in assignments:
+        by_round[a["round"]].append(a)
+
+    rounds = []
+    pending_rounds = 0
+    for rnd in range(1, max_round + 1):
+        entries = by_round.get(rnd, [])
+        if entries and all(a["outcome"] is not None and a["referee_id"] is not None for a in entries):
+            continue
+        rounds.append(rnd)
+        if entries and all(a["outcome"] is None for a in entries):
+            pending_rounds += 1
+            if pending_rounds == 2:
+                break
+    return rounds
+
+
+def load_referee_stats() -> dict:
+    """Previously saved referee stats keyed by referee_id ({} if none)."""
+    if not OUTPUT_STATS.exists():
+        return {}
+    data = json.loads(OUTPUT_STATS.read_text())
+    return {int(k): v for k, v in data.get("referees", {}).items()}
+
+
 def build_referee_stats(assignments: list[dict]) -> dict:
     """
     Given list of per-match assignments (with referee + outcome), compute:
@@ -186,144 +226,93 @@ def main():
     parser.add_argument("--round", type=int, default=None,
                         help="Max round to fetch (default: all completed rounds)")
     parser.add_argument("--force", action="store_true",
-                        help="Re-fetch even if data already exists")
+                        help="Re-fetch even if data already exists (bypasses the response cache)")
     args = parser.parse_args()
 
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Load existing assignments to avoid re-fetching event details
-    existing_assign: list[dict] = []
-    existing_event_ids: set[int] = set()
+    # Existing assignments, indexed by event_id, so only what can still change is fetched
+    assignments: list[dict] = []
     if OUTPUT_ASSIGN.exists() and not args.force:
-        existing_assign = json.loads(OUTPUT_ASSIGN.read_text())
-        existing_event_ids = {a["event_id"] for a in existing_assign}
-        print(f"Loaded {len(existing_assign)} existing assignments.")
+        assignments = json.loads(OUTPUT_ASSIGN.read_text())
+        print(f"Loaded {len(assignments)} existing assignments.")
+    index = {a["event_id"]: i for i, a in enumerate(assignments)}
+    # Saved stats are only reused alongside the assignments they were built from
+    ref_stats = load_referee_stats() if assignments else {}
 
-    assignments: list[dict] = list(existing_assign)
-    seen_ref_ids: set[int] = set(a["referee_id"] for a in assignments if a.get("referee_id"))
-    career_cache: dict[int, dict] = {}
-
-    # Determine which rounds to fetch
     max_round = args.round or TOTAL_ROUNDS
-    print(f"Fetching rounds 1–{max_round} from Sofascore...")
-
-    for rnd in range(1, max_round + 1):
-        print(f"  Round {rnd}...", end=" ", flush=True)
-        try:
-            events = fetch_round_event_ids(rnd)
-        except Exception as e:
-            print(f"FAILED ({e})")
+    rounds = rounds_to_refresh(assignments, max_round)
+    print(f"Fetching {len(rounds)} of rounds 1–{max_round} from Sofascore (the rest cannot change)...")
+    refresh = args.force
+    round_responses = fetch_all([round_events_path(rnd) for rnd in rounds], refresh=refresh)
+
+    events_by_round: dict[int, list[dict]] = {}
+    for rnd, data in zip(rounds, round_responses):
+        if isinstance(data, Exception):
+            print(f"  Round {rnd}... FAILED ({data})")
             continue
+        events_by_round[rnd] = round_events(data, rnd)
+
+    # The next round to be played: its referees are published before kickoff,
+    # so its details are fetched even though the matches have no result yet
+    next_round = min((rnd for rnd, events in events_by_round.items()
+                      if events and not any(is_played(ev) for ev in events)), default=max_round)
 
-        new_count = 0
+    # Pass 1: record new pending fixtures, collect events needing detail
+    to_fetch: list[dict] = []
+    new_entries: list[dict] = []
+    for rnd, events in events_by_round.items():
         for ev in events:
-            eid = ev["event_id"]
-            # Skip already fetched, unless it was incomplete before
-            if eid in existing_event_ids:
-                # Check if it was incomplete (no outcome) — re-fetch if so
-                prev = next((a for a in existing_assign if a["event_id"] == eid), None)
-                if prev and prev.get("outcome") is not None:
-                    continue
-
-            # Only fetch detail for finished matches
-            if ev["status"] not in ("finished",):
-                if ev["winner_code"] is None:
-                    # Not finished, record as pending assignment
-                    entry = {
-                        "event_id":     eid,
-                        "round":        rnd,
-                        "home":         ev["home"],
-                        "away":         ev["away"],
-                        "outcome":      None,
-                        "referee_id":   None,
-                        "referee_name": None,
-                        "yellow_cards": None,
-                        "red_cards":    None,
-                    }
-                    if eid not in existing_event_ids:
-                        assignments.append(entry)
-                        existing_event_ids.add(eid)
-                    continue
-
-            # Fetch event detail
-            try:
-                detail = fetch_event_detail(eid)
-                time.sleep(0.2)
-            except Exception as e:
-                print(f"\n    Event {eid} detail FAILED: {e}")
+            prev = assignments[index[ev["event_id"]]] if ev["event_id"] in index else None
+            if prev and prev["referee_id"] is not None and (prev["outcome"] is not None or not is_played(ev)):
                 continue
-
-            ref    = detail.get("referee") or {}
-            ref_id = ref.get("id")
-            ref_nm = ref.get("name")
-
-            # Outcome
-            wc      = detail.get("winnerCode") or ev["winner_code"]
-            outcome = WINNER_MAP.get(wc)
-
-            # Card counts from homeScore/awayScore (not always available)
-            hs = detail.get("homeScore", {})
-            as_ = detail.get("awayScore", {})
-            # Sofascore doesn't expose card totals directly in event detail in a simple field.
-            # Use yellowCards from referee profile (career total is not per-game useful here).
-            # For per-game cards we rely on accumulated stats across all matches below.
-            # We'll store None and compute from aggregated data.
-
-            entry = {
-                "event_id":     eid,
-                "round":        rnd,
-                "home":         ev["home"],
-                "away":         ev["away"],
-                "outcome":      outcome,
-                "referee_id":   ref_id,
-                "referee_name": ref_nm,
-                "yellow_cards": None,   # not reliably available at event level
-                "red_cards":    None,
-            }
-
-            # Fetch career stats for new referees
-            if ref_id and ref_id not in seen_ref_ids:
-                try:
-                    career = fetch_referee_career_stats(ref_id)
-                    career_cache[ref_id] = career
-                    seen_ref_ids.add(ref_id)
-                    time.sleep(0.2)
-                except Exception:
-                    pass
-
-            # Update or append
-            if eid in existing_event_ids:
-                for i, a in enumerate(assignments):
-                    if a["event_id"] == eid:
-                        assignments[i] = entry
-                        break
-            else:
-                assignments.append(entry)
-                existing_event_ids.add(eid)
-                new_count += 1
-
-        print(f"{len(events)} events, {new_count} new")
-
-    # Build referee stats from assignments
-    print("\nBuilding referee statistics...")
-    ref_stats = build_referee_stats(assignments)
-
-    # Merge career stats
-    for ref_id, career in career_cache.items():
-        if ref_id in ref_stats:
+            if is_played(ev) or rnd <= next_round:
+                to_fetch.append(ev)
+            elif prev is None:
+                new_entries.append(make_entry(ev))
+
+    # Pass 2: event details in one concurrent batch
+    details = fetch_all([event_path(ev["event_id"]) for ev in to_fetch], refresh=refresh)
+    for ev, detail in zip(to_fetch, details):
+        if isinstance(detail, Exception):
+            print(f"    Event {ev['event_id']} detail FAILED: {detail}")
+            continue
+        new_entries.append(make_entry(ev, detail.get("event", {})))
+
+    # Update or append, noting referees whose matches changed
+    changed_refs: set = set()
+    new_count: dict[int, int] = defaultdict(int)
+    for entry in new_entries:
+        i = index.get(entry["event_id"])
+        if i is None:
+            index[entry["event_id"]] = len(assignments)
+            assignments.append(entry)
+            new_count[entry["round"]] += 1
+        elif assignments[i] != entry:
+            changed_refs.add(assignments[i]["referee_id"])
+            assignments[i] = entry
+        else:
+            continue
+        changed_refs.add(entry["referee_id"])
+
+    for rnd, events in events_by_round.items():
+        print(f"  Round {rnd}... {len(events)} events, {new_count[rnd]} new")
+
+    # Rebuild stats only for referees whose matches changed (all of them on a fresh run)
+    stale = changed_refs if ref_stats else {a["referee_id"] for a in assignments}
+    stale.discard(None)
+    print(f"\nBuilding referee statistics for {len(stale)} referee(s) with new or changed matches...")
+    for ref_id in stale:
+        ref_stats.pop(ref_id, None)
+    fresh = build_referee_stats([a for a in assignments if a["referee_id"] in stale])
+
+    # Career stats for rebuilt referees (and any still missing), fetched concurrently
+    need_career = list(fresh) + [r for r, rs in ref_stats.items() if "career_appearances" not in rs]
+    ref_stats.update(fresh)
+    for ref_id, career in fetch_career_stats(need_career, refresh).items():
+        if career:
             ref_stats[ref_id].update(career)
 
-    # Also fetch career stats for refs already in stats but not in cache
-    for ref_id, rs in ref_stats.items():
-        if "career_appearances" not in rs:
-            try:
-                career = fetch_referee_career_stats(ref_id)
-                if career:
-                    ref_stats[ref_id].update(career)
-                time.sleep(0.2)
-            except Exception:
-                pass
-
     # Summary
     print(f"  Referees found:  {len(ref_stats)}")
     print(f"  Total matches with referee: {sum(1 for a in assignments if a.get('referee_id'))}")
@@ -8,13 +8,10 @@ Output: dbt/predict_may/seeds/schedule_2526.csv
 Columns: season, round_number, home_team, away_team
 """
 import csv
-import json
-import time
-import urllib.request
 
-SOFASCORE_SEASON_ID = 77805  # Süper Lig 2025-26
+from sofascore_client import fetch_all, fetch_json, round_events_path, rounds_path
+
 CURRENT_SEASON = 2025
-TOURNAMENT_ID = 52  # Turkish Super Lig
 OUTPUT_PATH = "dbt/predict_may/seeds/schedule_2526.csv"
 
 # Map Sofascore team names → DB team names (keep in sync with export_dashboard.py)
@@ -31,38 +28,25 @@ SOFASCORE_TO_DB = {
     "Gaziantep FK": "Gaziantep",
 }
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0",
-    "Accept": "application/json",
-}
-
-BASE = f"https://www.sofascore.com/api/v1/unique-tournament/{TOURNAMENT_ID}/season/{SOFASCORE_SEASON_ID}"
-
-
-def fetch_json(url: str) -> dict:
-    req = urllib.request.Request(url, headers=HEADERS)
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read())
-
-
 def normalize(name: str) -> str:
     return SOFASCORE_TO_DB.get(name, name)
 
 
 def main():
     print("Fetching rounds list...")
-    rounds_data = fetch_json(f"{BASE}/rounds")
+    rounds_data = fetch_json(rounds_path())
     rounds = sorted(rounds_data.get("rounds", []), key=lambda r: r.get("round", 0))
     print(f"  Found {len(rounds)} rounds")
 
+    # All rounds concurrently (rate-limited, finished rounds served from cache)
+    round_nums = [rnd.get("round") for rnd in rounds]
+    responses = fetch_all([round_events_path(n) for n in round_nums])
+
     rows = []
-    for rnd in rounds:
-        round_num = rnd.get("round")
-        print(f"  Fetching round {round_num}...", end=" ")
-        try:
-            events_data = fetch_json(f"{BASE}/events/round/{round_num}")
-        except Exception as e:
-            print(f"FAILED ({e})")
+    for round_num, events_data in zip(round_nums, responses):
+        print(f"  Round {round_num}...", end=" ")
+        if isinstance(events_data, Exception):
+            print(f"FAILED ({events_data})")
             continue
 
         events = events_data.get("events", [])
@@ -76,7 +60,6 @@ def main():
                 "away_team": away,
             })
         print(f"{len(events)} matches")
-        time.sleep(0.3)  # be polite
 
     # Deduplicate (Sofascore occasionally returns duplicate events per round)
     seen = set()
@@ -0,0 +1,152 @@
+"""
+Market pricing from Dixon-Coles score grids.
+
+Prices every market for every fixture in one vectorized pass over the
+fixtures x G x G score tensor from dc_model.predict_score_grids: 1X2,
+double chance, totals 0.5-5.5, Asian handicaps, BTTS and the top-N correct
+scores.
+
+Bets settle as win / push / loss. Quarter lines (2.25, -0.75, ...) are half
+stakes on the two neighbouring lines, so their win / push / loss are the
+averages of the two halves (a half win counts as half a win plus half a
+push). A bet at decimal odds o then has
+
+    EV = P(win) * (o - 1) - P(loss)        fair odds = 1 + P(loss) / P(win)
+
+which is the usual p * o - 1 on lines that cannot push.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dc_model import btts_probabilities, outcome_probabilities, total_goals_distribution
+
+TOTAL_LINES = np.arange(0.5, 5.75, 0.25)    # 0.5, 0.75, 1.0, ..., 5.5
+AH_LINES = np.arange(-3.0, 3.25, 0.25)      # handicap of the backed side
+TOP_SCORES = 5
+
+PRICE_COLUMNS = ["home", "away", "market", "selection", "line", "p_win", "p_push", "p_loss", "fair_odds"]
+MARKET_KEYS = ["home", "away", "market", "selection", "line"]
+
+
+def split_lines(lines):
+    """Quarter lines -> their two half-stake lines; other lines map to themselves twice."""
+    lines = np.asarray(lines, dtype=np.float64)
+    quarter = np.isclose(np.mod(lines * 2, 1), 0.5)
+    return np.where(quarter, lines - 0.25, lines), np.where(quarter, lines + 0.25, lines)
+
+
+def settle_above(dist, values, lines):
+    """
+    Settle "X above line" bets for a discrete distribution of X.
+
+    dist: fixtures x len(values) probabilities
+    Returns: (win, push, loss), each fixtures x lines, with quarter lines split
+    """
+    win = push = loss = 0.0
+    for half in split_lines(lines):
+        win = win + 0.5 * dist @ (values[:, None] > half).astype(np.float64)
+        push = push + 0.5 * dist @ (values[:, None] == half).astype(np.float64)
+        loss = loss + 0.5 * dist @ (values[:, None] < half).astype(np.float64)
+    return win, push, loss
+
+
+def goal_difference_distribution(grids):
+    """P(home goals - away goals == d). Returns: (d values, fixtures x values array)"""
+    max_goals = grids.shape[1]
+    diffs = np.subtract.outer(np.arange(max_goals), np.arange(max_goals)).ravel()
+    out = np.zeros((len(grids), 2 * max_goals - 1))
+    np.add.at(out.T, diffs + max_goals - 1, grids.reshape(len(grids), -1).T)
+    return np.arange(-(max_goals - 1), max_goals), out
+
+
+def top_correct_scores(grids, n=TOP_SCORES):
+    """Most likely scorelines per fixture. Returns: (home goals, away goals, probabilities), each fixtures x n"""
+    flat = grids.reshape(len(grids), -1)
+    idx = np.argsort(-flat, axis=1, kind="stable")[:, :n]
+    home_goals, away_goals = np.divmod(idx, grids.shape[2])
+    return home_goals, away_goals, np.take_along_axis(flat, idx, axis=1)
+
+
+def _market_rows(homes, aways, market, selections, lines, win, push, loss):
+    """Long rows for a fixtures x bets block of settlement probabilities."""
+    n_fixtures, n_bets = win.shape
+    return pd.DataFrame({
+        "home": np.repeat(homes, n_bets),
+        "away": np.repeat(aways, n_bets),
+        "market": market,
+        "selection": np.broadcast_to(selections, (n_fixtures, n_bets)).ravel(),
+        "line": np.broadcast_to(lines, (n_fixtures, n_bets)).ravel().astype(np.float64),
+        "p_win": win.ravel(),
+        "p_push": np.broadcast_to(push, win.shape).ravel(),
+        "p_loss": loss.ravel(),
+    })
+
+
+def price_markets(grids, homes, aways, total_lines=TOTAL_LINES, ah_lines=AH_LINES,
+                  top_scores=TOP_SCORES) -> pd.DataFrame:
+    """
+    Settlement probabilities and fair odds of every market for every fixture.
+
+    grids: fixtures x G x G score tensor; fixtures with NaN grids (unknown teams) are skipped
+    Returns: long DataFrame with PRICE_COLUMNS. line is NaN for markets without one;
+    AH lines are the handicap of the backed side (home -0.75, away +0.75, ...).
+    """
+    ok = ~np.isnan(grids).any(axis=(1, 2))
+    grids = grids[ok]
+    homes, aways = np.asarray(homes)[ok], np.asarray(aways)[ok]
+    total_lines = np.asarray(total_lines, dtype=np.float64)
+    ah_lines = np.asarray(ah_lines, dtype=np.float64)
+    no_line = np.nan
+
+    hda = outcome_probabilities(grids)
+    double = np.stack([hda[:, 0] + hda[:, 1], hda[:, 1] + hda[:, 2], hda[:, 0] + hda[:, 2]], axis=1)
+    btts = btts_probabilities(grids)[:, None]
+    btts = np.hstack([btts, 1 - btts])
+
+    totals = total_goals_distribution(grids)
+    over = settle_above(totals, np.arange(totals.shape[1]), total_lines)
+    diffs, gd_dist = goal_difference_distribution(grids)
+    home_ah = settle_above(gd_dist, diffs, -ah_lines)     # home +h wins if GD > -h
+    away_ah = settle_above(gd_dist, -diffs, -ah_lines)    # away +h wins if -GD > -h
+
+    cs_home, cs_away, cs_prob = top_correct_scores(grids, top_scores)
+    cs_labels = np.char.add(np.char.add(cs_home.astype(str), "-"), cs_away.astype(str))
+
+    n_lines = len(total_lines)
+    frames = [
+        _market_rows(homes, aways, "1X2", np.array(["H", "D", "A"]), no_line, hda, 0.0, 1 - hda),
+        _market_rows(homes, aways, "DC", np.array(["1X", "X2", "12"]), no_line, double, 0.0, 1 - double),
+        _market_rows(homes, aways, "OU", np.repeat(["over", "under"], n_lines), np.tile(total_lines, 2),
+                     np.hstack([over[0], over[2]]), np.hstack([over[1], over[1]]),
+                     np.hstack([over[2], over[0]])),
+        _market_rows(homes, aways, "AH", np.repeat(["home", "away"], len(ah_lines)), np.tile(ah_lines, 2),
+                     np.hstack([home_ah[0], away_ah[0]]), np.hstack([home_ah[1], away_ah[1]]),
+                     np.hstack([home_ah[2], away_ah[2]])),
+        _market_rows(homes, aways, "BTTS", np.array(["yes", "no"]), no_line, btts, 0.0, 1 - btts),
+        # Correct-score selections differ per fixture, so the labels are a full block
+        _market_rows(homes, aways, "CS", cs_labels, no_line, cs_prob, 0.0, 1 - cs_prob),
+    ]
+    prices = pd.concat(frames, ignore_index=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prices["fair_odds"] = 1 + prices["p_loss"] / prices["p_win"]
+    return prices[PRICE_COLUMNS]
+
+
+def expected_value(p_win, p_loss, odds):
+    """EV per unit stake at decimal odds (push returns the stake)."""
+    return p_win * (odds - 1) - p_loss
+
+
+def rank_value_bets(prices: pd.DataFrame, odds: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join bookmaker odds onto the price table and rank by EV.
+
+    odds: DataFrame with MARKET_KEYS + "odds" (line NaN for markets without one)
+    Returns: the priced bets that have odds, best EV first. Odds for bets the
+    price table does not cover (a correct score outside the top N, a line
+    outside TOTAL_LINES / AH_LINES) are dropped.
+    """
+    ranked = prices.merge(odds, on=MARKET_KEYS, how="inner")
+    ranked["ev"] = expected_value(ranked["p_win"], ranked["p_loss"], ranked["odds"])
+    return ranked.sort_values("ev", ascending=False, ignore_index=True)
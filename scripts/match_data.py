@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Local store of football-data.co.uk Super Lig results and odds.
+
+Every season CSV (T1.csv) is downloaded once, typed (dates parsed, goals and
+odds numeric) and written to data/match_data/T1_<season>.parquet with all of
+its columns. Later reads are columnar Parquet reads of only the columns a
+script asks for. Finished seasons never change, so only the live season is
+re-downloaded, and only once its file is older than LIVE_MAX_AGE.
+
+    load_matches()        completed matches, core columns (+ any extra columns)
+    load_odds(season)     1X2 odds of every fixture, first available bookmaker
+
+Usage:
+    python scripts/match_data.py              # fill the store, refresh the live season if stale
+    python scripts/match_data.py --refresh    # force a re-download of the live season
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+PROJECT_ROOT = Path(__file__).parent.parent
+STORE_DIR = PROJECT_ROOT / "data" / "match_data"
+BASE_URL = "https://www.football-data.co.uk/mmz4281/{}/T1.csv"
+
+SEASON_CODES = ["1617", "1718", "1819", "1920", "2021", "2122", "2223", "2324", "2425", "2526"]
+LIVE_SEASON = "2526"
+LIVE_MAX_AGE = 6 * 3600     # seconds before the live season is re-downloaded
+
+COLUMN_MAP = {"HomeTeam": "home", "AwayTeam": "away", "FTHG": "hg", "FTAG": "ag", "FTR": "result"}
+TEXT_COLUMNS = {"Div", "Date", "Time", "home", "away", "result", "HTR", "Referee"}
+CORE_COLUMNS = ["season", "date", "home", "away", "hg", "ag", "result"]
+ODDS_PREFIXES = ("B365", "Avg", "BW")
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+def season_path(season: str) -> Path:
+    return STORE_DIR / f"T1_{season}.parquet"
+
+
+def stored_columns(path: Path) -> list:
+    """Column names of a stored season, read from the Parquet footer."""
+    return pq.read_schema(path).names
+
+
+def download_season(season: str) -> pd.DataFrame:
+    """
+    One season CSV, typed: every fixture (played or not) with all columns.
+
+    date is a datetime, hg / ag nullable integers, odds and stats floats.
+    """
+    df = pd.read_csv(BASE_URL.format(season), encoding="latin1", on_bad_lines="skip")
+    df = df.loc[:, ~df.columns.str.startswith("Unnamed")].rename(columns=COLUMN_MAP)
+    df = df.dropna(subset=["home", "away"])
+    for col in df.columns.difference(TEXT_COLUMNS):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["hg"] = df["hg"].astype("Int64")
+    df["ag"] = df["ag"].astype("Int64")
+    df["home"] = df["home"].str.strip()
+    df["away"] = df["away"].str.strip()
+    df.insert(0, "date", pd.to_datetime(df.pop("Date"), dayfirst=True, errors="coerce"))
+    df.insert(0, "season", season)
+    return df.reset_index(drop=True)
+
+
+def ensure_season(season: str, refresh: bool = False) -> Path:
+    """
+    Path of a season's Parquet file, downloading it first if needed.
+
+    A season is downloaded when it is missing, or when it is the live season
+    and refresh is set or its file is older than LIVE_MAX_AGE. If a refresh
+    fails the stored copy is used.
+    """
+    path = season_path(season)
+    if path.exists():
+        if season != LIVE_SEASON:
+            return path
+        if not refresh and time.time() - path.stat().st_mtime < LIVE_MAX_AGE:
+            return path
+    try:
+        df = download_season(season)
+    except Exception as e:
+        if not path.exists():
+            raise
+        print(f"  [WARN] Season {season}: refresh failed ({e}); using stored copy")
+        return path
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def load_matches(seasons=SEASON_CODES, columns=(), completed: bool = True,
+                 refresh_live: bool = False) -> pd.DataFrame:
+    """
+    Matches of the given seasons, in season order.
+
+    columns: extra columns to read besides CORE_COLUMNS (missing ones are NaN)
+    completed: keep only played matches (date, goals and result present);
+    hg / ag are then plain ints
+    """
+    frames = []
+    for season in seasons:
+        path = ensure_season(season, refresh_live)
+        available = stored_columns(path) if columns else []
+        wanted = CORE_COLUMNS + [c for c in columns if c in available]
+        frames.append(pd.read_parquet(path, columns=wanted).reindex(columns=CORE_COLUMNS + list(columns)))
+    df = pd.concat(frames, ignore_index=True)
+    if completed:
+        df = df.dropna(subset=["date", "hg", "ag", "result"]).reset_index(drop=True)
+        df[["hg", "ag"]] = df[["hg", "ag"]].astype(int)
+    return df
+
+
+def load_odds(season: str = LIVE_SEASON, prefixes=ODDS_PREFIXES, refresh_live: bool = False) -> pd.DataFrame:
+    """
+    1X2 odds of every fixture of a season from the first bookmaker in prefixes
+    the CSV carries (B365, then market average, then Betwin).
+
+    Returns: date, home, away, result, o_H, o_D, o_A, odds_src
+    """
+    path = ensure_season(season, refresh_live)
+    available = set(stored_columns(path))
+    for prefix in prefixes:
+        cols = [f"{prefix}{o}" for o in "HDA"]
+        if available.issuperset(cols):
+            df = pd.read_parquet(path, columns=["date", "home", "away", "result", *cols])
+            df = df.rename(columns=dict(zip(cols, ["o_H", "o_D", "o_A"])))
+            return df.assign(odds_src=prefix)
+    raise ValueError(f"Season {season}: no 1X2 odds for any of {', '.join(prefixes)}")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill the local football-data.co.uk match store")
+    parser.add_argument("--refresh", action="store_true",
+                        help=f"Re-download the live season ({LIVE_SEASON}) even if it is fresh")
+    args = parser.parse_args()
+
+    for season in SEASON_CODES:
+        path = ensure_season(season, refresh=args.refresh and season == LIVE_SEASON)
+        df = pd.read_parquet(path, columns=["hg"])
+        print(f"  {season}: {df['hg'].notna().sum()} played / {len(df)} fixtures  ({path.name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Training: seasons 2122, 2223, 2324, 2425
 Test    : season 2526 (walk-forward, no leakage)
 """
 
+import argparse
 import json
 import math
 import warnings
@@ -17,10 +18,13 @@ from pathlib import Path
 import duckdb
 import numpy as np
 import pandas as pd
-from penaltyblog.models import DixonColesGoalModel, dixon_coles_weights
 from sklearn.metrics import confusion_matrix
 from xgboost import XGBClassifier
 
+from dc_model import outcome_probabilities, predict_score_grids
+from dc_walkforward import DEFAULT_ENGINE, fit_dixon_coles, parallel_walk_forward
+from match_data import SEASON_CODES, load_matches
+
 warnings.filterwarnings("ignore")
 
 ROOT        = Path(__file__).parent.parent
@@ -45,32 +49,16 @@ CSV_TO_TM_ID = {
 
 BIG3 = {"Galatasaray", "Fenerbahce", "Besiktas"}
 
-SEASON_CODES = ["1617", "1718", "1819", "1920", "2021", "2122", "2223", "2324", "2425", "2526"]
-
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1. LOAD MATCH RESULTS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def load_season(code: str) -> pd.DataFrame:
-    url = f"https://www.football-data.co.uk/mmz4281/{code}/T1.csv"
-    df = pd.read_csv(url, encoding="latin1")
-    df = df.rename(columns={"HomeTeam":"home","AwayTeam":"away","FTHG":"hg","FTAG":"ag","FTR":"result","Date":"date_str"})
-    df["date"] = pd.to_datetime(df["date_str"], dayfirst=True, errors="coerce")
-    df = df.dropna(subset=["result","hg","ag","date"])
-    df["hg"] = df["hg"].astype(int)
-    df["ag"] = df["ag"].astype(int)
-    df["season"] = code
-    return df[["season","date","home","away","hg","ag","result"]].copy()
-
 def load_all_seasons():
-    frames = []
-    for code in SEASON_CODES:
-        print(f"  {code}...", end="", flush=True)
-        df = load_season(code)
-        print(f" {len(df)}")
-        frames.append(df)
-    return pd.concat(frames, ignore_index=True).sort_values("date").reset_index(drop=True)
+    df = load_matches(SEASON_CODES)
+    for code, n in df["season"].value_counts(sort=False).items():
+        print(f"  {code}: {n}")
+    return df.sort_values("date").reset_index(drop=True)
 
 def load_schedule():
     con = duckdb.connect(str(DUCKDB_PATH), read_only=True)
@@ -303,11 +291,15 @@ def compute_season_features(season_df: pd.DataFrame, round_col="round_number", a
 # 4. DC WALK-FORWARD PER SEASON
 # ─────────────────────────────────────────────────────────────────────────────
 
-def dc_walk_forward(all_data: pd.DataFrame, season_code: str, schedule_df: pd.DataFrame = None) -> dict:
+def dc_walk_forward(all_data: pd.DataFrame, season_code: str, schedule_df: pd.DataFrame = None,
+                    engine: str = DEFAULT_ENGINE, jobs: int = 1) -> dict:
     """
     Run DC walk-forward for one season. Returns dict: (home, away) -> (prob_H, prob_D, prob_A).
     For 2526, uses schedule_df to get round numbers.
     For prior seasons, round number is inferred from match order.
+    Each round's fit is warm-started from the previous round's parameters;
+    with jobs > 1 rounds are fitted cold across a process pool instead, so
+    probabilities can differ from a serial run by the warm/cold fit gap.
     """
     df_season = all_data[all_data["season"] == season_code].copy()
     df_prior  = all_data[all_data["season"] <  season_code].copy()
@@ -326,9 +318,9 @@ def dc_walk_forward(all_data: pd.DataFrame, season_code: str, schedule_df: pd.Da
         df_season_rounds = df_season
         get_round = lambda df: df["round_number"]
 
-    results = {}
     max_round = int(df_season_rounds["round_number"].max()) if len(df_season_rounds) else 0
 
+    windows = []
     for rn in range(1, max_round + 1):
         # Training: all prior seasons + current season rounds < rn
         prior_curr = df_season_rounds[df_season_rounds["round_number"] < rn][["date","home","away","hg","ag"]]
@@ -340,31 +332,32 @@ def dc_walk_forward(all_data: pd.DataFrame, season_code: str, schedule_df: pd.Da
             train = pd.concat([df_prior[["date","home","away","hg","ag"]], df_season[["date","home","away","hg","ag"]]], ignore_index=True)
             train = train.dropna(subset=["date","hg","ag"]).sort_values("date")
 
-        weights = dixon_coles_weights(train["date"].tolist(), xi=XI)
+        round_matches = df_season_rounds[df_season_rounds["round_number"] == rn]
+        windows.append((train, round_matches["home"], round_matches["away"]))
 
-        try:
-            model = DixonColesGoalModel(
-                goals_home=train["hg"].astype(int).tolist(),
-                goals_away=train["ag"].astype(int).tolist(),
-                teams_home=train["home"].tolist(),
-                teams_away=train["away"].tolist(),
-                weights=weights,
-            )
-            model.fit()
-            model_ok = True
-        except Exception:
-            model_ok = False
+    if jobs > 1:
+        # Rounds are independent once fitted cold, so spread them across processes
+        fits = parallel_walk_forward(windows, XI, jobs, engine=engine)
+    else:
+        fits = []
+        model, model_ok = None, False
+        for train, homes, aways in windows:
+            try:
+                model = fit_dixon_coles(train, XI, previous=model if model_ok else None, engine=engine)
+                model_ok = True
+            except Exception as exc:
+                fits.append((None, str(exc)))
+                model_ok = False
+                continue
+            # One vectorized score-grid call per round
+            grids, _, _ = predict_score_grids(model, homes, aways)
+            fits.append((outcome_probabilities(grids), None))
 
-        # Get matches in this round
-        round_matches = df_season_rounds[df_season_rounds["round_number"] == rn]
-        for _, row in round_matches.iterrows():
-            ht, at = row["home"], row["away"]
-            if model_ok:
-                try:
-                    pred = model.predict(ht, at)
-                    ph, pd_, pa = float(pred.home_win), float(pred.draw), float(pred.away_win)
-                except Exception:
-                    ph, pd_, pa = 0.4, 0.25, 0.35
+    results = {}
+    for (_, homes, aways), (round_probs, _) in zip(windows, fits):
+        for i, (ht, at) in enumerate(zip(homes, aways)):
+            if round_probs is not None and not np.isnan(round_probs[i]).any():
+                ph, pd_, pa = (float(p) for p in round_probs[i])
             else:
                 ph, pd_, pa = 0.4, 0.25, 0.35
             results[(ht, at)] = (ph, pd_, pa)
@@ -376,8 +369,8 @@ def dc_walk_forward(all_data: pd.DataFrame, season_code: str, schedule_df: pd.Da
 # 5. BUILD FEATURE DATASET
 # ─────────────────────────────────────────────────────────────────────────────
 
-def build_dataset(all_data, schedule_df, amv_lookup):
-    """Build full feature matrix for all 5 seasons."""
+def build_dataset(all_data, schedule_df, amv_lookup, jobs=1):
+    """Build full feature matrix for all 5 seasons (jobs: processes for the DC walk-forward)."""
     all_records = []
 
     for i, code in enumerate(SEASON_CODES):
@@ -403,7 +396,7 @@ def build_dataset(all_data, schedule_df, amv_lookup):
 
         # DC walk-forward
         print(f"    DC walk-forward...", end="", flush=True)
-        dc_preds = dc_walk_forward(all_data, code, schedule_df if code == "2526" else None)
+        dc_preds = dc_walk_forward(all_data, code, schedule_df if code == "2526" else None, jobs=jobs)
         print(f" {len(dc_preds)} predictions")
 
         # Assemble
@@ -628,6 +621,12 @@ def load_spi_accuracy():
 # ─────────────────────────────────────────────────────────────────────────────
 
 def main():
+    parser = argparse.ArgumentParser(description="Phase 5: two-stage XGBoost stack")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Fit DC walk-forward rounds in parallel across N processes (cold fits, so "
+                             "DC probabilities can differ slightly from the warm-started serial run)")
+    args = parser.parse_args()
+
     print("Phase 5: Two-Stage XGBoost Stack")
     print("="*60)
 
@@ -641,7 +640,7 @@ def main():
     amv_lookup = load_amv_data()
 
     print("\n[3] Building feature dataset (all 5 seasons)...")
-    df = build_dataset(all_data, schedule, amv_lookup)
+    df = build_dataset(all_data, schedule, amv_lookup, jobs=args.jobs)
     print(f"\n    Total records: {len(df)}  ({df['season'].value_counts().to_dict()})")
     print(f"    Features: {len(FEATURE_COLS)}")
     print(f"    Label dist: {df['actual'].value_counts().to_dict()}")
@@ -20,9 +20,14 @@ from pathlib import Path
 import duckdb
 import numpy as np
 import pandas as pd
-from penaltyblog.models import DixonColesGoalModel, dixon_coles_weights
+from penaltyblog.models.football_probability_grid import FootballProbabilityGrid
 from xgboost import XGBClassifier
 
+from dc_model import predict_score_grids
+from dc_walkforward import DC_ENGINES, DEFAULT_ENGINE, drift_report, fit_dixon_coles, truncate_history
+from market_pricing import MARKET_KEYS, price_markets, rank_value_bets
+from match_data import SEASON_CODES, load_matches
+
 warnings.filterwarnings("ignore")
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -57,6 +62,14 @@ MATCH_OU = {
     ("Gaziantep",     "Kayserispor"): {"line": 2.5, "over": 1.75, "under": 1.93},
     # ("Samsunspor", "Besiktas"): O/U odds not available — add when obtained
 }
+
+# Any other market with odds: (market, selection, line) -> odds. Optional.
+# Markets: "OU" over/under, "AH" home/away (line = that side's handicap),
+# "BTTS" yes/no, "CS" "h-a" — line None for BTTS/CS. Quarter lines OK.
+MATCH_MARKET_ODDS = {
+    # ("Antalyaspor", "Konyaspor"): {("AH", "away", -0.25): 1.90, ("BTTS", "yes", None): 1.72,
+    #                                ("OU", "over", 2.75): 2.15, ("CS", "1-1", None): 6.50},
+}
 # ════════════════════════════════════════════════════════════════════════════
 
 ROOT          = Path(__file__).parent.parent
@@ -72,8 +85,6 @@ XI    = 0.0018
 ALPHA = 0.60   # DC weight in ensemble
 BIG3  = {"Galatasaray", "Fenerbahce", "Besiktas"}
 
-SEASON_CODES = ["1617","1718","1819","1920","2021","2122","2223","2324","2425","2526"]
-
 LABEL_MAP = {"H": 0, "D": 1, "A": 2}
 LABEL_INV = {0: "H", 1: "D", 2: "A"}
 
@@ -97,18 +108,6 @@ CSV_TO_TM_ID = {
 
 # ─── Data loading ────────────────────────────────────────────────────────────
 
-def load_season(code):
-    url = f"https://www.football-data.co.uk/mmz4281/{code}/T1.csv"
-    df = pd.read_csv(url, encoding="latin1")
-    df = df.rename(columns={"HomeTeam":"home","AwayTeam":"away",
-                             "FTHG":"hg","FTAG":"ag","FTR":"result","Date":"date_str"})
-    df["date"] = pd.to_datetime(df["date_str"], dayfirst=True, errors="coerce")
-    df = df.dropna(subset=["result","hg","ag","date"])
-    df[["hg","ag"]] = df[["hg","ag"]].astype(int)
-    df["season"] = code
-    return df[["season","date","home","away","hg","ag","result"]].copy()
-
-
 def load_schedule(gameday: int):
     con = duckdb.connect(str(DUCKDB_PATH), read_only=True)
     df  = con.execute(f"SELECT home_team, away_team FROM schedule_2526 WHERE round_number={gameday} ORDER BY home_team").fetchdf()
@@ -118,36 +117,28 @@ def load_schedule(gameday: int):
 
 # ─── DC model ────────────────────────────────────────────────────────────────
 
-def fit_dc(train_df):
+def fit_dc(train_df, engine=DEFAULT_ENGINE, use_cache=True, min_weight=None, window_days=None):
     t = train_df.dropna(subset=["date","hg","ag"]).sort_values("date")
-    w = dixon_coles_weights(t["date"].tolist(), xi=XI)
-    m = DixonColesGoalModel(
-        goals_home=t["hg"].tolist(), goals_away=t["ag"].tolist(),
-        teams_home=t["home"].tolist(), teams_away=t["away"].tolist(), weights=w,
-    )
-    m.fit()
-    return m
+    t = truncate_history(t, XI, min_weight=min_weight, window_days=window_days)
+    return fit_dixon_coles(t, XI, engine=engine, use_cache=use_cache)
 
 
-def dc_pred(model, home, away):
-    """Returns (prob_H, prob_D, prob_A, pred_obj). pred_obj is None on failure."""
-    try:
-        p = model.predict(home, away)
-        return float(p.home_win), float(p.draw), float(p.away_win), p
-    except Exception:
-        return None, None, None, None
-
-
-def ou_probs(pred_obj, line: float):
+def dc_pred_many(model, fixtures):
     """
-    Compute P(over line), P(under line) from the DC score matrix.
-    Uses pred_obj.totals(line) which returns (p_under, push, p_over).
+    DC probabilities for all (home, away) fixtures in one vectorized score-grid call.
+    Returns (dict (home, away) -> (prob_H, prob_D, prob_A, pred_obj), fixtures x G x G grids).
     """
-    try:
-        p_under, _, p_over = pred_obj.totals(line)
-        return float(p_over), float(p_under)
-    except Exception:
-        return None, None
+    fixtures = list(fixtures)
+    homes, aways = [h for h, _ in fixtures], [a for _, a in fixtures]
+    grids, lam, mu = predict_score_grids(model, homes, aways)
+    out = {}
+    for i, key in enumerate(zip(homes, aways)):
+        if np.isnan(lam[i]):
+            out[key] = (None, None, None, None)
+            continue
+        p = FootballProbabilityGrid(grids[i], float(lam[i]), float(mu[i]), normalize=False)
+        out[key] = (float(p.home_win), float(p.draw), float(p.away_win), p)
+    return out, grids
 
 
 # ─── Context (standings + form) ───────────────────────────────────────────────
@@ -365,9 +356,47 @@ def best_ev(ph, pd_, pa, dc_1x, dc_x2, dc_12):
     return max(opts, key=lambda x: x[0])
 
 
+def market_odds_frame():
+    """Every bookmaker price in the weekly config as rows of MARKET_KEYS + odds."""
+    rows = []
+    for (ht, at), o in MATCH_ODDS.items():
+        for market, sel, key in [("1X2","H","o_H"), ("1X2","D","o_D"), ("1X2","A","o_A"),
+                                 ("DC","1X","dc_1x"), ("DC","X2","dc_x2"), ("DC","12","dc_12")]:
+            if key in o:
+                rows.append((ht, at, market, sel, np.nan, o[key]))
+    for (ht, at), o in MATCH_OU.items():
+        rows.append((ht, at, "OU", "over",  float(o["line"]), o["over"]))
+        rows.append((ht, at, "OU", "under", float(o["line"]), o["under"]))
+    for (ht, at), markets in MATCH_MARKET_ODDS.items():
+        for (market, sel, line), odds in markets.items():
+            rows.append((ht, at, market, sel, np.nan if line is None else float(line), odds))
+    return pd.DataFrame(rows, columns=MARKET_KEYS + ["odds"])
+
+
+def with_result_probs(prices, results):
+    """
+    Swap the DC 1X2 / double-chance prices for the referee-adjusted ensemble
+    (what best_ev bets on); goal markets stay on the DC score grid.
+    """
+    rows = []
+    for r in results:
+        ph, pd_, pa = r["ref_H"], r["ref_D"], r["ref_A"]
+        for market, sel, p in [("1X2","H",ph), ("1X2","D",pd_), ("1X2","A",pa),
+                               ("DC","1X",ph+pd_), ("DC","X2",pd_+pa), ("DC","12",ph+pa)]:
+            rows.append((r["home"], r["away"], market, sel, np.nan, p, 0.0, 1 - p, 1 / p))
+    ens = pd.DataFrame(rows, columns=prices.columns)
+    return pd.concat([prices[~prices["market"].isin(["1X2", "DC"])], ens], ignore_index=True)
+
+
+def bet_label(row):
+    """Short bet description, e.g. 'AH home -0.75', 'OU over 2.25', '1X2 H'."""
+    line = "" if pd.isna(row["line"]) else f" {row['line']:+g}" if row["market"] == "AH" else f" {row['line']:g}"
+    return f"{row['market']} {row['selection']}{line}"
+
+
 # ─── Markdown export ─────────────────────────────────────────────────────────
 
-def generate_markdown(gameday, results, slist, ctx, ref_assigned, run_date):
+def generate_markdown(gameday, results, slist, ctx, ref_assigned, run_date, value_bets=None):
     """Return a fully-formatted Markdown string for the Obsidian vault."""
     ev_games  = [r for r in results if r["ev"] is not None]
     ev_ranked = sorted(ev_games, key=lambda x: x["ev"], reverse=True)
@@ -498,7 +527,7 @@ def generate_markdown(gameday, results, slist, ctx, ref_assigned, run_date):
         ev_flag = " ✦" if r["ou_best_ev"] > 0 else ""
         lines.append(
             f"| {rk} | {r['home']} v {r['away']} "
-            f"| {r['ou_line']:.1f} | {xg:.2f} "
+            f"| {r['ou_line']:g} | {xg:.2f} "
             f"| {r['ou_p_over']:.4f} | {r['ou_p_under']:.4f} "
             f"| {ou_info.get('over',0):.2f} | {ou_info.get('under',0):.2f} "
             f"| {r['ou_ev_over']:+.4f} | {r['ou_ev_under']:+.4f} "
@@ -515,10 +544,29 @@ def generate_markdown(gameday, results, slist, ctx, ref_assigned, run_date):
             odds_val = ou_info.get("over" if r["ou_best_bet"] == "OVER" else "under", 0)
             lines.append(
                 f"{rk}. **{r['home']} v {r['away']}** → "
-                f"`{r['ou_best_bet']} {r['ou_line']:.1f} @ {odds_val:.2f}` · "
+                f"`{r['ou_best_bet']} {r['ou_line']:g} @ {odds_val:.2f}` · "
                 f"EV={r['ou_best_ev']:+.4f} · xG={xg:.2f}"
             )
 
+    if value_bets is not None and not value_bets.empty:
+        lines += [
+            "",
+            "---",
+            "",
+            "## All-Market EV Rankings",
+            "",
+            "> EV = P(win) × (odds − 1) − P(loss); pushes on whole/quarter lines return the stake.",
+            "",
+            "| Rk | Match | Bet | Odds | Fair | P(win) | P(push) | EV |",
+            "|----|-------|-----|-----:|-----:|-------:|--------:|---:|",
+        ]
+        for rk, b in enumerate(value_bets.to_dict("records"), 1):
+            ev_flag = " ✦" if b["ev"] > 0 else ""
+            lines.append(
+                f"| {rk} | {b['home']} v {b['away']} | {bet_label(b)} | {b['odds']:.2f} "
+                f"| {b['fair_odds']:.2f} | {b['p_win']:.4f} | {b['p_push']:.4f} | {b['ev']:+.4f}{ev_flag} |"
+            )
+
     lines += [
         "",
         "---",
@@ -536,6 +584,16 @@ def main():
                         help=f"Gameday to predict (default: {GAMEDAY})")
     parser.add_argument("--no-md", dest="write_md", action="store_false",
                         help="Skip writing Markdown to Obsidian vault")
+    parser.add_argument("--dc-engine", choices=list(DC_ENGINES), default=DEFAULT_ENGINE,
+                        help=f"Dixon-Coles implementation (default: {DEFAULT_ENGINE})")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="Refit the DC model instead of reusing cached parameters")
+    parser.add_argument("--min-weight", type=float, default=None,
+                        help="Drop training matches whose time-decay weight is below this (e.g. 0.02)")
+    parser.add_argument("--window-days", type=int, default=None,
+                        help="Only train on matches from the last N days")
+    parser.add_argument("--drift-report", action="store_true",
+                        help="Print DC parameter drift of min-weight cutoffs vs the full fit, then exit")
     args = parser.parse_args()
 
     gd = args.gameday
@@ -545,30 +603,34 @@ def main():
     print("=" * 60)
 
     # Load season data
-    print("\n[1] Loading season data from football-data.co.uk...")
-    frames = []
-    for code in SEASON_CODES:
-        print(f"  {code}...", end="", flush=True)
-        df = load_season(code)
-        print(f" {len(df)}")
-        frames.append(df)
-    all_data = pd.concat(frames, ignore_index=True).sort_values("date").reset_index(drop=True)
+    print("\n[1] Loading season data from the local match store...")
+    all_data = load_matches(SEASON_CODES).sort_values("date").reset_index(drop=True)
+    for code, n in all_data["season"].value_counts(sort=False).items():
+        print(f"  {code}: {n}")
     df_2526  = all_data[all_data["season"] == "2526"].copy()
     print(f"  Completed 2526 matches: {len(df_2526)}  (GD1–{len(df_2526)//9})")
 
     schedule = load_schedule(gd)
     print(f"  GD{gd} schedule: {len(schedule)} matches")
 
-    # Fit DC model on all data
+    if args.drift_report:
+        print("\n[2] DC parameter drift vs the full-history fit (teams active in the last year)...")
+        train = all_data.dropna(subset=["date","hg","ag"]).sort_values("date")
+        print(drift_report(train, XI, engine=args.dc_engine).to_string(index=False, float_format="{:.4f}".format))
+        return
+
+    # Fit DC model on all data (optionally truncated to recent history)
     print("\n[2] Fitting DC model on all completed data...")
-    dc_model = fit_dc(all_data)
+    dc_model = fit_dc(all_data, engine=args.dc_engine, use_cache=args.use_cache,
+                      min_weight=args.min_weight, window_days=args.window_days)
     print("  Done.")
 
     # Compute DC probs for all GD matches
-    dc_results = {}   # (ht,at) -> (ph, pd_, pa, pred_obj)
-    for _, row in schedule.iterrows():
-        ht, at = row["home_team"], row["away_team"]
-        dc_results[(ht,at)] = dc_pred(dc_model, ht, at)
+    dc_results, dc_grids = dc_pred_many(dc_model, zip(schedule["home_team"], schedule["away_team"]))   # (ht,at) -> (ph, pd_, pa, pred_obj)
+
+    # Price every market off the same score grids (one vectorized pass)
+    prices = price_markets(dc_grids, schedule["home_team"], schedule["away_team"])
+    price_lookup = prices.set_index(MARKET_KEYS)
 
     # Context
     print(f"[3] Computing current standings and form (after GD{gd-1})...")
@@ -672,15 +734,18 @@ def main():
         ou = MATCH_OU.get((ht, at))
         ou_ev_over = ou_ev_under = ou_p_over = ou_p_under = None
         ou_best_ev = ou_best_bet = ou_best_odds = None
-        if ou and pred_obj is not None:
-            ou_p_over, ou_p_under = ou_probs(pred_obj, ou["line"])
-            if ou_p_over is not None:
-                ou_ev_over  = round(ou_p_over  * ou["over"]  - 1, 5)
-                ou_ev_under = round(ou_p_under * ou["under"] - 1, 5)
-                if ou_ev_over >= ou_ev_under:
-                    ou_best_ev, ou_best_bet, ou_best_odds = ou_ev_over,  "OVER",  ou["over"]
-                else:
-                    ou_best_ev, ou_best_bet, ou_best_odds = ou_ev_under, "UNDER", ou["under"]
+        ou_key = (ht, at, "OU", "over", float(ou["line"])) if ou else None
+        if ou_key in price_lookup.index:
+            over  = price_lookup.loc[ou_key]
+            under = price_lookup.loc[(ht, at, "OU", "under", float(ou["line"]))]
+            ou_p_over, ou_p_under = float(over["p_win"]), float(under["p_win"])
+            # Push-aware: whole and quarter lines hand back (part of) the stake
+            ou_ev_over  = round(ou_p_over  * (ou["over"]  - 1) - over["p_loss"],  5)
+            ou_ev_under = round(ou_p_under * (ou["under"] - 1) - under["p_loss"], 5)
+            if ou_ev_over >= ou_ev_under:
+                ou_best_ev, ou_best_bet, ou_best_odds = ou_ev_over,  "OVER",  ou["over"]
+            else:
+                ou_best_ev, ou_best_bet, ou_best_odds = ou_ev_under, "UNDER", ou["under"]
 
         results.append({
             "home":ht, "away":at,
@@ -711,6 +776,9 @@ def main():
             "h_motive":feat["home_motivation"],"a_motive":feat["away_motivation"],
         })
 
+    # Every market we have odds for, ranked together
+    value_bets = rank_value_bets(with_result_probs(prices, results), market_odds_frame())
+
     # ─── Output ────────────────────────────────────────────────────────────────
     any_ref = any(r["referee"] for r in results)
 
@@ -810,7 +878,7 @@ def main():
         ev_flag = " ◄" if r["ou_best_ev"] > 0 else "  "
         xg_total = (r["dc_home_exp"] or 0) + (r["dc_away_exp"] or 0)
         print(f"{rk:<3} {match:<35} "
-              f"{r['ou_line']:>5.1f} "
+              f"{r['ou_line']:>5g} "
               f"{xg_total:>7.2f}g "
               f"{r['ou_p_over']:>8.4f} "
               f"{r['ou_p_under']:>9.4f} "
@@ -830,10 +898,22 @@ def main():
         ou_info = MATCH_OU.get((r['home'], r['away']), {})
         odds_val = ou_info.get("over" if r["ou_best_bet"]=="OVER" else "under", 0)
         print(f"  │  {rk}. {r['home']:18s} v {r['away']:18s}  →  "
-              f"{r['ou_best_bet']} {r['ou_line']:.1f} @ {odds_val:.2f}   "
+              f"{r['ou_best_bet']} {r['ou_line']:g} @ {odds_val:.2f}   "
               f"EV={r['ou_best_ev']:+.4f}   xG={xg_total:.2f}")
     print(f"  └──────────────────────────────────────────────────────────────────────┘")
 
+    # ─── All-market EV Rankings ──────────────────────────────────────────────
+    print("\n" + "="*100)
+    print("ALL-MARKET EV RANKINGS  (P(win) × (odds − 1) − P(loss); pushes return the stake)")
+    print("  1X2/DC use referee-adjusted ensemble probs; O/U, AH, BTTS, CS use the DC score grid.")
+    print("="*100)
+    print(f"{'Rk':<3} {'Match':<35} {'Bet':<18} {'Odds':>6} {'Fair':>6} {'P(win)':>7} {'P(push)':>8} {'EV':>8}")
+    print("─"*100)
+    for rk, b in enumerate(value_bets.to_dict("records"), 1):
+        ev_flag = " ◄" if b["ev"] > 0 else "  "
+        print(f"{rk:<3} {b['home'] + ' v ' + b['away']:<35} {bet_label(b):<18} {b['odds']:>6.2f} "
+              f"{b['fair_odds']:>6.2f} {b['p_win']:>7.4f} {b['p_push']:>8.4f} {b['ev']:>+8.4f}{ev_flag}")
+
     # ─── Save ML predictions JSON (consumed by export_dashboard + simulate_season) ──
     ml_out = {
         "gameday": gd,
@@ -846,6 +926,8 @@ def main():
                 "prob_draw": r["ref_D"],
                 "prob_away": r["ref_A"],
                 "predicted": r["ens_pred"],
+                "home_goal_expectation": r["dc_home_exp"],
+                "away_goal_expectation": r["dc_away_exp"],
             }
             for r in results
         ],
@@ -857,7 +939,7 @@ def main():
     if args.write_md:
         OBSIDIAN_DIR.mkdir(parents=True, exist_ok=True)
         md_path = OBSIDIAN_DIR / f"GD{gd}.md"
-        md = generate_markdown(gd, results, slist, ctx, ref_assigned, run_date)
+        md = generate_markdown(gd, results, slist, ctx, ref_assigned, run_date, value_bets)
         md_path.write_text(md, encoding="utf-8")
         print(f"\n📓  Obsidian note written → {md_path}")
     print()
@@ -1,17 +1,42 @@
 """
 Monte Carlo simulation for final league standings
 Runs 10,000 simulations of remaining matches to project May standings
+
+Usage:
+    python scripts/simulate_season.py                  # 10,000 simulations
+    python scripts/simulate_season.py --sims 1000000   # override simulation count
+    python scripts/simulate_season.py --seed 42        # reproducible run
+    python scripts/simulate_season.py --mode goals     # sample scorelines, apply tiebreakers
+    python scripts/simulate_season.py --workers 8      # shard simulations across 8 processes
+    python scripts/simulate_season.py --tolerance 0.002  # run 10k rounds until every std error < 0.2pp
+    python scripts/simulate_season.py --what-if "Galatasaray:Fenerbahce=2-1"  # conditioned odds
+    python scripts/simulate_season.py --leverage       # also write per-match swings to match_leverage
+    python scripts/simulate_season.py --cache-state    # reuse / persist the per-fixture outcome matrix
+    python scripts/simulate_season.py --cache-state --full  # ignore the cached matrix, resample everything
 """
+import argparse
 import json
 import pathlib
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
 import duckdb
 import numpy as np
 import pandas as pd
-from collections import defaultdict
+import pyarrow as pa
 
 DB_PATH = "data/football.duckdb"
 ML_PREDS_PATH = pathlib.Path("scripts/ml_predictions.json")
+STATE_PATH = pathlib.Path("data/simulation_state.npz")   # cached outcome matrix, keyed by fixture
+STATE_MAX_CELLS = 20_000_000   # matches x sims above which --cache-state falls back to batches
 N_SIMULATIONS = 10000
+MAX_SIMULATIONS = 1_000_000   # cap when running to a --tolerance
+MIN_TOLERANCE_SIMS = 10_000   # simulations before a --tolerance may stop the run
+BATCH_SIZE = 100_000   # simulations drawn per batch (bounds peak memory)
+GOALS_BATCH_SIZE = 20_000   # smaller batches for scoreline sampling (teams x teams x sims h2h)
+GOAL_COVARIANCE = 0.10      # bivariate Poisson shared component (lambda3)
+MIN_GOAL_EXPECTATION = 0.1
 CURRENT_SEASON = 2025  # 2025-26 season
 
 def get_current_standings(con):
@@ -26,15 +51,41 @@ def get_current_standings(con):
     """
     return con.execute(query, [CURRENT_SEASON]).fetchdf().set_index('team')['current_points'].to_dict()
 
+def get_current_goals(con):
+    """Get current goals for / against for each team"""
+    query = """
+    SELECT 
+        team,
+        SUM(goals_for) as goals_for,
+        SUM(goals_against) as goals_against
+    FROM main_intermediate.int_team_matches
+    WHERE season = ?
+    GROUP BY team
+    """
+    return con.execute(query, [CURRENT_SEASON]).fetchdf().set_index('team')[['goals_for', 'goals_against']]
+
+def get_completed_matches(con):
+    """Get completed results of the current season (for head-to-head tiebreakers)"""
+    query = """
+    SELECT 
+        home_team,
+        away_team,
+        home_goals,
+        away_goals
+    FROM main_staging.stg_fixtures
+    WHERE season = ?
+    """
+    return con.execute(query, [CURRENT_SEASON]).fetchdf()
+
 def load_ml_overrides() -> dict:
-    """Load ML predictions as {(home, away): (ph, pd, pa)} for the current gameday."""
+    """Load ML predictions as {(home, away): match entry} for the current gameday."""
     if not ML_PREDS_PATH.exists():
         return {}
     try:
         data = json.loads(ML_PREDS_PATH.read_text())
         overrides = {}
         for m in data.get("matches", []):
-            overrides[(m["home"], m["away"])] = (m["prob_home"], m["prob_draw"], m["prob_away"])
+            overrides[(m["home"], m["away"])] = m
         print(f"   ML overrides loaded: GD{data.get('gameday')} — {len(overrides)} matches will use DC+XGB probs")
         return overrides
     except Exception as e:
@@ -79,77 +130,847 @@ def get_future_match_probabilities(con):
     
     return df
 
-def simulate_match(prob_home, prob_draw, prob_away):
+def get_future_goal_expectations(con):
+    """Get SPI-based expected goals for all remaining matches"""
+    query = """
+    SELECT 
+        home_team,
+        away_team,
+        expected_home_goals as home_goal_expectation,
+        expected_away_goals as away_goal_expectation
+    FROM main_marts.match_predictions_future
+    WHERE season = ?
+    """
+    return con.execute(query, [CURRENT_SEASON]).fetchdf()
+
+def fill_goal_expectations(future_matches):
     """
-    Simulate a single match outcome based on probabilities
-    Returns: (home_points, away_points)
+    Fall back to the league-average home / away expectation for fixtures
+    without one (no SPI row and no ML override)
     """
-    # Normalize probabilities to ensure they sum to 1.0
-    total = prob_home + prob_draw + prob_away
-    prob_home = prob_home / total
-    prob_draw = prob_draw / total
-    prob_away = prob_away / total
-    
-    outcome = np.random.choice(['H', 'D', 'A'], p=[prob_home, prob_draw, prob_away])
-    
-    if outcome == 'H':
-        return 3, 0
-    elif outcome == 'A':
-        return 0, 3
-    else:
-        return 1, 1
+    columns = ['home_goal_expectation', 'away_goal_expectation']
+    missing = future_matches[columns].isna().any(axis=1)
+    if not missing.any():
+        return future_matches
+    if missing.all():
+        raise ValueError("No goal expectations for any remaining fixture — rebuild match_predictions_future")
+    print(f"   ⚠️  {int(missing.sum())} fixtures have no goal expectations — using league averages:")
+    for home, away in future_matches.loc[missing, ['home_team', 'away_team']].itertuples(index=False):
+        print(f"      {home} v {away}")
+    future_matches = future_matches.copy()
+    future_matches[columns] = future_matches[columns].fillna(future_matches.loc[~missing, columns].mean())
+    return future_matches
 
-def run_simulation(current_standings, future_matches):
+def goal_expectation_array(future_matches):
     """
-    Run one complete simulation of remaining matches
-    Returns: dict of final points by team
+    matches x 2 array of (home, away) goal expectations
+    Raises ValueError if any fixture has none (Poisson sampling cannot use NaN)
     """
-    # Start with current standings
-    final_standings = current_standings.copy()
-    
-    # Simulate each remaining match
-    for _, match in future_matches.iterrows():
-        home_pts, away_pts = simulate_match(
-            match['prob_home_win'],
-            match['prob_draw'],
-            match['prob_away_win']
+    goal_exp = future_matches[['home_goal_expectation', 'away_goal_expectation']].to_numpy(dtype=np.float64)
+    missing = np.isnan(goal_exp).any(axis=1)
+    if missing.any():
+        fixtures = future_matches.loc[missing, ['home_team', 'away_team']].itertuples(index=False)
+        raise ValueError("Missing goal expectations for: " + ", ".join(f"{h} v {a}" for h, a in fixtures))
+    return goal_exp
+
+def build_fixture_arrays(current_standings, future_matches):
+    """
+    Encode standings and remaining fixtures as arrays for the batched engine
+    Returns: (teams, base_points, home_idx, away_idx, probs)
+    """
+    teams = list(current_standings.keys())
+    for team in pd.concat([future_matches['home_team'], future_matches['away_team']]):
+        if team not in current_standings and team not in teams:
+            teams.append(team)
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    base_points = np.array([current_standings.get(t, 0) for t in teams], dtype=np.int32)
+    home_idx = future_matches['home_team'].map(team_index).to_numpy(dtype=np.intp)
+    away_idx = future_matches['away_team'].map(team_index).to_numpy(dtype=np.intp)
+
+    # Normalize probabilities to ensure each row sums to 1.0
+    probs = future_matches[['prob_home_win', 'prob_draw', 'prob_away_win']].to_numpy(dtype=np.float64)
+    probs = probs / probs.sum(axis=1, keepdims=True)
+
+    return teams, base_points, home_idx, away_idx, probs
+
+def simulate_outcomes(probs, n_sims, rng):
+    """
+    Draw every match outcome for every simulation in one shot
+    Returns: matches x sims uint8 matrix (0 = H, 1 = D, 2 = A)
+    """
+    cum_probs = np.cumsum(probs, axis=1)[:, :2].astype(np.float32)
+    u = rng.random((len(probs), n_sims), dtype=np.float32)
+    outcomes = (u >= cum_probs[:, 0:1]).astype(np.uint8)
+    outcomes += u >= cum_probs[:, 1:2]
+    return outcomes
+
+# Points won by the home / away side, indexed by outcome code
+HOME_POINTS = np.array([3, 1, 0], dtype=np.int32)
+AWAY_POINTS = np.array([0, 1, 3], dtype=np.int32)
+
+def scatter_totals(base, home_idx, away_idx, home_values, away_values):
+    """
+    Scatter-add matches x sims home / away values onto per-team base totals
+    Returns: teams x sims array
+    """
+    n_sims = home_values.shape[1]
+    totals = np.repeat(base[:, None], n_sims, axis=1)
+    np.add.at(totals, home_idx, home_values)
+    np.add.at(totals, away_idx, away_values)
+    return totals
+
+def simulate_points(base_points, home_idx, away_idx, outcomes):
+    """
+    Scatter-add match points into a teams x sims array of final points
+    """
+    return scatter_totals(base_points, home_idx, away_idx, HOME_POINTS[outcomes], AWAY_POINTS[outcomes])
+
+def simulate_scorelines(goal_exp, n_sims, rng, covariance=GOAL_COVARIANCE):
+    """
+    Sample bivariate Poisson scorelines for every match and simulation
+    goal_exp: matches x 2 array of (home, away) goal expectations
+    Returns: (home_goals, away_goals) as matches x sims int16 matrices
+    """
+    goal_exp = np.maximum(goal_exp, MIN_GOAL_EXPECTATION)
+    lambda3 = np.minimum(covariance, goal_exp.min(axis=1))[:, None]
+    shape = (len(goal_exp), n_sims)
+
+    shared = rng.poisson(lambda3, size=shape).astype(np.int16)
+    home_goals = rng.poisson(goal_exp[:, 0:1] - lambda3, size=shape).astype(np.int16) + shared
+    away_goals = rng.poisson(goal_exp[:, 1:2] - lambda3, size=shape).astype(np.int16) + shared
+    return home_goals, away_goals
+
+def scoreline_outcomes(home_goals, away_goals):
+    """Map scorelines to outcome codes (0 = H, 1 = D, 2 = A)"""
+    return (1 - np.sign(home_goals - away_goals)).astype(np.uint8)
+
+def build_head_to_head(teams, completed_matches):
+    """
+    Head-to-head points and goal difference from completed matches
+    Returns: two teams x teams arrays, entry [i, j] = team i's record against team j
+    """
+    n_teams = len(teams)
+    team_index = {team: i for i, team in enumerate(teams)}
+    known = completed_matches['home_team'].isin(team_index) & completed_matches['away_team'].isin(team_index)
+    played = completed_matches[known]
+
+    home_idx = played['home_team'].map(team_index).to_numpy(dtype=np.intp)
+    away_idx = played['away_team'].map(team_index).to_numpy(dtype=np.intp)
+    goal_diff = (played['home_goals'] - played['away_goals']).to_numpy(dtype=np.int32)
+    outcomes = (1 - np.sign(goal_diff)).astype(np.intp)
+
+    h2h_points = np.zeros((n_teams, n_teams), dtype=np.int32)
+    h2h_goal_diff = np.zeros((n_teams, n_teams), dtype=np.int32)
+    np.add.at(h2h_points, (home_idx, away_idx), HOME_POINTS[outcomes])
+    np.add.at(h2h_points, (away_idx, home_idx), AWAY_POINTS[outcomes])
+    np.add.at(h2h_goal_diff, (home_idx, away_idx), goal_diff)
+    np.add.at(h2h_goal_diff, (away_idx, home_idx), -goal_diff)
+    return h2h_points.astype(np.int16), h2h_goal_diff.astype(np.int16)
+
+def tiebreak_key(points, goals_for, goals_against, h2h_points, h2h_goal_diff):
+    """
+    Combine Süper Lig ranking criteria into one sortable teams x sims key:
+    points, head-to-head points among tied teams, head-to-head goal difference,
+    overall goal difference, goals scored
+    """
+    # Mini-league among teams level on points in the same simulation
+    tied = points[:, None, :] == points[None, :, :]
+    mini_points = (h2h_points * tied).sum(axis=1)
+    mini_goal_diff = (h2h_goal_diff * tied).sum(axis=1)
+
+    key = points.astype(np.int64)
+    key = key * 1000 + mini_points
+    key = key * 1000 + (mini_goal_diff + 500)
+    key = key * 1000 + (goals_for - goals_against + 500)
+    key = key * 1000 + goals_for
+    return key
+
+def build_goal_arrays(teams, current_goals, completed_matches, future_matches):
+    """
+    Encode goal expectations, goal tallies and head-to-head records for the goal engine
+    Returns: (goal_exp, base_gf, base_ga, base_h2h_points, base_h2h_goal_diff)
+    """
+    goal_exp = goal_expectation_array(future_matches)
+    base_gf = current_goals['goals_for'].reindex(teams, fill_value=0).to_numpy(dtype=np.int32)
+    base_ga = current_goals['goals_against'].reindex(teams, fill_value=0).to_numpy(dtype=np.int32)
+    base_h2h_points, base_h2h_goal_diff = build_head_to_head(teams, completed_matches)
+    return goal_exp, base_gf, base_ga, base_h2h_points, base_h2h_goal_diff
+
+def goal_tallies(base_gf, base_ga, base_h2h_points, base_h2h_goal_diff,
+                 home_idx, away_idx, home_goals, away_goals, outcomes):
+    """
+    Final goals for / against and head-to-head records for simulated scorelines
+    Returns: (goals_for, goals_against, h2h_points, h2h_goal_diff)
+    """
+    n_sims = home_goals.shape[1]
+    goals_for = scatter_totals(base_gf, home_idx, away_idx, home_goals, away_goals)
+    goals_against = scatter_totals(base_ga, home_idx, away_idx, away_goals, home_goals)
+
+    h2h_points = np.repeat(base_h2h_points[:, :, None], n_sims, axis=2)
+    h2h_goal_diff = np.repeat(base_h2h_goal_diff[:, :, None], n_sims, axis=2)
+    np.add.at(h2h_points, (home_idx, away_idx), HOME_POINTS[outcomes])
+    np.add.at(h2h_points, (away_idx, home_idx), AWAY_POINTS[outcomes])
+    np.add.at(h2h_goal_diff, (home_idx, away_idx), home_goals - away_goals)
+    np.add.at(h2h_goal_diff, (away_idx, home_idx), away_goals - home_goals)
+    return goals_for, goals_against, h2h_points, h2h_goal_diff
+
+def simulate_goal_batch(base_points, home_idx, away_idx, goal_exp, base_gf, base_ga,
+                        base_h2h_points, base_h2h_goal_diff, n_sims, rng):
+    """
+    Simulate one batch of seasons at scoreline level
+    Returns: (teams x sims final points, teams x sims tiebreak key)
+    """
+    home_goals, away_goals = simulate_scorelines(goal_exp, n_sims, rng)
+    outcomes = scoreline_outcomes(home_goals, away_goals)
+    points = simulate_points(base_points, home_idx, away_idx, outcomes)
+    tallies = goal_tallies(base_gf, base_ga, base_h2h_points, base_h2h_goal_diff,
+                           home_idx, away_idx, home_goals, away_goals, outcomes)
+    return points, tiebreak_key(points, *tallies)
+
+def simulate_outcome_batch(base_points, home_idx, away_idx, probs, n_sims, rng):
+    """
+    Simulate one batch of seasons at H/D/A level
+    Returns: (teams x sims final points, rank key) — points are the rank key
+    """
+    outcomes = simulate_outcomes(probs, n_sims, rng)
+    points = simulate_points(base_points, home_idx, away_idx, outcomes)
+    return points, points
+
+def build_engine(mode, current_standings, future_matches, current_goals=None, completed_matches=None):
+    """
+    Bind the fixture arrays to a batch simulator for the given mode
+    Returns: (teams, engine, max_points) where engine(n_sims, rng) -> (points, rank_key)
+    """
+    teams, base_points, home_idx, away_idx, probs = build_fixture_arrays(
+        current_standings, future_matches
+    )
+    if mode == "goals":
+        engine = partial(
+            simulate_goal_batch, base_points, home_idx, away_idx,
+            *build_goal_arrays(teams, current_goals, completed_matches, future_matches),
         )
-        
-        home_team = match['home_team']
-        away_team = match['away_team']
-        
-        final_standings[home_team] = final_standings.get(home_team, 0) + home_pts
-        final_standings[away_team] = final_standings.get(away_team, 0) + away_pts
-    
-    return final_standings
+    else:
+        engine = partial(simulate_outcome_batch, base_points, home_idx, away_idx, probs)
+
+    return teams, engine, max_final_points(base_points, home_idx, away_idx)
 
-def calculate_position_probabilities(simulation_results):
+def max_final_points(base_points, home_idx, away_idx):
+    """Upper bound on final points, used to size the points histogram"""
+    n_teams = len(base_points)
+    remaining = np.bincount(home_idx, minlength=n_teams) + np.bincount(away_idx, minlength=n_teams)
+    return int((base_points + 3 * remaining).max())
+
+def simulate_shard(engine, n_teams, max_points, n_sims, seed_seq, batch_size):
     """
-    Calculate probability of each team finishing in each position
+    Run one shard of simulations and reduce it to compact count arrays
+    Returns: (teams x positions counts, teams x points counts)
     """
-    position_counts = defaultdict(lambda: defaultdict(int))
-    
-    for standings in simulation_results:
-        # Sort teams by points (descending)
-        sorted_teams = sorted(standings.items(), key=lambda x: x[1], reverse=True)
-        
-        for position, (team, points) in enumerate(sorted_teams, start=1):
-            position_counts[team][position] += 1
-    
-    # Convert counts to probabilities
-    n_sims = len(simulation_results)
-    position_probs = {}
-    
-    for team, positions in position_counts.items():
-        position_probs[team] = {
-            pos: count / n_sims 
-            for pos, count in positions.items()
+    rng = np.random.default_rng(seed_seq)
+    position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    points_counts = np.zeros((n_teams, max_points + 1), dtype=np.int64)
+
+    for start in range(0, n_sims, batch_size):
+        points, rank_key = engine(min(batch_size, n_sims - start), rng)
+        position_counts += count_positions(rank_key)
+        points_counts += count_points(points, max_points)
+
+    return position_counts, points_counts
+
+def run_sharded(mode, current_standings, future_matches, n_sims, seed=None, workers=1,
+                current_goals=None, completed_matches=None, tolerance=None, max_sims=None):
+    """
+    Split n_sims across worker processes and merge their count arrays
+    Each shard gets its own child of SeedSequence(seed), so results are
+    reproducible for a given seed and worker count.
+
+    With a tolerance, rounds of n_sims are repeated until the standard error of
+    every team's title, top-4 and relegation probability is below it (after at
+    least MIN_TOLERANCE_SIMS simulations), or max_sims simulations have been run.
+    Returns: (teams, teams x positions counts, teams x points counts, simulations run)
+    """
+    teams, engine, max_points = build_engine(
+        mode, current_standings, future_matches, current_goals, completed_matches
+    )
+    batch_size = GOALS_BATCH_SIZE if mode == "goals" else BATCH_SIZE
+    seed_seq = np.random.SeedSequence(seed)
+    if seed is None:
+        print(f"   Seed entropy: {seed_seq.entropy}")
+    if max_sims is None:
+        max_sims = n_sims if tolerance is None else MAX_SIMULATIONS
+
+    position_counts = np.zeros((len(teams), len(teams)), dtype=np.int64)
+    points_counts = np.zeros((len(teams), max_points + 1), dtype=np.int64)
+    total = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while total < max_sims:
+            round_sims = min(n_sims, max_sims - total)
+            shard_sizes = [len(chunk) for chunk in np.array_split(np.arange(round_sims), workers)]
+            shard_args = (
+                [engine] * workers, [len(teams)] * workers, [max_points] * workers,
+                shard_sizes, seed_seq.spawn(workers), [batch_size] * workers,
+            )
+            shards = list((pool.map if pool else map)(simulate_shard, *shard_args))
+
+            position_counts += sum(shard[0] for shard in shards)
+            points_counts += sum(shard[1] for shard in shards)
+            total += round_sims
+
+            if tolerance is None:
+                break
+            max_error = probability_standard_errors(position_counts / total, total).max()
+            print(f"   {total:,} simulations — max standard error {max_error * 100:.2f}%")
+            if max_error < tolerance and total >= MIN_TOLERANCE_SIMS:
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return teams, position_counts, points_counts, total
+
+def finishing_positions(rank_key):
+    """
+    Final league position of every team in every simulation
+    rank_key: teams x sims array (higher = better), e.g. final points
+    Returns: teams x sims array of 0-based positions
+    """
+    n_teams = rank_key.shape[0]
+
+    # Sort teams by points (descending) within every simulation
+    order = np.argsort(-rank_key, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(n_teams)[:, None], axis=0)
+    return ranks
+
+def count_positions(rank_key):
+    """
+    Count how often each team finishes in each position
+    rank_key: teams x sims array (higher = better), e.g. final points
+    Returns: teams x positions count matrix (column 0 = 1st place)
+    """
+    n_teams = rank_key.shape[0]
+    ranks = finishing_positions(rank_key)
+
+    # Count (team, position) pairs
+    flat = (np.arange(n_teams)[:, None] * n_teams + ranks).ravel()
+    return np.bincount(flat, minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+
+def count_points(points, max_points):
+    """
+    Histogram of final points per team
+    Returns: teams x (max_points + 1) count matrix
+    """
+    n_teams = points.shape[0]
+    flat = (np.arange(n_teams)[:, None] * (max_points + 1) + points).ravel()
+    return np.bincount(flat, minlength=n_teams * (max_points + 1)).reshape(n_teams, max_points + 1)
+
+def draw_fixture_rows(mode, params, n_sims, rng):
+    """
+    Sample outcome rows (and scorelines in goals mode) for a set of fixtures
+    params: normalized H/D/A probabilities, or goal expectations in goals mode
+    Returns: dict of matches x sims arrays
+    """
+    if mode == "goals":
+        home_goals, away_goals = simulate_scorelines(params, n_sims, rng)
+        return {
+            "outcomes": scoreline_outcomes(home_goals, away_goals),
+            "home_goals": home_goals,
+            "away_goals": away_goals,
+        }
+    return {"outcomes": simulate_outcomes(params, n_sims, rng)}
+
+def build_scenario_base(mode, current_standings, future_matches, n_sims, seed=None,
+                        current_goals=None, completed_matches=None, draws=None):
+    """
+    Simulate n_sims seasons once and keep the per-match outcome matrix, so
+    what-if scenarios can be evaluated without rerunning the simulation
+    draws: optional pre-sampled rows from draw_fixture_rows (e.g. from the state cache)
+    Returns: dict of arrays consumed by evaluate_scenario
+    """
+    teams, base_points, home_idx, away_idx, probs = build_fixture_arrays(
+        current_standings, future_matches
+    )
+    rng = np.random.default_rng(seed)
+    base = {
+        "mode": mode,
+        "teams": teams,
+        "home_idx": home_idx,
+        "away_idx": away_idx,
+        "match_index": {
+            (home, away): i
+            for i, (home, away) in enumerate(zip(future_matches['home_team'], future_matches['away_team']))
+        },
+        "n_sims": n_sims,
+        "max_points": max_final_points(base_points, home_idx, away_idx),
+        "rng": rng,
+    }
+
+    if mode == "goals":
+        goal_exp, *goal_base = build_goal_arrays(teams, current_goals, completed_matches, future_matches)
+        if draws is None:
+            draws = draw_fixture_rows(mode, goal_exp, n_sims, rng)
+        home_goals, away_goals, outcomes = draws["home_goals"], draws["away_goals"], draws["outcomes"]
+        tallies = goal_tallies(*goal_base, home_idx, away_idx, home_goals, away_goals, outcomes)
+        base.update(goal_exp=goal_exp, home_goals=home_goals, away_goals=away_goals,
+                    tallies=tallies)
+    else:
+        if draws is None:
+            draws = draw_fixture_rows(mode, probs, n_sims, rng)
+        outcomes = draws["outcomes"]
+
+    base["outcomes"] = outcomes
+    base["points"] = simulate_points(base_points, home_idx, away_idx, outcomes)
+    base["rank_key"] = tiebreak_key(base["points"], *base["tallies"]) if mode == "goals" else base["points"]
+    return base
+
+def scenario_batches(mode, current_standings, future_matches, n_sims, seed=None,
+                     current_goals=None, completed_matches=None):
+    """
+    build_scenario_base over n_sims in batches (GOALS_BATCH_SIZE in goals mode,
+    else BATCH_SIZE) drawn from one random stream, so peak memory stays flat
+    Yields: scenario bases
+    """
+    batch_size = GOALS_BATCH_SIZE if mode == "goals" else BATCH_SIZE
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_sims, batch_size):
+        yield build_scenario_base(mode, current_standings, future_matches, min(batch_size, n_sims - start),
+                                  seed=rng, current_goals=current_goals, completed_matches=completed_matches)
+
+def fixture_params(mode, future_matches):
+    """Per-fixture sampling parameters the cached rows depend on"""
+    if mode == "goals":
+        return goal_expectation_array(future_matches)
+    probs = future_matches[['prob_home_win', 'prob_draw', 'prob_away_win']].to_numpy(dtype=np.float64)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+def load_simulation_state(path, mode, n_sims, seed):
+    """
+    Load the cached simulation state, or None if missing or built with other settings
+    """
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as npz:
+            state = {key: npz[key] for key in npz.files}
+    except Exception as e:
+        print(f"   ⚠️  Could not load simulation cache: {e}")
+        return None
+    if (str(state["mode"]) != mode or int(state["n_sims"]) != n_sims
+            or (seed is not None and str(state["seed"]) != str(seed))):
+        return None
+    return state
+
+def save_simulation_state(state, path=STATE_PATH):
+    """Persist the outcome matrix returned by cached_scenario_base"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, **state)
+
+def cached_scenario_base(mode, current_standings, future_matches, n_sims, seed=None,
+                         current_goals=None, completed_matches=None, full=False, state_path=STATE_PATH):
+    """
+    build_scenario_base on top of the persisted outcome matrix (keyed by fixture):
+    rows of completed fixtures are dropped (their real results are already in the
+    current standings), rows whose probabilities changed are resampled, and
+    everything else is reused. full=True ignores the cache.
+    Holds the full matches x sims matrices in memory — callers gate on STATE_MAX_CELLS.
+    Returns: (base, state) — pass state to save_simulation_state to persist it
+    """
+    fixtures = (future_matches['home_team'] + '|' + future_matches['away_team']).to_numpy(dtype=str)
+    params = fixture_params(mode, future_matches)
+
+    state = None if full else load_simulation_state(state_path, mode, n_sims, seed)
+    if state is None:
+        state = {
+            "mode": mode, "n_sims": n_sims, "seed": str(seed),
+            "entropy": str(np.random.SeedSequence(seed).entropy), "generation": 0,
+            "fixtures": np.array([], dtype=str), "params": np.empty((0, params.shape[1])),
         }
+
+    # Match current fixtures against cached rows with unchanged parameters
+    cached_rows = {fixture: i for i, fixture in enumerate(state["fixtures"])}
+    source = np.array([cached_rows.get(fixture, -1) for fixture in fixtures], dtype=np.intp)
+    reused = source >= 0
+    reused[reused] = np.isclose(state["params"][source[reused]], params[reused], rtol=0, atol=1e-9).all(axis=1)
+    stale = np.nonzero(~reused)[0]
+
+    # Fresh rows come from a new child stream so each refresh is reproducible
+    generation = int(state["generation"]) + 1
+    rng = np.random.default_rng(np.random.SeedSequence(int(state["entropy"]), spawn_key=(generation,)))
+    fresh = draw_fixture_rows(mode, params[stale], n_sims, rng)
+
+    draws = {}
+    for key, rows in fresh.items():
+        draws[key] = np.empty((len(fixtures), n_sims), dtype=rows.dtype)
+        if reused.any():
+            draws[key][reused] = state[key][source[reused]]
+        draws[key][stale] = rows
+
+    dropped = len(state["fixtures"]) - int((source >= 0).sum())
+    print(f"   ♻️  Simulation cache: {int(reused.sum())} fixtures reused, {len(stale)} resampled, "
+          f"{dropped} completed fixtures dropped")
+
+    new_state = dict(mode=mode, n_sims=n_sims, seed=state["seed"], entropy=state["entropy"],
+                     generation=generation, fixtures=fixtures, params=params, **draws)
+    base = build_scenario_base(mode, current_standings, future_matches, n_sims, seed=rng,
+                               current_goals=current_goals, completed_matches=completed_matches,
+                               draws=draws)
+    return base, new_state
+
+def parse_result(result):
+    """
+    Parse a fixed result: 'H' / 'D' / 'A' or a scoreline such as '2-1'
+    Returns: (outcome code, home goals or None, away goals or None)
+    """
+    result = result.strip().upper()
+    if result in ('H', 'D', 'A'):
+        return 'HDA'.index(result), None, None
+    try:
+        home_goals, away_goals = (int(g) for g in result.split('-'))
+    except ValueError:
+        raise ValueError(f"Invalid result '{result}' — use H, D, A or a scoreline like 2-1")
+    return int(1 - np.sign(home_goals - away_goals)), home_goals, away_goals
+
+def resample_scorelines(goal_exp, outcome_codes, home_goals, away_goals, rng):
+    """
+    Redraw scorelines that disagree with a fixed outcome until every one matches
+    goal_exp / outcome_codes: one row per fixed match; home_goals / away_goals: rows x sims
+    """
+    home_goals, away_goals = home_goals.copy(), away_goals.copy()
+    mismatch = np.nonzero(scoreline_outcomes(home_goals, away_goals) != outcome_codes[:, None])
+    while len(mismatch[0]):
+        new_home, new_away = simulate_scorelines(goal_exp[mismatch[0]], 1, rng)
+        home_goals[mismatch], away_goals[mismatch] = new_home[:, 0], new_away[:, 0]
+        keep = scoreline_outcomes(new_home[:, 0], new_away[:, 0]) != outcome_codes[mismatch[0]]
+        mismatch = (mismatch[0][keep], mismatch[1][keep])
+    return home_goals, away_goals
+
+def evaluate_scenario(base, scenario):
+    """
+    Position probabilities conditioned on fixed results
+    scenario: {(home, away): result} with result 'H' / 'D' / 'A' or a scoreline '2-1'
+    Only the fixed matches are replaced in the cached base simulation.
+    Returns: teams x positions count matrix
+    """
+    rows, codes, scorelines = [], [], []
+    for (home, away), result in scenario.items():
+        if (home, away) not in base["match_index"]:
+            raise ValueError(f"{home} v {away} is not among the remaining fixtures")
+        code, home_goals, away_goals = parse_result(result)
+        rows.append(base["match_index"][(home, away)])
+        codes.append(code)
+        scorelines.append((home_goals, away_goals))
+    rows, codes = np.array(rows, dtype=np.intp), np.array(codes, dtype=np.uint8)
+    home_idx, away_idx = base["home_idx"][rows], base["away_idx"][rows]
+    n_sims = base["n_sims"]
+
+    # Swap the cached outcomes of the fixed matches for the scenario's
+    old_outcomes = base["outcomes"][rows]
+    new_outcomes = np.repeat(codes[:, None], n_sims, axis=1)
+    points = base["points"].copy()
+    np.add.at(points, home_idx, HOME_POINTS[new_outcomes] - HOME_POINTS[old_outcomes])
+    np.add.at(points, away_idx, AWAY_POINTS[new_outcomes] - AWAY_POINTS[old_outcomes])
+
+    if base["mode"] != "goals":
+        return count_positions(points)
+
+    # Scoreline given: use it everywhere; result only: resample conditioned on the result
+    old_home, old_away = base["home_goals"][rows], base["away_goals"][rows]
+    new_home, new_away = resample_scorelines(base["goal_exp"][rows], codes, old_home, old_away, base["rng"])
+    for i, (home_goals, away_goals) in enumerate(scorelines):
+        if home_goals is not None:
+            new_home[i], new_away[i] = home_goals, away_goals
+
+    goals_for, goals_against, h2h_points, h2h_goal_diff = (t.copy() for t in base["tallies"])
+    np.add.at(goals_for, home_idx, new_home - old_home)
+    np.add.at(goals_for, away_idx, new_away - old_away)
+    np.add.at(goals_against, home_idx, new_away - old_away)
+    np.add.at(goals_against, away_idx, new_home - old_home)
+    np.add.at(h2h_points, (home_idx, away_idx), HOME_POINTS[new_outcomes] - HOME_POINTS[old_outcomes])
+    np.add.at(h2h_points, (away_idx, home_idx), AWAY_POINTS[new_outcomes] - AWAY_POINTS[old_outcomes])
+    goal_diff_delta = (new_home - new_away) - (old_home - old_away)
+    np.add.at(h2h_goal_diff, (home_idx, away_idx), goal_diff_delta)
+    np.add.at(h2h_goal_diff, (away_idx, home_idx), -goal_diff_delta)
+
+    rank_key = tiebreak_key(points, goals_for, goals_against, h2h_points, h2h_goal_diff)
+    return count_positions(rank_key)
+
+def reduce_scenario_bases(bases, scenario=None, leverage=False):
+    """
+    Sum position / points counts over scenario bases, plus what-if position
+    counts for a scenario and leverage_counts when leverage is set
+    Returns: (teams, position counts, points counts, scenario counts or None,
+              leverage counts or None, simulations)
+    """
+    position_counts = points_counts = scenario_counts = leverage_totals = None
+    total = 0
+    for base in bases:
+        if position_counts is None:
+            teams, n_teams = base["teams"], len(base["teams"])
+            position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+            points_counts = np.zeros((n_teams, base["max_points"] + 1), dtype=np.int64)
+            if scenario is not None:
+                scenario_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        position_counts += count_positions(base["rank_key"])
+        points_counts += count_points(base["points"], base["max_points"])
+        if scenario is not None:
+            scenario_counts += evaluate_scenario(base, scenario)
+        if leverage:
+            counts = leverage_counts(base)
+            leverage_totals = counts if leverage_totals is None else [t + c for t, c in zip(leverage_totals, counts)]
+        total += base["n_sims"]
+    return teams, position_counts, points_counts, scenario_counts, leverage_totals, total
+
+def parse_what_if(spec):
+    """Parse a --what-if argument 'Home:Away=RESULT' into ((home, away), result)"""
+    try:
+        fixture, result = spec.split('=')
+        home, away = fixture.split(':')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid --what-if '{spec}' — use Home:Away=2-1 or Home:Away=H")
+    return (home.strip(), away.strip()), result.strip()
+
+def print_scenario(teams, base_probs, scenario_probs, current_standings):
+    """Print conditioned title / top-4 / relegation odds against the base simulation"""
+    base_headline = headline_probabilities(base_probs)
+    scenario_headline = headline_probabilities(scenario_probs)
+    print(f"   {'Team':<18} {'Title':>15} {'Top 4':>15} {'Relegation':>15}")
+    for i in np.argsort(-scenario_headline[:, 1] - scenario_headline[:, 0], kind='stable'):
+        if teams[i] not in current_standings:
+            continue
+        cells = [
+            f"{scenario_headline[i, k] * 100:5.1f}% ({(scenario_headline[i, k] - base_headline[i, k]) * 100:+5.1f})"
+            for k in range(3)
+        ]
+        print(f"   {teams[i]:<18} {cells[0]:>15} {cells[1]:>15} {cells[2]:>15}")
+
+LEVERAGE_METRICS = ["title", "europe", "relegation"]
+
+def leverage_counts(base, batch_size=BATCH_SIZE):
+    """
+    Counts behind match_leverage for one scenario base, accumulated over
+    slices of batch_size simulations so memory does not grow with the sim count
+    Returns: ((metric x team) hits, (metric x team) x match x outcome joint hits,
+              match x outcome counts)
+    """
+    n_teams, n_sims = len(base["teams"]), base["n_sims"]
+    outcomes = base["outcomes"]
+    hits = np.zeros(len(LEVERAGE_METRICS) * n_teams)
+    joint = np.zeros((len(LEVERAGE_METRICS) * n_teams, len(outcomes), 3))
+    outcome_counts = np.zeros((len(outcomes), 3))
+
+    for start in range(0, n_sims, batch_size):
+        batch = slice(start, start + batch_size)
+        ranks = finishing_positions(base["rank_key"][:, batch])
+        indicators = np.concatenate([ranks == 0, ranks < 4, ranks >= n_teams - 3]).astype(np.float32)
+        hits += indicators.sum(axis=1)
+        for code in range(3):
+            is_outcome = (outcomes[:, batch] == code).astype(np.float32)
+            joint[:, :, code] += indicators @ is_outcome.T
+            outcome_counts[:, code] += is_outcome.sum(axis=1)
+    return hits, joint, outcome_counts
+
+def match_leverage(teams, future_matches, hits, joint, outcome_counts, n_sims):
+    """
+    Title / Europe (top 4) / relegation odds of every team conditioned on each
+    outcome of every remaining match, estimated in the projection pass by
+    grouping simulations by that match's outcome (counts from leverage_counts)
+    Returns: DataFrame with one row per (match, team, metric)
+    """
+    n_teams, n_matches = len(teams), len(outcome_counts)
+
+    # (metric x team) x (match x outcome) conditional probabilities
+    with np.errstate(invalid='ignore', divide='ignore'):
+        conditional = joint / outcome_counts
+    conditional = conditional.reshape(len(LEVERAGE_METRICS), n_teams, n_matches, 3)
+    base_probs = (hits / n_sims).reshape(len(LEVERAGE_METRICS), n_teams)
+    swing = np.nanmax(conditional, axis=3) - np.nanmin(conditional, axis=3)
+
+    metric_idx, team_idx, match_idx = np.meshgrid(
+        np.arange(len(LEVERAGE_METRICS)), np.arange(n_teams), np.arange(n_matches), indexing='ij'
+    )
+    return pd.DataFrame({
+        'home_team': future_matches['home_team'].to_numpy()[match_idx.ravel()],
+        'away_team': future_matches['away_team'].to_numpy()[match_idx.ravel()],
+        'team': np.asarray(teams)[team_idx.ravel()],
+        'metric': np.asarray(LEVERAGE_METRICS)[metric_idx.ravel()],
+        'prob_base': base_probs[metric_idx, team_idx].ravel(),
+        'prob_if_home_win': conditional[..., 0].ravel(),
+        'prob_if_draw': conditional[..., 1].ravel(),
+        'prob_if_away_win': conditional[..., 2].ravel(),
+        'swing': swing.ravel(),
+    })
+
+def print_top_leverage(leverage_df, n=10):
+    """Print the remaining fixtures with the biggest single-team swing"""
+    top = leverage_df.sort_values('swing', ascending=False).drop_duplicates(['home_team', 'away_team']).head(n)
+    print(f"   {'Match':<36} {'Team':<18} {'Metric':<11} {'Swing':>7}")
+    for _, r in top.iterrows():
+        match = f"{r['home_team']} v {r['away_team']}"
+        print(f"   {match:<36} {r['team']:<18} {r['metric']:<11} {r['swing'] * 100:>6.1f}%")
+
+def headline_probabilities(position_probs):
+    """
+    Title, top-4 (Champions League) and relegation (bottom 3) probabilities
+    Returns: teams x 3 matrix
+    """
+    return np.column_stack([
+        position_probs[:, 0],
+        position_probs[:, :4].sum(axis=1),
+        position_probs[:, -3:].sum(axis=1),
+    ])
+
+def probability_standard_errors(position_probs, n_sims):
+    """
+    Monte Carlo standard error of the headline probabilities, Agresti-Coull
+    adjusted (two pseudo-hits and two pseudo-misses) so an event that has not
+    been sampled yet still gets a non-zero error instead of looking converged
+    Returns: teams x 3 matrix (title, top 4, relegation)
+    """
+    p = (headline_probabilities(position_probs) * n_sims + 2) / (n_sims + 4)
+    return np.sqrt(p * (1 - p) / (n_sims + 4))
+
+def summarize_projections(teams, expected_points, position_probs, current_standings, n_sims):
+    """
+    Build the projections table from expected points and the position matrix
+    Standard errors are numeric, in percentage points
+    """
+    most_likely_pos = position_probs.argmax(axis=1) + 1
+    _, prob_top4, prob_relegation = headline_probabilities(position_probs).T
+    _, se_top4, se_relegation = probability_standard_errors(position_probs, n_sims).T
+
+    results = []
+    for i in np.argsort(-expected_points, kind='stable'):
+        team = teams[i]
+        if team not in current_standings:
+            continue
+        results.append({
+            'Team': team,
+            'Current Points': current_standings[team],
+            'Expected Points': round(float(expected_points[i]), 1),
+            'Most Likely Position': int(most_likely_pos[i]),
+            'Prob Top 4': f"{prob_top4[i] * 100:.1f}%",
+            'Prob Relegation': f"{prob_relegation[i] * 100:.1f}%",
+            'Top 4 Std Error': round(float(se_top4[i] * 100), 2),
+            'Relegation Std Error': round(float(se_relegation[i] * 100), 2)
+        })
     
-    return position_probs
+    return pd.DataFrame(results)
+
+def distribution_tables(run_id, run_at, teams, position_counts, points_counts, n_sims):
+    """
+    Long-format Arrow tables of the full position matrix and points histogram
+    (points bins that never occurred are skipped)
+    Returns: (position_table, points_table)
+    """
+    teams = np.asarray(teams)
+    n_teams, n_positions = position_counts.shape
+
+    def stamped(n_rows, columns):
+        return pa.table({
+            "run_id": pa.array(np.full(n_rows, run_id)),
+            "run_at": pa.array(np.full(n_rows, np.datetime64(run_at, 'us'))),
+            **columns,
+        })
+
+    position_table = stamped(n_teams * n_positions, {
+        "team": pa.array(np.repeat(teams, n_positions)),
+        "position": pa.array(np.tile(np.arange(1, n_positions + 1, dtype=np.int32), n_teams)),
+        "simulations": pa.array(position_counts.ravel()),
+        "probability": pa.array(position_counts.ravel() / n_sims),
+    })
+
+    team_idx, points = np.nonzero(points_counts)
+    counts = points_counts[team_idx, points]
+    points_table = stamped(len(counts), {
+        "team": pa.array(teams[team_idx]),
+        "points": pa.array(points.astype(np.int32)),
+        "simulations": pa.array(counts),
+        "probability": pa.array(counts / n_sims),
+    })
+    return position_table, points_table
+
+def save_results(results_df, leverage_df, teams, position_counts, points_counts, n_sims, mode):
+    """
+    Write the projections summary, the typed position / points distributions and
+    (optionally) match leverage in one transaction, stamped with a run_id
+    Returns: run_id
+    """
+    run_id = uuid.uuid4().hex
+    run_at = datetime.now()
+    position_table, points_table = distribution_tables(
+        run_id, run_at, teams, position_counts, points_counts, n_sims
+    )
+    run_table = pa.table({
+        "run_id": [run_id], "run_at": pa.array([run_at], pa.timestamp('us')),
+        "season": pa.array([CURRENT_SEASON], pa.int32()), "mode": [mode],
+        "simulations": pa.array([n_sims], pa.int64()),
+    })
+
+    con = duckdb.connect(DB_PATH)
+    con.register("results_df", results_df)
+    con.register("run_arrow", run_table)
+    con.register("position_arrow", position_table)
+    con.register("points_arrow", points_table)
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute("""
+            CREATE OR REPLACE TABLE main_marts.season_projections AS 
+            SELECT * FROM results_df
+        """)
+        for table, view in [("simulation_runs", "run_arrow"),
+                            ("season_position_probabilities", "position_arrow"),
+                            ("season_points_distribution", "points_arrow")]:
+            con.execute(f"CREATE TABLE IF NOT EXISTS main_marts.{table} AS SELECT * FROM {view} LIMIT 0")
+            con.execute(f"INSERT INTO main_marts.{table} SELECT * FROM {view}")
+        if leverage_df is not None:
+            con.register("leverage_df", leverage_df)
+            con.execute("""
+                CREATE OR REPLACE TABLE main_marts.match_leverage AS 
+                SELECT * FROM leverage_df
+            """)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+    return run_id
 
 def main():
-    print(f"🎲 Running {N_SIMULATIONS:,} season simulations...\n")
+    parser = argparse.ArgumentParser(description="Monte Carlo season simulation")
+    parser.add_argument("--sims", type=int, default=N_SIMULATIONS,
+                        help=f"Number of season simulations (default: {N_SIMULATIONS:,})")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for a reproducible run")
+    parser.add_argument("--mode", choices=["outcomes", "goals"], default="outcomes",
+                        help="outcomes: draw H/D/A only; goals: sample scorelines and apply tiebreakers")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes to shard simulations across (default: 1)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Repeat rounds of --sims until every title/top-4/relegation "
+                             f"standard error is below this (e.g. 0.002), after at least {MIN_TOLERANCE_SIMS:,}")
+    parser.add_argument("--max-sims", type=int, default=MAX_SIMULATIONS,
+                        help=f"Simulation cap when using --tolerance (default: {MAX_SIMULATIONS:,})")
+    parser.add_argument("--what-if", dest="what_if", type=parse_what_if, action="append", default=[],
+                        help="Fix a result, e.g. 'Galatasaray:Fenerbahce=2-1' or '...=H' (repeatable); "
+                             "prints conditioned odds and skips saving (single process)")
+    parser.add_argument("--leverage", action="store_true",
+                        help="Also write match_leverage, from the same simulations (single process)")
+    parser.add_argument("--cache-state", dest="cache_state", action="store_true",
+                        help=f"Reuse the per-fixture outcome matrix in {STATE_PATH} (only fixtures whose "
+                             f"probabilities changed are resampled); projection runs write it back. "
+                             f"Holds every simulation in memory, so runs over {STATE_MAX_CELLS:,} "
+                             f"fixtures x sims fall back to batches")
+    parser.add_argument("--full", action="store_true",
+                        help="With --cache-state: ignore the cached state and resample every fixture")
+    args = parser.parse_args()
+    if (args.what_if or args.leverage or args.cache_state) and (args.workers > 1 or args.tolerance is not None):
+        parser.error("--what-if, --leverage and --cache-state run a fixed --sims in one process; "
+                     "drop --workers / --tolerance")
+    n_sims = args.sims
+
+    print(f"🎲 Running {n_sims:,} season simulations...\n")
     
     con = duckdb.connect(DB_PATH)
     
@@ -163,6 +984,14 @@ def main():
     future_matches = get_future_match_probabilities(con)
     print(f"   {len(future_matches)} matches remaining")
 
+    current_goals = completed_matches = None
+    if args.mode == "goals":
+        print("⚽ Loading goal expectations, goal difference and head-to-head records...")
+        goal_exp = get_future_goal_expectations(con)
+        future_matches = future_matches.merge(goal_exp, on=["home_team", "away_team"], how="left")
+        current_goals = get_current_goals(con)
+        completed_matches = get_completed_matches(con)
+
     # Override current gameday with ML (DC+XGB+Referee) probabilities
     ml_overrides = load_ml_overrides()
     if ml_overrides:
@@ -170,13 +999,21 @@ def main():
         for idx, row in future_matches.iterrows():
             key = (row["home_team"], row["away_team"])
             if key in ml_overrides:
-                ph, pd_, pa = ml_overrides[key]
-                future_matches.at[idx, "prob_home_win"] = ph
-                future_matches.at[idx, "prob_draw"]     = pd_
-                future_matches.at[idx, "prob_away_win"] = pa
+                m = ml_overrides[key]
+                future_matches.at[idx, "prob_home_win"] = m["prob_home"]
+                future_matches.at[idx, "prob_draw"]     = m["prob_draw"]
+                future_matches.at[idx, "prob_away_win"] = m["prob_away"]
+                # DC goal expectations replace the SPI ones in goals mode
+                if args.mode == "goals" and m.get("home_goal_expectation") is not None:
+                    future_matches.at[idx, "home_goal_expectation"] = m["home_goal_expectation"]
+                    future_matches.at[idx, "away_goal_expectation"] = m["away_goal_expectation"]
                 overridden += 1
         if overridden:
             print(f"   ✓ {overridden} matches updated with ML probabilities")
+
+    # Fixtures with no SPI row (left merge) get NaN expectations, which Poisson sampling rejects
+    if args.mode == "goals":
+        future_matches = fill_goal_expectations(future_matches)
     
     con.close()
     
@@ -186,69 +1023,74 @@ def main():
         print("Then: dbt run --target motherduck")
         return
     
-    # Run simulations
-    print(f"\n🔄 Simulating {N_SIMULATIONS:,} seasons...")
-    simulation_results = []
-    
-    for i in range(N_SIMULATIONS):
-        if (i + 1) % 1000 == 0:
-            print(f"   {i + 1:,} / {N_SIMULATIONS:,}")
-        
-        final_standings = run_simulation(current_standings, future_matches)
-        simulation_results.append(final_standings)
+    # Projection runs stream count arrays from batches (sharded across --workers);
+    # what-if / leverage runs keep per-match outcomes, from the opt-in state cache
+    # or from fresh batches
+    keep_outcomes = bool(args.what_if or args.leverage or args.cache_state)
+    cache_state = args.cache_state
+    if cache_state and len(future_matches) * n_sims > STATE_MAX_CELLS:
+        print(f"\n⚠️  {len(future_matches)} fixtures x {n_sims:,} simulations exceeds the state cache limit "
+              f"({STATE_MAX_CELLS:,} cells) — simulating in batches without the cache")
+        cache_state = False
+
+    print(f"\n🔄 Simulating {n_sims:,} seasons...")
+    leverage_df = None
+    if cache_state:
+        base, state = cached_scenario_base(args.mode, current_standings, future_matches, n_sims, seed=args.seed,
+                                           current_goals=current_goals, completed_matches=completed_matches,
+                                           full=args.full)
+        bases = [base]
+    else:
+        bases = scenario_batches(args.mode, current_standings, future_matches, n_sims, seed=args.seed,
+                                 current_goals=current_goals, completed_matches=completed_matches)
+
+    # What-if: condition the simulation on the fixed results (nothing is saved)
+    if args.what_if:
+        scenario = dict(args.what_if)
+        print("\n🔮 WHAT IF: " + ", ".join(f"{h} v {a} = {r}" for (h, a), r in scenario.items()))
+        teams, position_counts, _, scenario_counts, _, n_sims = reduce_scenario_bases(bases, scenario)
+        print_scenario(teams, position_counts / n_sims, scenario_counts / n_sims, current_standings)
+        return
+
+    if keep_outcomes:
+        # Projections and leverage share the same outcome matrix
+        teams, position_counts, points_counts, _, leverage_totals, n_sims = reduce_scenario_bases(
+            bases, leverage=args.leverage
+        )
+        if args.leverage:
+            leverage_df = match_leverage(teams, future_matches, *leverage_totals, n_sims)
+        if cache_state:
+            save_simulation_state(state)
+    else:
+        teams, position_counts, points_counts, n_sims = run_sharded(
+            args.mode, current_standings, future_matches, n_sims, seed=args.seed, workers=args.workers,
+            current_goals=current_goals, completed_matches=completed_matches,
+            tolerance=args.tolerance, max_sims=args.max_sims if args.tolerance else None,
+        )
     
     # Calculate probabilities
     print("\n📈 Calculating position probabilities...")
-    position_probs = calculate_position_probabilities(simulation_results)
-    
-    # Expected final points
-    expected_points = {
-        team: np.mean([sim[team] for sim in simulation_results])
-        for team in current_standings.keys()
-    }
-    
-    # Create results DataFrame
-    results = []
-    for team in sorted(expected_points.keys(), key=lambda t: expected_points[t], reverse=True):
-        current_pts = current_standings[team]
-        expected_pts = expected_points[team]
-        
-        # Most likely finish position
-        most_likely_pos = max(position_probs[team].items(), key=lambda x: x[1])[0]
-        
-        # Probability of top 4 (Champions League)
-        prob_top4 = sum(position_probs[team].get(i, 0) for i in range(1, 5))
-        
-        # Probability of relegation (bottom 3)
-        num_teams = len(current_standings)
-        prob_relegation = sum(position_probs[team].get(i, 0) for i in range(num_teams - 2, num_teams + 1))
-        
-        results.append({
-            'Team': team,
-            'Current Points': current_pts,
-            'Expected Points': round(expected_pts, 1),
-            'Most Likely Position': most_likely_pos,
-            'Prob Top 4': f"{prob_top4 * 100:.1f}%",
-            'Prob Relegation': f"{prob_relegation * 100:.1f}%"
-        })
-    
-    results_df = pd.DataFrame(results)
+    position_probs = position_counts / n_sims
+    expected_points = points_counts @ np.arange(points_counts.shape[1]) / n_sims
+    results_df = summarize_projections(teams, expected_points, position_probs, current_standings, n_sims)
+    std_errors = probability_standard_errors(position_probs, n_sims).max(axis=0)
     
     print("\n" + "="*80)
     print("🏆 PROJECTED MAY STANDINGS")
     print("="*80)
     print(results_df.to_string(index=False))
+    print(f"\n   {n_sims:,} simulations — max standard error: title {std_errors[0] * 100:.2f}%, "
+          f"top 4 {std_errors[1] * 100:.2f}%, relegation {std_errors[2] * 100:.2f}%")
     
     # Save results
-    con = duckdb.connect(DB_PATH)
-    con.register("results_df", results_df)
-    con.execute("""
-        CREATE OR REPLACE TABLE main_marts.season_projections AS 
-        SELECT * FROM results_df
-    """)
-    con.close()
+    run_id = save_results(results_df, leverage_df, teams, position_counts, points_counts, n_sims, args.mode)
     
     print("\n✅ Results saved to: main_marts.season_projections")
+    print(f"   Run {run_id}: main_marts.season_position_probabilities, main_marts.season_points_distribution")
+    if leverage_df is not None:
+        print("\n⚖️  Highest-leverage remaining fixtures:")
+        print_top_leverage(leverage_df)
+        print("✅ Match leverage saved to: main_marts.match_leverage")
     print(f"💾 Database: {DB_PATH}")
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+Shared asyncio client for the Sofascore public API.
+
+Requests run concurrently but politely:
+  - at most max_concurrency requests in flight (semaphore)
+  - a token bucket caps the request rate (rate per second, bursts of burst)
+  - 429 / 5xx / network errors are retried with exponential backoff and
+    jitter, honouring Retry-After; 404 returns {} as the old fetch_json did
+
+Every response is kept in a content-addressed disk cache: the file name is
+the SHA-256 of the URL. A cached response is reused until it is ttl seconds
+old, except finished events (an event, or a round whose events are all
+finished), which cannot change and never expire.
+
+Scripts are synchronous, so they call fetch_all() / fetch_json(), which run
+the event loop for one batch of requests. HTTP goes through urllib in worker
+threads, so there is no async HTTP dependency. SOFASCORE_API_BASE points
+everything at another server (e.g. a local fake for testing).
+
+    from sofascore_client import fetch_all, round_events_path
+    rounds = fetch_all([round_events_path(r) for r in range(1, 35)])
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CACHE_DIR = PROJECT_ROOT / "data" / "sofascore_cache"
+API_BASE = os.environ.get("SOFASCORE_API_BASE", "https://www.sofascore.com/api/v1")
+
+TOURNAMENT_ID = 52       # Trendyol Süper Lig
+SEASON_ID = 77805        # 2025-26
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "application/json",
+}
+
+MAX_CONCURRENCY = 8
+RATE = 10.0              # requests per second, sustained
+BURST = 10
+RETRIES = 4
+BACKOFF_BASE = 0.5       # seconds; doubles every retry
+TIMEOUT = 15
+CACHE_TTL = 600          # seconds for responses that can still change
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+FINAL_STATUSES = {"finished", "canceled"}
+
+
+def season_path(suffix: str = "") -> str:
+    return f"/unique-tournament/{TOURNAMENT_ID}/season/{SEASON_ID}{suffix}"
+
+
+def rounds_path() -> str:
+    return season_path("/rounds")
+
+
+def round_events_path(round_num: int) -> str:
+    return season_path(f"/events/round/{round_num}")
+
+
+def event_path(event_id: int) -> str:
+    return f"/event/{event_id}"
+
+
+def referee_statistics_path(referee_id: int) -> str:
+    return f"/referee/{referee_id}/statistics"
+
+
+def is_final(data: dict) -> bool:
+    """True for an event, or a non-empty round of events, that can no longer change."""
+    events = [data["event"]] if "event" in data else data.get("events") or []
+    return bool(events) and all(
+        (ev.get("status") or {}).get("type") in FINAL_STATUSES for ev in events
+    )
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: rate tokens per second, at most capacity saved up."""
+
+    def __init__(self, rate: float = RATE, capacity: int = BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ResponseCache:
+    """Content-addressed JSON cache: one file per URL, named by the URL's SHA-256."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, ttl: float = CACHE_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+
+    def path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, url: str):
+        """Cached response, or None if missing or expired."""
+        path = self.path(url)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if entry["final"] or time.time() - entry["fetched_at"] < self.ttl:
+            return entry["data"]
+        return None
+
+    def put(self, url: str, data: dict) -> None:
+        path = self.path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"url": url, "fetched_at": time.time(), "final": is_final(data), "data": data}
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False))
+        os.replace(tmp, path)
+
+
+class SofascoreClient:
+    """Concurrent, rate-limited, cached GETs of Sofascore API paths."""
+
+    def __init__(self, base_url: str = API_BASE, max_concurrency: int = MAX_CONCURRENCY,
+                 rate: float = RATE, burst: int = BURST, retries: int = RETRIES,
+                 cache: ResponseCache | None = None, refresh: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.cache = cache or ResponseCache()
+        self.refresh = refresh       # ignore cached responses (new ones are still stored)
+        self.requests = 0            # HTTP requests actually sent (cache misses + retries)
+
+    def _get_blocking(self, url: str) -> dict:
+        req = urllib.request.Request(url, headers=HEADERS)
+        with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+            return json.loads(resp.read())
+
+    async def get(self, path: str) -> dict:
+        """JSON at an API path ({} on 404). Raises after the last failed retry."""
+        url = self.base_url + path
+        if not self.refresh:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with self.semaphore:
+                await self.bucket.acquire()
+                self.requests += 1
+                try:
+                    data = await asyncio.to_thread(self._get_blocking, url)
+                    break
+                except urllib.error.HTTPError as e:
+                    if e.code == 404:
+                        data = {}
+                        break
+                    if e.code not in RETRY_STATUSES or attempt == self.retries:
+                        raise
+                    retry_after = e.headers.get("Retry-After")
+                except (urllib.error.URLError, TimeoutError, ConnectionError):
+                    if attempt == self.retries:
+                        raise
+            # Back off outside the semaphore so other requests keep flowing
+            delay = BACKOFF_BASE * 2 ** attempt * (1 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+        self.cache.put(url, data)
+        return data
+
+    async def get_many(self, paths: list) -> list:
+        """Responses in the order of paths; a failed path yields its exception instead."""
+        return await asyncio.gather(*(self.get(p) for p in paths), return_exceptions=True)
+
+
+def fetch_all(paths: list, **client_kwargs) -> list:
+    """Fetch a batch of API paths concurrently (see SofascoreClient.get_many)."""
+    async def run():
+        return await SofascoreClient(**client_kwargs).get_many(list(paths))
+    return asyncio.run(run())
+
+
+def fetch_json(path: str, **client_kwargs) -> dict:
+    """Fetch one API path; raises on failure."""
+    result = fetch_all([path], **client_kwargs)[0]
+    if isinstance(result, BaseException):
+        raise result
+    return result
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+xi / ALPHA hyperparameter sweep over the Dixon-Coles walk-forward backtest.
+
+For every 2025-26 gameday the training window is built once and encoded as
+compact arrays. Each gameday is then fitted for the whole xi grid in one
+worker, warm-starting every xi from its neighbour. Gamedays run in parallel
+across --jobs processes.
+
+With --alphas, each DC prediction is also blended with the stored XGBoost
+probabilities from phase5_predictions.json:
+    alpha * DC + (1 - alpha) * XGB
+This mirrors ALPHA in predict_gameday.py. The XGB probabilities come from
+the last phase5 run, at that run's xi.
+
+Brier score, RPS, log-loss and accuracy per configuration are printed and
+appended to main_marts.dc_hyperparameter_sweep in DuckDB.
+
+Usage:
+    python scripts/sweep_hyperparameters.py
+    python scripts/sweep_hyperparameters.py --xis 0.001 0.0018 0.0025 --jobs 8
+    python scripts/sweep_hyperparameters.py --alphas 0.4 0.5 0.6 0.7 0.8
+"""
+
+import argparse
+import json
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from dc_walkforward import DC_ENGINES, DEFAULT_ENGINE, sweep_gameday, training_arrays
+from evaluate_predictions import OUTCOMES, score
+from dixon_coles_backtest import DUCKDB_PATH, build_training_windows, load_all_seasons, load_schedule
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PHASE5_JSON = PROJECT_ROOT / "scripts" / "phase5_predictions.json"
+
+XI_GRID = [0.0005, 0.001, 0.0013, 0.0015, 0.0018, 0.002, 0.0025, 0.003, 0.004]
+
+
+# ---------------------------------------------------------------------------
+# Data preparation
+# ---------------------------------------------------------------------------
+
+def gameday_outcomes(windows: list, df_2526_sched: pd.DataFrame) -> list:
+    """Actual outcome index (0=H, 1=D, 2=A, -1=unplayed) for every window's fixtures."""
+    # First match per fixture, as in run_backtest's lookup
+    played = df_2526_sched.dropna(subset=["round_number"]).drop_duplicates(["round_number", "home", "away"])
+    results = {
+        (int(r.round_number), r.home, r.away): OUTCOMES.index(r.result)
+        for r in played.itertuples()
+    }
+    return [
+        np.array([results.get((gd, h, a), -1) for h, a in zip(homes, aways)], dtype=np.int8)
+        for gd, (_, homes, aways) in enumerate(windows, start=1)
+    ]
+
+
+def load_xgb_probabilities(path: Path = PHASE5_JSON) -> dict:
+    """(home, away) -> XGBoost H/D/A from the last phase5 run."""
+    with open(path) as f:
+        return {
+            (p["home"], p["away"]): (p["prob_H_xgb"], p["prob_D_xgb"], p["prob_A_xgb"])
+            for p in json.load(f)
+        }
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def score_grid(xis, dc_probs: np.ndarray, actual: np.ndarray, homes, aways,
+               alphas=None, xgb: dict = None) -> pd.DataFrame:
+    """
+    One row per (xi, alpha) configuration.
+
+    dc_probs: xis x fixtures x 3; fixtures without a result or a DC prediction
+    (and, when blending, without an XGB prediction) are left out.
+    """
+    rows = []
+    played = actual >= 0
+    if alphas:
+        xgb_probs = np.array([xgb.get((h, a), (np.nan,) * 3) for h, a in zip(homes, aways)], dtype=float)
+        played &= ~np.isnan(xgb_probs).any(axis=1)
+    for k, xi in enumerate(xis):
+        ok = played & ~np.isnan(dc_probs[k]).any(axis=1)
+        rows.append({"xi": xi, "alpha": 1.0, **score(dc_probs[k][ok], actual[ok])})
+        for alpha in alphas or []:
+            blend = alpha * dc_probs[k][ok] + (1 - alpha) * xgb_probs[ok]
+            rows.append({"xi": xi, "alpha": alpha, **score(blend, actual[ok])})
+    return pd.DataFrame(rows)
+
+
+def save_sweep(results: pd.DataFrame, engine: str) -> str:
+    """Append the sweep to main_marts.dc_hyperparameter_sweep, stamped with a run_id."""
+    run_id = uuid.uuid4().hex
+    df = results.assign(run_id=run_id, run_at=datetime.now(), engine=engine)
+    df = df[["run_id", "run_at", "engine", "xi", "alpha", "n_matches", "brier", "rps", "log_loss", "accuracy"]]
+
+    con = duckdb.connect(str(DUCKDB_PATH))
+    con.register("sweep_df", df)
+    con.execute("CREATE SCHEMA IF NOT EXISTS main_marts")
+    con.execute("CREATE TABLE IF NOT EXISTS main_marts.dc_hyperparameter_sweep AS SELECT * FROM sweep_df LIMIT 0")
+    # Tables created before the rps column existed get it added (NULL for old runs)
+    con.execute("ALTER TABLE main_marts.dc_hyperparameter_sweep ADD COLUMN IF NOT EXISTS rps DOUBLE")
+    con.execute("INSERT INTO main_marts.dc_hyperparameter_sweep BY NAME SELECT * FROM sweep_df")
+    con.close()
+    return run_id
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="xi / ALPHA sweep over the DC walk-forward backtest")
+    parser.add_argument("--xis", type=float, nargs="+", default=XI_GRID,
+                        help="Time-decay rates to evaluate")
+    parser.add_argument("--alphas", type=float, nargs="+", default=None,
+                        help="Also score DC/XGB blends at these DC weights (needs phase5_predictions.json)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Gamedays fitted in parallel across N processes")
+    parser.add_argument("--engine", choices=list(DC_ENGINES), default=DEFAULT_ENGINE,
+                        help=f"Dixon-Coles implementation (default: {DEFAULT_ENGINE})")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="Refit instead of reusing cached model parameters")
+    args = parser.parse_args()
+    xis = sorted(args.xis)
+
+    print("Dixon-Coles Hyperparameter Sweep — Turkish Super Lig 2025-26")
+    print("=" * 60)
+
+    print("\nLoading season data from the local match store...")
+    all_data = load_all_seasons()
+    schedule = load_schedule()
+    windows, df_2526_sched = build_training_windows(all_data, schedule)
+    actual = gameday_outcomes(windows, df_2526_sched)
+
+    xgb = None
+    if args.alphas:
+        xgb = load_xgb_probabilities(PHASE5_JSON)
+        print(f"Loaded {len(xgb)} XGBoost predictions from {PHASE5_JSON.name}")
+
+    # Encode every window once; each worker fits all xi values for its gameday
+    payload = [training_arrays(train) for train, _, _ in windows]
+    homes = [list(h) for _, h, _ in windows]
+    aways = [list(a) for _, _, a in windows]
+    print(f"\nFitting {len(windows)} gamedays x {len(xis)} xi values ({args.jobs} process(es))...")
+    sweep_args = (payload, homes, aways, repeat(xis), repeat(args.engine), repeat(args.use_cache))
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            per_gameday = list(pool.map(sweep_gameday, *sweep_args))
+    else:
+        per_gameday = list(map(sweep_gameday, *sweep_args))
+
+    results = score_grid(
+        xis, np.concatenate(per_gameday, axis=1), np.concatenate(actual),
+        [h for hs in homes for h in hs], [a for as_ in aways for a in as_],
+        alphas=args.alphas, xgb=xgb,
+    )
+
+    print("\n" + "=" * 60)
+    print(results.sort_values("brier").to_string(index=False, float_format="{:.4f}".format))
+    best = results.loc[results["brier"].idxmin()]
+    print(f"\nBest Brier: xi={best['xi']:g}, alpha={best['alpha']:g} "
+          f"(Brier {best['brier']:.4f}, log-loss {best['log_loss']:.4f}, accuracy {best['accuracy']:.1%})")
+
+    run_id = save_sweep(results, args.engine)
+    print(f"\nSaved to main_marts.dc_hyperparameter_sweep (run {run_id})")
+
+
+if __name__ == "__main__":
+    main()
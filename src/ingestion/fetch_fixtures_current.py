@@ -6,54 +6,100 @@ Data source: football-data.co.uk (free, no API key required)
 Completed matches are loaded directly from the CSV.
 Upcoming fixtures are generated as skeleton rows (home/away pairs not yet played),
 because football-data.co.uk only publishes results, not future schedules.
+
+Refresh is incremental: the CSV is fetched with a conditional GET (the ETag /
+Last-Modified of the previous fetch, kept in raw.fetch_state), and the run stops
+on 304 Not Modified or when the body hashes the same as last time. Otherwise
+only new or changed fixtures are upserted into raw.fixtures (keyed on
+fixture_id), so polling during matchdays costs one request. --force refetches
+and rewrites the season regardless.
 """
+import argparse
 import hashlib
+import io
 import duckdb
 import pandas as pd
+import requests
 from itertools import permutations
 
 DB_PATH = "data/football.duckdb"
 CURRENT_SEASON = 2025  # 2025-26 season
 CURRENT_URL = "https://www.football-data.co.uk/mmz4281/2526/T1.csv"
+REQUEST_TIMEOUT = 30
+
+MATCH_COLUMNS = ["season", "date", "home_team", "away_team", "home_goals", "away_goals", "status"]
+FIXTURE_COLUMNS = MATCH_COLUMNS + ["fixture_id"]
 
+CSV_DTYPES = {"Date": "string", "HomeTeam": "string", "AwayTeam": "string",
+              "FTHG": "float64", "FTAG": "float64", "FTR": "string"}
 
-def make_fixture_id(season: int, home_team: str, away_team: str) -> int:
-    """Generate a stable surrogate fixture_id from match identifiers (fits INT32)."""
-    s = f"{season}:{home_team}:{away_team}"
-    return int(hashlib.md5(s.encode()).hexdigest()[:7], 16)  # max 0xFFFFFFF = 268M < INT32 max
+# Stable surrogate fixture_id from match identifiers, computed in DuckDB over
+# the whole frame: md5("season:home:away"), first 7 hex digits (max 0xFFFFFFF
+# = 268M < INT32 max)
+FIXTURE_ID_SQL = "('0x' || left(md5(season::VARCHAR || ':' || home_team || ':' || away_team), 7))::INTEGER"
 
 
-def infer_season(date_obj) -> int:
-    """Aug–Dec → that calendar year; Jan–Jul → prior year."""
-    return date_obj.year if date_obj.month >= 8 else date_obj.year - 1
+def infer_season(dates: pd.Series) -> pd.Series:
+    """Aug–Dec → that calendar year; Jan–Jul → prior year (for a whole datetime column)."""
+    return dates.dt.year - (dates.dt.month < 8).astype(int)
 
 
-def fetch_completed(url: str) -> pd.DataFrame:
-    """Download the current season CSV and return completed matches."""
+def fetch_csv(url: str, state: dict) -> tuple:
+    """
+    Conditional GET of the season CSV.
+
+    state: the previous fetch's etag / last_modified (empty to fetch unconditionally)
+    Returns: (body bytes or None on 304 Not Modified, response headers)
+    """
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
     print(f"  Downloading {url}")
-    df = pd.read_csv(url, encoding="latin-1")
+    resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if resp.status_code == 304:
+        return None, resp.headers
+    resp.raise_for_status()
+    return resp.content, resp.headers
+
+
+def load_fetch_state(con, url: str) -> dict:
+    """ETag, Last-Modified and content hash of the last ingested fetch of url."""
+    row = con.execute(
+        "SELECT etag, last_modified, content_sha256 FROM raw.fetch_state WHERE url = ?", [url]
+    ).fetchone()
+    return dict(zip(["etag", "last_modified", "content_sha256"], row)) if row else {}
+
+
+def save_fetch_state(con, url: str, headers, content_sha256: str) -> None:
+    con.execute("DELETE FROM raw.fetch_state WHERE url = ?", [url])
+    con.execute(
+        "INSERT INTO raw.fetch_state VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        [url, headers.get("ETag"), headers.get("Last-Modified"), content_sha256],
+    )
+
+
+def fetch_completed(csv) -> pd.DataFrame:
+    """Parse the current season CSV (URL, path or file-like) and return completed matches."""
+    # Only the result columns, typed up front; blank goal cells read as NaN
+    df = pd.read_csv(csv, encoding="latin-1", usecols=list(CSV_DTYPES), dtype=CSV_DTYPES,
+                     skipinitialspace=True)
 
-    df = df[["Date", "HomeTeam", "AwayTeam", "FTHG", "FTAG", "FTR"]].copy()
     # Keep only rows that have full-time results
     df = df.dropna(subset=["FTHG", "FTAG", "FTR"])
-    df = df[df["FTHG"].astype(str).str.strip() != ""]
-    df = df[df["FTAG"].astype(str).str.strip() != ""]
-
-    df["date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")
-    df["season"] = df["date"].apply(infer_season)
-    df = df[df["season"] == CURRENT_SEASON]
-
-    df["home_team"] = df["HomeTeam"].str.strip()
-    df["away_team"] = df["AwayTeam"].str.strip()
-    df["home_goals"] = df["FTHG"].astype(int)
-    df["away_goals"] = df["FTAG"].astype(int)
-    df["status"] = "FT"
-    df["fixture_id"] = df.apply(
-        lambda r: make_fixture_id(r["season"], r["home_team"], r["away_team"]), axis=1
-    )
-    df["date"] = df["date"].dt.date
 
-    return df[["season", "date", "home_team", "away_team", "home_goals", "away_goals", "status", "fixture_id"]]
+    date = pd.to_datetime(df["Date"], format="%d/%m/%Y")
+    df = pd.DataFrame({
+        "season": infer_season(date),
+        "date": date,
+        "home_team": df["HomeTeam"].str.strip(),
+        "away_team": df["AwayTeam"].str.strip(),
+        "home_goals": df["FTHG"].astype("Int64"),
+        "away_goals": df["FTAG"].astype("Int64"),
+        "status": "FT",
+    })
+    return df[df["season"] == CURRENT_SEASON].reset_index(drop=True)
 
 
 def generate_upcoming(completed: pd.DataFrame) -> pd.DataFrame:
@@ -66,10 +112,6 @@ def generate_upcoming(completed: pd.DataFrame) -> pd.DataFrame:
     """
     teams = sorted(set(completed["home_team"].tolist() + completed["away_team"].tolist()))
 
-    if len(teams) == 0:
-        return pd.DataFrame(columns=["season", "date", "home_team", "away_team",
-                                     "home_goals", "away_goals", "status", "fixture_id"])
-
     # All possible (home, away) pairs — each team plays every other team home AND away
     all_pairs = set(permutations(teams, 2))
 
@@ -77,25 +119,71 @@ def generate_upcoming(completed: pd.DataFrame) -> pd.DataFrame:
     played_pairs = set(
         zip(completed["home_team"], completed["away_team"])
     )
-    remaining_pairs = all_pairs - played_pairs
+    remaining_pairs = pd.DataFrame(sorted(all_pairs - played_pairs), columns=["home_team", "away_team"],
+                                   dtype="string")
 
-    rows = []
-    for home_team, away_team in sorted(remaining_pairs):
-        rows.append({
-            "season": CURRENT_SEASON,
-            "date": None,          # Date unknown for future fixtures
-            "home_team": home_team,
-            "away_team": away_team,
-            "home_goals": None,
-            "away_goals": None,
-            "status": "NS",
-            "fixture_id": make_fixture_id(CURRENT_SEASON, home_team, away_team),
-        })
+    no_goals = pd.Series(pd.NA, index=remaining_pairs.index, dtype="Int64")
+    return remaining_pairs.assign(
+        season=CURRENT_SEASON,
+        date=pd.NaT,           # Date unknown for future fixtures
+        home_goals=no_goals,
+        away_goals=no_goals,
+        status="NS",
+    )[MATCH_COLUMNS]
 
-    return pd.DataFrame(rows)
+
+def merge_fixtures(con, fixtures: pd.DataFrame) -> tuple:
+    """
+    Upsert fixtures into raw.fixtures keyed on fixture_id, touching only rows
+    that are new or whose values changed.
+
+    Returns: (inserted, updated, unchanged) row counts
+    """
+    fixtures = fixtures.drop_duplicates(["season", "home_team", "away_team"], keep="last")
+    con.register("df_current", fixtures)
+    distinct = " OR ".join(f"t.{c} IS DISTINCT FROM s.{c}" for c in MATCH_COLUMNS)
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE changed_fixtures AS
+        WITH s AS (
+            SELECT season::INTEGER AS season, date::DATE AS date, home_team, away_team,
+                   home_goals::INTEGER AS home_goals, away_goals::INTEGER AS away_goals, status,
+                   {FIXTURE_ID_SQL} AS fixture_id
+            FROM df_current
+        )
+        SELECT s.*, t.fixture_id IS NULL AS is_new
+        FROM s
+        LEFT JOIN raw.fixtures t ON t.fixture_id = s.fixture_id
+        WHERE t.fixture_id IS NULL OR {distinct}
+    """)
+    inserted, updated = con.execute(
+        "SELECT COUNT(*) FILTER (WHERE is_new), COUNT(*) FILTER (WHERE NOT is_new) FROM changed_fixtures"
+    ).fetchone()
+
+    # UPDATE + INSERT rather than MERGE INTO, which needs DuckDB >= 1.4
+    con.execute(f"""
+        UPDATE raw.fixtures AS t SET
+            {", ".join(f"{c} = s.{c}" for c in MATCH_COLUMNS)},
+            updated_at = CURRENT_TIMESTAMP
+        FROM changed_fixtures AS s
+        WHERE t.fixture_id = s.fixture_id AND NOT s.is_new
+    """)
+    columns = ", ".join(FIXTURE_COLUMNS)
+    con.execute(f"""
+        INSERT INTO raw.fixtures ({columns})
+        SELECT {columns} FROM changed_fixtures WHERE is_new
+    """)
+    con.execute("DROP TABLE changed_fixtures")
+    con.unregister("df_current")
+    return inserted, updated, len(fixtures) - inserted - updated
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Refresh current season fixtures in raw.fixtures")
+    parser.add_argument("--url", default=CURRENT_URL, help="Season CSV to fetch")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the last fetch: download unconditionally and rewrite the season")
+    args = parser.parse_args()
+
     con = duckdb.connect(DB_PATH)
 
     con.execute("CREATE SCHEMA IF NOT EXISTS raw")
@@ -112,11 +200,33 @@ def main():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS raw.fetch_state (
+            url VARCHAR,
+            etag VARCHAR,
+            last_modified VARCHAR,
+            content_sha256 VARCHAR,
+            fetched_at TIMESTAMP
+        )
+    """)
 
     print(f"📥 Fetching current season ({CURRENT_SEASON}) fixtures...\n")
 
+    state = {} if args.force else load_fetch_state(con, args.url)
+    body, headers = fetch_csv(args.url, state)
+    if body is None:
+        print("  → 304 Not Modified — nothing to do")
+        con.close()
+        return
+    content_sha256 = hashlib.sha256(body).hexdigest()
+    if content_sha256 == state.get("content_sha256"):
+        print("  → CSV unchanged since last fetch — nothing to do")
+        save_fetch_state(con, args.url, headers, content_sha256)
+        con.close()
+        return
+
     # --- Completed matches ---
-    completed = fetch_completed(CURRENT_URL)
+    completed = fetch_completed(io.BytesIO(body))
     print(f"  → {len(completed)} completed matches (FT)")
 
     # Print distinct team names for manual consistency check
@@ -130,18 +240,13 @@ def main():
     # Combine
     all_fixtures = pd.concat([completed, upcoming], ignore_index=True)
 
-    # CRITICAL: Delete old current-season data to avoid duplicates
-    print(f"🗑️  Clearing old season {CURRENT_SEASON} data...")
-    con.execute("DELETE FROM raw.fixtures WHERE season = ?", [CURRENT_SEASON])
+    if args.force:
+        print(f"🗑️  Clearing old season {CURRENT_SEASON} data...")
+        con.execute("DELETE FROM raw.fixtures WHERE season = ?", [CURRENT_SEASON])
 
-    print(f"📊 Inserting {len(all_fixtures)} fixtures...")
-    con.register("df_current", all_fixtures)
-    con.execute("""
-        INSERT INTO raw.fixtures
-            (season, date, home_team, away_team, home_goals, away_goals, status, fixture_id)
-        SELECT season, date, home_team, away_team, home_goals, away_goals, status, fixture_id
-        FROM df_current
-    """)
+    inserted, updated, unchanged = merge_fixtures(con, all_fixtures)
+    print(f"📊 Merged fixtures: {inserted} inserted, {updated} updated, {unchanged} unchanged")
+    save_fetch_state(con, args.url, headers, content_sha256)
 
     summary = con.execute("""
         SELECT
@@ -3,7 +3,6 @@ Fetch historical fixtures (completed past seasons only)
 Run this ONCE initially, then only when archiving completed seasons
 Data source: football-data.co.uk (free, no API key required)
 """
-import hashlib
 import duckdb
 import pandas as pd
 from datetime import datetime
@@ -18,59 +17,55 @@ SEASON_URLS = {
 }
 
 
-def make_fixture_id(season: int, home_team: str, away_team: str) -> int:
-    """Generate a stable surrogate fixture_id from match identifiers (fits INT32)."""
-    s = f"{season}:{home_team}:{away_team}"
-    return int(hashlib.md5(s.encode()).hexdigest()[:7], 16)  # max 0xFFFFFFF = 268M < INT32 max
+CSV_DTYPES = {"Date": "string", "HomeTeam": "string", "AwayTeam": "string",
+              "FTHG": "float64", "FTAG": "float64", "FTR": "string"}
 
+# Stable surrogate fixture_id from match identifiers, computed in DuckDB inside
+# the insert: md5("season:home:away"), first 7 hex digits (max 0xFFFFFFF
+# = 268M < INT32 max)
+FIXTURE_ID_SQL = "('0x' || left(md5(season::VARCHAR || ':' || home_team || ':' || away_team), 7))::INTEGER"
 
-def infer_season(date_obj) -> int:
+
+def infer_season(dates: pd.Series) -> pd.Series:
     """
     Turkish Süper Lig runs Aug–May.
     Aug–Dec match belongs to that calendar year's season.
     Jan–Jul match belongs to the prior year's season.
+    Works on a whole datetime column at once.
     """
-    if date_obj.month >= 8:
-        return date_obj.year
-    else:
-        return date_obj.year - 1
+    return dates.dt.year - (dates.dt.month < 8).astype(int)
 
 
 def parse_csv(url: str, expected_season: int) -> pd.DataFrame:
     """Download and parse a football-data.co.uk CSV for one season."""
     print(f"  Downloading {url}")
-    df = pd.read_csv(url, encoding="latin-1")
+    # Only the columns we need, typed up front; blank goal cells read as NaN
+    df = pd.read_csv(url, encoding="latin-1", usecols=list(CSV_DTYPES), dtype=CSV_DTYPES,
+                     skipinitialspace=True)
 
-    # Keep only columns we need; skip rows with missing results
-    df = df[["Date", "HomeTeam", "AwayTeam", "FTHG", "FTAG", "FTR"]].copy()
+    # Skip rows with missing results
     df = df.dropna(subset=["FTHG", "FTAG", "FTR"])
-    df = df[df["FTHG"].astype(str).str.strip() != ""]
-    df = df[df["FTAG"].astype(str).str.strip() != ""]
 
     # Parse date: football-data.co.uk uses DD/MM/YYYY
-    df["date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")
-
-    # Infer season from match date; warn if it doesn't match expected
-    df["season"] = df["date"].apply(infer_season)
+    date = pd.to_datetime(df["Date"], format="%d/%m/%Y")
+    df = pd.DataFrame({
+        "season": infer_season(date),
+        "date": date,
+        "home_team": df["HomeTeam"].str.strip(),
+        "away_team": df["AwayTeam"].str.strip(),
+        "home_goals": df["FTHG"].astype(int),
+        "away_goals": df["FTAG"].astype(int),
+        "status": "FT",
+    })
+
+    # Warn if the inferred season doesn't match the expected one
     unexpected = df[df["season"] != expected_season]
     if not unexpected.empty:
         print(
             f"  ⚠️  {len(unexpected)} rows inferred as season "
             f"{unexpected['season'].unique().tolist()} (expected {expected_season}) — check dates"
         )
-    df = df[df["season"] == expected_season]
-
-    df["home_team"] = df["HomeTeam"].str.strip()
-    df["away_team"] = df["AwayTeam"].str.strip()
-    df["home_goals"] = df["FTHG"].astype(int)
-    df["away_goals"] = df["FTAG"].astype(int)
-    df["status"] = "FT"
-    df["fixture_id"] = df.apply(
-        lambda r: make_fixture_id(r["season"], r["home_team"], r["away_team"]), axis=1
-    )
-    df["date"] = df["date"].dt.date  # convert to plain date
-
-    return df[["season", "date", "home_team", "away_team", "home_goals", "away_goals", "status", "fixture_id"]]
+    return df[df["season"] == expected_season].reset_index(drop=True)
 
 
 def main():
@@ -102,10 +97,11 @@ def main():
         if not df.empty:
             con.execute("DELETE FROM raw.fixtures WHERE season = ?", [season])
             con.register("df_hist", df)
-            con.execute("""
+            con.execute(f"""
                 INSERT INTO raw.fixtures
                     (season, date, home_team, away_team, home_goals, away_goals, status, fixture_id)
-                SELECT season, date, home_team, away_team, home_goals, away_goals, status, fixture_id
+                SELECT season, date::DATE, home_team, away_team, home_goals, away_goals, status,
+                       {FIXTURE_ID_SQL}
                 FROM df_hist
             """)
             total_inserted += len(df)